@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
-from io import StringIO
+
+from calculo_inss.colagem import COLUNAS_CARTA, COLUNAS_CNIS, descrever_relatorio, ler_colagem
+from calculo_inss.competencias import para_datetime, para_yyyymm
+from calculo_inss.marcadores import DESCONSIDERADO, com_marcador, marcadores
+from calculo_inss.formulas import fator_previdenciario, salario_beneficio, renda_mensal_inicial
 
 st.set_page_config(page_title="Dashboard Previdenciário Modular", layout="wide")
 st.title("📊 Dashboard Previdenciário Modular - Revisão do Benefício - Versão 4.1")
@@ -18,14 +22,11 @@ st.header("📥 Etapa 2 - Inserção dos Dados da Carta de Concessão")
 carta_txt = st.text_area("Cole os dados da Carta de Benefício (SEQ, Data, Salário, Índice, Salário Corrigido, Observação)", height=200)
 
 # Funções auxiliares para parsing e limpeza dos dados
-def parse_data(text_data, sep_options=['\t', ';', ',']):
-    for sep in sep_options:
-        try:
-            df = pd.read_csv(StringIO(text_data), sep=sep)
-            return df
-        except:
-            continue
-    return None
+def relatar_colagem(relatorio):
+    st.caption(descrever_relatorio(relatorio))
+    if relatorio['rejeitadas']:
+        with st.expander(f"⚠️ {len(relatorio['rejeitadas'])} linhas rejeitadas"):
+            st.dataframe(pd.DataFrame(relatorio['rejeitadas'], columns=['Linha', 'Conteúdo']))
 
 def clean_numeric(df, cols):
     for col in cols:
@@ -34,16 +35,21 @@ def clean_numeric(df, cols):
     return df
 
 def clean_dates(df, col):
-    df[col] = pd.to_datetime(df[col], errors='coerce', format='%m/%Y')
+    df[col] = para_datetime(para_yyyymm(df[col])).to_numpy()
     df = df.dropna(subset=[col])
     return df
 
 # Processamento dos dados
-cnis_df = parse_data(cnis_txt)
-carta_df = parse_data(carta_txt)
+cnis_df, relatorio_cnis = ler_colagem(cnis_txt, COLUNAS_CNIS)
+carta_df, relatorio_carta = ler_colagem(carta_txt, COLUNAS_CARTA)
+for nome, dados, relatorio in (("CNIS", cnis_df, relatorio_cnis), ("Carta", carta_df, relatorio_carta)):
+    if dados is None and relatorio['formato'] is not None:
+        st.warning(f"Não foi possível separar as colunas dos dados colados ({nome}).")
+        relatar_colagem(relatorio)
 
 if cnis_df is not None:
     st.subheader("🔎 Dados CNIS Carregados")
+    relatar_colagem(relatorio_cnis)
     cnis_df = clean_numeric(cnis_df, [cnis_df.columns[1]])
     cnis_df = clean_dates(cnis_df, cnis_df.columns[0])
     st.dataframe(cnis_df)
@@ -55,9 +61,10 @@ if cnis_df is not None:
 
 if carta_df is not None:
     st.subheader("🔎 Dados Carta de Benefício Carregados")
+    relatar_colagem(relatorio_carta)
     carta_df = clean_numeric(carta_df, [carta_df.columns[2]])
     carta_df = clean_dates(carta_df, carta_df.columns[1])
-    carta_df = carta_df[~carta_df[carta_df.columns[-1]].astype(str).str.contains("DESCONSIDERADO", na=False)]
+    carta_df = carta_df[~com_marcador(marcadores(carta_df[carta_df.columns[-1]]), DESCONSIDERADO)]
     st.dataframe(carta_df)
 
     st.subheader("📈 Gráfico Carta - 80% Maiores Salários")
@@ -83,21 +90,9 @@ if cnis_df is not None and carta_df is not None:
     Es = 21.8
     Id = 60
 
-    # Funções Matemáticas Modulares
-    def calcular_fator_previdenciario(Tc, a, Es, Id):
-        FP = (Tc * a / Es) * (1 + ((Id + Tc * a) / 100))
-        return round(FP, 4)
-
-    def calcular_salario_beneficio(media_salarios, fator_previdenciario):
-        salario_beneficio = media_salarios * fator_previdenciario
-        return round(salario_beneficio, 2)
-
-    def calcular_renda_mensal_inicial(salario_beneficio, coeficiente=1.0):
-        return round(salario_beneficio * coeficiente, 2)
-
-    FP = calcular_fator_previdenciario(Tc, a, Es, Id)
-    beneficio = calcular_salario_beneficio(media_cnis, FP)
-    renda_inicial = calcular_renda_mensal_inicial(beneficio)
+    FP = fator_previdenciario(Tc, a, Es, Id)
+    beneficio = salario_beneficio(media_cnis, FP)
+    renda_inicial = renda_mensal_inicial(beneficio)
 
     st.metric("Média dos 80% maiores salários CNIS", f"R$ {media_cnis:,.2f}")
     st.metric("Média dos 80% maiores salários Carta", f"R$ {media_carta:,.2f}")
@@ -1,6 +1,9 @@
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
+import numpy as np
+
+from calculo_inss.cache_streamlit import chave_conteudo, em_cache, ler_csv
+from calculo_inss.marcos import MARCOS, NOMES_PLANOS, classificar, com_marco
 
 st.set_page_config(layout="wide")
 
@@ -10,11 +13,16 @@ st.title("\ud83c\udf1f Dashboard - Nova Carta de Concess\u00e3o Previdenci\u00e1
 uploaded_file = st.sidebar.file_uploader("Upload CSV Tratado", type=["csv"])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    # Leitura e resumo em cache pelo hash do arquivo: mexer nos filtros n\u00e3o rel\u00ea o CSV
+    chave = chave_conteudo(uploaded_file)
+    df = ler_csv(uploaded_file)
+
+    def media_considerados(df):
+        return df[df['Status'] == 'Considerado']['Sal\u00e1rio Atualizado (R$)'].mean()
 
     # Resumo
     st.subheader("\ud83d\udcc3 Resumo Final")
-    media = df[df['Status'] == 'Considerado']['Sal\u00e1rio Atualizado (R$)'].mean()
+    media = em_cache(media_considerados)([chave], df)
     renda_inicial = media * 0.9373
 
     col1, col2 = st.columns(2)
@@ -23,16 +31,26 @@ if uploaded_file:
     with col2:
         st.metric(label="Nova Renda Mensal Inicial", value=f"R$ {renda_inicial:,.2f}")
 
+    # Marcos legais e plano econ\u00f4mico de cada compet\u00eancia, calculados uma vez por arquivo;
+    # os filtros testam c\u00f3digos e bits em vez de comparar textos a cada intera\u00e7\u00e3o
+    # (o CSV enviado e a exportação ficam com as colunas originais)
+    bits_marcos, _, codigos_plano = em_cache(classificar)([chave], df['Compet\u00eancia'])
+
     # Filtros
     st.sidebar.header("\ud83d\udd04 Filtros")
-    plano = st.sidebar.multiselect("Plano Econômico", df['Plano Econômico'].unique())
+    plano = st.sidebar.multiselect("Plano Econômico", NOMES_PLANOS[np.unique(codigos_plano)])
+    rotulos_marcos = {rotulo: bit for bit, (_, _, rotulo) in MARCOS.items()}
+    marcos_legais = st.sidebar.multiselect("Marcos Legais", list(rotulos_marcos))
     status = st.sidebar.multiselect("Status", df['Status'].unique())
 
-    df_filtered = df.copy()
+    mascara = np.ones(len(df), dtype=bool)
     if plano:
-        df_filtered = df_filtered[df_filtered['Plano Econômico'].isin(plano)]
+        mascara &= np.isin(codigos_plano, np.flatnonzero(np.isin(NOMES_PLANOS, plano)))
+    for rotulo in marcos_legais:
+        mascara &= com_marco(bits_marcos, rotulos_marcos[rotulo])
     if status:
-        df_filtered = df_filtered[df_filtered['Status'].isin(status)]
+        mascara &= df['Status'].isin(status).to_numpy()
+    df_filtered = df[mascara]
 
     # Tabela
     st.subheader("\ud83d\udcc8 Tabela Completa - Compet\u00eancias e Atualiza\u00e7\u00e3o Monet\u00e1ria")
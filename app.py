@@ -3,6 +3,17 @@ import numpy as np
 import streamlit as st
 import plotly.express as px
 
+from calculo_inss.cache_streamlit import chave_conteudo, em_cache, ler_csv
+from calculo_inss.pipeline import (COLUNAS_RESULTADO, limpar_dados, aplicar_indice_corrigido, aplicar_limites,
+                                   fatores_do_caso, selecionar_80_maiores)
+from calculo_inss.parametros import Parametros
+from calculo_inss.limites import carregar_limites
+from calculo_inss.competencias import competencias_invalidas, para_yyyymm
+from calculo_inss.diagnostico import Diagnostico
+from calculo_inss.incremental import MotorIncremental
+from calculo_inss.regras import comparar_regras, regra_mais_vantajosa
+from calculo_inss.substituicao import resolver_caso
+
 st.set_page_config(page_title="Cálculo Previdenciário - Revisão Final", layout="wide")
 
 st.title("📊 INSS Cálculo Previdenciário - Revisão Final (v7)")
@@ -16,10 +27,19 @@ uploaded_cnis = st.sidebar.file_uploader("Importe CSV do CNIS (Competência e Re
 uploaded_carta = st.sidebar.file_uploader("Importe CSV da Carta de Benefício", type="csv")
 uploaded_desconsid = st.sidebar.file_uploader("Importe CSV dos Salários Desconsiderados", type="csv")
 
+# Diagnóstico: tempo, linhas e pico de memória de cada etapa desta execução
+diagnostico_ativo = st.sidebar.checkbox("🩺 Diagnóstico de desempenho")
+
 if uploaded_cnis and uploaded_carta and uploaded_desconsid:
-    cnis_df = pd.read_csv(uploaded_cnis)
-    carta_df = pd.read_csv(uploaded_carta)
-    desconsid_df = pd.read_csv(uploaded_desconsid)
+    diagnostico = Diagnostico(memoria=diagnostico_ativo)
+    # Leitura e etapas em cache pelo hash do conteúdo dos arquivos
+    chave_cnis, chave_carta, chave_desconsid = (chave_conteudo(f) for f in (uploaded_cnis, uploaded_carta, uploaded_desconsid))
+
+    with diagnostico.etapa('Etapa 1 - Leitura') as registro:
+        cnis_df = ler_csv(uploaded_cnis)
+        carta_df = ler_csv(uploaded_carta)
+        desconsid_df = ler_csv(uploaded_desconsid)
+        registro['Linhas'] = len(cnis_df) + len(carta_df) + len(desconsid_df)
 
     st.subheader("📄 Dados CNIS")
     st.dataframe(cnis_df)
@@ -34,15 +54,17 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 2: Sanitização & Classificação")
 
-    def limpar_dados(df, col_remuneracao):
-        df = df.dropna(subset=[col_remuneracao])
-        df = df[df[col_remuneracao].apply(lambda x: str(x).replace('.', '').replace(',', '').replace(' ', '').replace('e', '').replace('E', '').replace('-', '').isdigit())]
-        df[col_remuneracao] = df[col_remuneracao].astype(float)
-        return df
+    with diagnostico.etapa('Etapa 2 - Sanitização', linhas=len(cnis_df) + len(carta_df) + len(desconsid_df)):
+        cnis_df = em_cache(limpar_dados)([chave_cnis], cnis_df, col_remuneracao=cnis_df.columns[1])
+        carta_df = em_cache(limpar_dados)([chave_carta], carta_df, col_remuneracao=carta_df.columns[2])
+        desconsid_df = em_cache(limpar_dados)([chave_desconsid], desconsid_df, col_remuneracao=desconsid_df.columns[2])
 
-    cnis_df = limpar_dados(cnis_df, cnis_df.columns[1])
-    carta_df = limpar_dados(carta_df, carta_df.columns[2])
-    desconsid_df = limpar_dados(desconsid_df, desconsid_df.columns[2])
+    # Competências não reconhecidas ficam fora do cálculo: avisadas, não descartadas em silêncio
+    for nome, dados, coluna in (("CNIS", cnis_df, cnis_df.columns[0]), ("Carta", carta_df, carta_df.columns[1]),
+                                ("Desconsiderados", desconsid_df, desconsid_df.columns[0])):
+        invalidas = competencias_invalidas(dados[coluna])
+        if invalidas:
+            st.sidebar.warning(f"Competências não reconhecidas ({nome}), fora do cálculo: {', '.join(invalidas[:5])}")
 
     # ===================
     # ETAPA 3 - CORREÇÃO MONETÁRIA
@@ -50,11 +72,32 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 3: Correção Monetária")
 
-    def aplicar_indice_corrigido(df, col_salario, col_indice):
-        df['Salário Corrigido'] = df[col_salario] * df[col_indice]
-        return df
-
-    carta_df = aplicar_indice_corrigido(carta_df, carta_df.columns[2], carta_df.columns[3])
+    # Teto e salário mínimo: salários limitados aos valores da competência antes da correção,
+    # SB e RMI aos vigentes (tabela local de limites)
+    limitar = st.sidebar.checkbox("🔒 Limitar ao teto e ao salário mínimo")
+    if limitar:
+        try:
+            carregar_limites()
+        except FileNotFoundError as erro:
+            st.sidebar.warning(str(erro))
+            limitar = False
+    parametros = Parametros(limites=limitar)
+
+    with diagnostico.etapa('Etapa 3 - Correção monetária', linhas=len(carta_df)):
+        if limitar:
+            cnis_df = em_cache(aplicar_limites)([chave_cnis], cnis_df, col_competencia=cnis_df.columns[0],
+                                                col_salario=cnis_df.columns[1])
+            carta_df = em_cache(aplicar_limites)([chave_carta], carta_df, col_competencia=carta_df.columns[1],
+                                                 col_salario=carta_df.columns[2])
+            desconsid_df = em_cache(aplicar_limites)([chave_desconsid], desconsid_df,
+                                                     col_competencia=desconsid_df.columns[0],
+                                                     col_salario=desconsid_df.columns[2])
+            # As etapas seguintes partem dos valores limitados: cache separado (etapas sem
+            # parâmetros nomeados, que não entram na chave)
+            chave_cnis, chave_carta, chave_desconsid = (f'{chave}:limites' for chave in
+                                                        (chave_cnis, chave_carta, chave_desconsid))
+        carta_df = em_cache(aplicar_indice_corrigido)([chave_carta], carta_df, col_salario=carta_df.columns[2],
+                                                      col_indice=carta_df.columns[3])
 
     # ===================
     # ETAPA 4 - SELEÇÃO 80% MAIORES SALÁRIOS
@@ -62,13 +105,10 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 4: Seleção dos 80% Maiores Salários")
 
-    def selecionar_80_maiores(df, col_corrigido):
-        n_maiores = int(0.8 * len(df))
-        return df.nlargest(n_maiores, col_corrigido)
-
-    top_cnis = selecionar_80_maiores(cnis_df, cnis_df.columns[1])
-    top_carta = selecionar_80_maiores(carta_df, carta_df.columns[4])
-    top_desconsid = selecionar_80_maiores(desconsid_df, desconsid_df.columns[2])
+    with diagnostico.etapa('Etapa 4 - Seleção 80%', linhas=len(cnis_df) + len(carta_df) + len(desconsid_df)):
+        top_cnis = em_cache(selecionar_80_maiores)([chave_cnis], cnis_df, col_corrigido=cnis_df.columns[1])
+        top_carta = em_cache(selecionar_80_maiores)([chave_carta], carta_df, col_corrigido=carta_df.columns[4])
+        top_desconsid = em_cache(selecionar_80_maiores)([chave_desconsid], desconsid_df, col_corrigido=desconsid_df.columns[2])
 
     st.subheader("📊 80% Maiores Salários CNIS")
     st.dataframe(top_cnis)
@@ -85,47 +125,31 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 5: Consolidação e Substituição")
 
-    df_consolidado = pd.concat([top_cnis[[cnis_df.columns[0], cnis_df.columns[1]]],
-                                top_desconsid[[desconsid_df.columns[0], desconsid_df.columns[2]]]])
-
-    df_consolidado = df_consolidado.sort_values(by=df_consolidado.columns[1], ascending=False).reset_index(drop=True)
+    # Um salário por competência (o maior entre CNIS, Carta e Desconsiderados) e seleção
+    # dos 80% maiores dessa base, sem contar a mesma competência duas vezes
+    with diagnostico.etapa('Etapa 5/6 - Substituição e cálculo final') as registro:
+        tabela_substituicao, resultado = em_cache(resolver_caso)([chave_cnis, chave_carta, chave_desconsid],
+                                                                 cnis_df, carta_df, desconsid_df,
+                                                                 parametros=parametros)
+        registro['Linhas'] = len(tabela_substituicao)
+    selecionados = tabela_substituicao[tabela_substituicao['Selecionado']]
+    df_consolidado = selecionados[['Competência', 'Melhor Valor', 'Fonte']].sort_values(by='Melhor Valor', ascending=False)
 
     st.subheader("📋 Base Consolidada para Cálculo Final")
     st.dataframe(df_consolidado)
 
+    substituidos = tabela_substituicao[tabela_substituicao['Substituído']].sort_values(by='Ganho RMI', ascending=False)
+    st.subheader("🔁 Competências Substituídas e Ganho Marginal na RMI")
+    st.dataframe(substituidos)
+
     # ===================
     # ETAPA 6 - APLICAÇÃO DO CÁLCULO FINAL
     # ===================
 
     st.sidebar.header("🔽 Etapa 6: Cálculo Final")
 
-    def calcular_media_final(df):
-        n_maiores = int(0.8 * len(df))
-        return df.nlargest(n_maiores, df.columns[1])[df.columns[1]].mean()
-
-    media_final = calcular_media_final(df_consolidado)
-
-    # Parâmetros previdenciários normativos
-    Tc = 38 + (1/12) + (25/365)
-    a = 0.31
-    Es = 21.8
-    Id = 60
-    coef = 1.0
-
-    def fator_previdenciario(Tc, a, Es, Id):
-        return round((Tc * a / Es) * (1 + ((Id + Tc * a) / 100)), 4)
-
-    FP = fator_previdenciario(Tc, a, Es, Id)
-
-    def salario_beneficio(media_salarios, FP):
-        return round(media_salarios * FP, 2)
-
-    salario_benef = salario_beneficio(media_final, FP)
-
-    def renda_mensal_inicial(salario_beneficio, coef=1.0):
-        return round(salario_beneficio * coef, 2)
-
-    renda_inicial = renda_mensal_inicial(salario_benef, coef)
+    # Parâmetros previdenciários normativos (Parametros padrão, com ou sem limites), aplicados sobre a base substituída
+    media_final, FP, salario_benef, renda_inicial = (resultado[coluna] for coluna in COLUNAS_RESULTADO)
 
     # ===================
     # RESULTADOS DETALHADOS
@@ -137,6 +161,72 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
     st.write(f"**Salário de Benefício (Revisado):** R$ {salario_benef:,.2f}")
     st.write(f"**Renda Mensal Inicial (RMI) Revisada:** R$ {renda_inicial:,.2f}")
 
+    # ===================
+    # SIMULAÇÃO - EDIÇÃO DE UMA COMPETÊNCIA
+    # ===================
+
+    st.header("🧪 Simulação: Editar uma Competência")
+
+    # O motor incremental fica na sessão: cada edição custa O(log n), sem refazer as etapas
+    chave_motor = (chave_cnis, chave_carta, chave_desconsid, parametros)
+    desfazer = st.sidebar.button("↩️ Desfazer simulações")
+    if st.session_state.get('motor_chave') != chave_motor or desfazer:
+        # Salários corrigidos; o teto/mínimo de uma edição vale para o nominal (fator do mês)
+        fatores = fatores_do_caso(tabela_substituicao['Competência'], carta_df, parametros.dib)
+        st.session_state['motor'] = MotorIncremental(dict(zip(tabela_substituicao['Competência'],
+                                                              tabela_substituicao['Melhor Valor'])), parametros,
+                                                     dict(zip(tabela_substituicao['Competência'], fatores)))
+        st.session_state['motor_chave'] = chave_motor
+        st.session_state['edicoes'] = []
+    motor = st.session_state['motor']
+
+    linhas_substituicao = tabela_substituicao.set_index('Competência')
+    competencia = st.selectbox("Competência", linhas_substituicao.index)
+    valor_cnis = linhas_substituicao.loc[competencia, 'Valor CNIS']
+    acao = st.radio("Alteração", ["Novo salário", "Usar valor do CNIS", "Excluir competência"], horizontal=True)
+    valor_atual = motor.valor(competencia) if competencia in motor else linhas_substituicao.loc[competencia, 'Melhor Valor']
+    novo_valor = st.number_input("Novo salário (R$)", min_value=0.0, value=float(valor_atual), step=100.0)
+
+    if st.button("Aplicar alteração"):
+        if acao == "Novo salário":
+            motor.atualizar(competencia, novo_valor)
+        elif acao == "Usar valor do CNIS" and pd.notna(valor_cnis):
+            motor.atualizar(competencia, valor_cnis)
+        elif competencia in motor:
+            motor.remover(competencia)
+        st.session_state['edicoes'].append({'Competência': competencia, 'Alteração': acao,
+                                            'Valor': motor.valor(competencia) if competencia in motor else None})
+
+    simulado = motor.resultado()
+    col_media, col_sb, col_rmi = st.columns(3)
+    col_media.metric("Média 80% (simulada)", f"R$ {simulado['Média dos 80% maiores salários']:,.2f}",
+                     delta=f"{simulado['Média dos 80% maiores salários'] - media_final:+,.2f}")
+    col_sb.metric("Salário de Benefício (simulado)", f"R$ {simulado['Salário de Benefício Calculado']:,.2f}",
+                  delta=f"{simulado['Salário de Benefício Calculado'] - salario_benef:+,.2f}")
+    col_rmi.metric("RMI (simulada)", f"R$ {simulado['Renda Mensal Inicial']:,.2f}",
+                   delta=f"{simulado['Renda Mensal Inicial'] - renda_inicial:+,.2f}")
+    if st.session_state['edicoes']:
+        st.dataframe(pd.DataFrame(st.session_state['edicoes']))
+
+    # ===================
+    # COMPARAÇÃO DE REGRAS DE CÁLCULO
+    # ===================
+
+    st.header("⚖️ Comparação das Regras de Cálculo")
+
+    # Mesma base (um salário por competência), todas as regras numa passada
+    tabela_regras = comparar_regras(para_yyyymm(tabela_substituicao['Competência']), tabela_substituicao['Melhor Valor'],
+                                    parametros)
+    st.dataframe(tabela_regras)
+    # Sem DIB a aplicabilidade não é verificada (todas aparecem como aplicáveis): nenhuma
+    # regra é recomendada
+    melhor_regra = regra_mais_vantajosa(tabela_regras) if parametros.dib is not None else None
+    if melhor_regra is not None:
+        st.success(f"Regra mais vantajosa: **{melhor_regra['Regra']}** - RMI R$ {melhor_regra['Renda Mensal Inicial']:,.2f}")
+    elif parametros.dib is None:
+        st.info("Sem DIB a aplicabilidade das regras não é verificada: a tabela compara os valores, "
+                "mas nenhuma regra é indicada como a mais vantajosa.")
+
     # ===================
     # EXPORTAÇÃO FINAL
     # ===================
@@ -156,13 +246,29 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.subheader("📈 Gráfico Comparativo dos Salários")
 
-    fig = px.line(df_consolidado, 
-                  x=df_consolidado.columns[0], 
-                  y=df_consolidado.columns[1],
-                  markers=True,
-                  title="Comparativo dos Salários Considerados no Cálculo")
-    fig.update_layout(xaxis_title="Competência", yaxis_title="Valor (R$)")
-    st.plotly_chart(fig, use_container_width=True)
+    with diagnostico.etapa('Gráfico', linhas=len(df_consolidado)):
+        fig = px.line(df_consolidado, 
+                      x=df_consolidado.columns[0], 
+                      y=df_consolidado.columns[1],
+                      markers=True,
+                      title="Comparativo dos Salários Considerados no Cálculo")
+        fig.update_layout(xaxis_title="Competência", yaxis_title="Valor (R$)")
+        st.plotly_chart(fig, use_container_width=True)
+
+    # ===================
+    # DIAGNÓSTICO
+    # ===================
+
+    if diagnostico_ativo:
+        with st.expander("🩺 Diagnóstico", expanded=True):
+            tabela_diagnostico = diagnostico.como_dataframe()
+            st.dataframe(tabela_diagnostico)
+            st.bar_chart(tabela_diagnostico, x='Etapa', y='Tempo (s)')
+            st.download_button("📥 Exportar Diagnóstico (CSV)", data=tabela_diagnostico.to_csv(index=False),
+                               file_name='diagnostico_etapas.csv')
+            st.download_button("📥 Exportar Diagnóstico (JSON)",
+                               data=tabela_diagnostico.to_json(orient='records', force_ascii=False),
+                               file_name='diagnostico_etapas.json')
 
     # ===================
     # ENGENHARIA REVERSA DETALHADA
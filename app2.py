@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from io import StringIO
+
+from calculo_inss.colagem import COLUNAS_CARTA, COLUNAS_CNIS, descrever_relatorio, ler_colagem
+from calculo_inss.marcadores import DESCONSIDERADO, com_marcador, marcadores
+from calculo_inss.formulas import fator_previdenciario, salario_beneficio, renda_mensal_inicial
 
 st.title("📊 Dashboard Previdenciário Modular - Revisão da Vida Toda - Versão 2")
 
@@ -17,14 +20,11 @@ st.header("📥 Etapa 2 - Inserção dos Dados da Carta de Concessão")
 carta_txt = st.text_area("Cole os dados da Carta de Benefício (SEQ, Data, Salário, Índice, Salário Corrigido, Observação)", height=200)
 
 # Funções auxiliares para parsing e limpeza dos dados
-def parse_data(text_data, sep_options=['\t', ';', ',']):
-    for sep in sep_options:
-        try:
-            df = pd.read_csv(StringIO(text_data), sep=sep)
-            return df
-        except:
-            continue
-    return None
+def relatar_colagem(relatorio):
+    st.caption(descrever_relatorio(relatorio))
+    if relatorio['rejeitadas']:
+        with st.expander(f"⚠️ {len(relatorio['rejeitadas'])} linhas rejeitadas"):
+            st.dataframe(pd.DataFrame(relatorio['rejeitadas'], columns=['Linha', 'Conteúdo']))
 
 def clean_numeric(df, cols):
     for col in cols:
@@ -33,11 +33,16 @@ def clean_numeric(df, cols):
     return df
 
 # Processamento dos dados
-cnis_df = parse_data(cnis_txt)
-carta_df = parse_data(carta_txt)
+cnis_df, relatorio_cnis = ler_colagem(cnis_txt, COLUNAS_CNIS)
+carta_df, relatorio_carta = ler_colagem(carta_txt, COLUNAS_CARTA)
+for nome, dados, relatorio in (("CNIS", cnis_df, relatorio_cnis), ("Carta", carta_df, relatorio_carta)):
+    if dados is None and relatorio['formato'] is not None:
+        st.warning(f"Não foi possível separar as colunas dos dados colados ({nome}).")
+        relatar_colagem(relatorio)
 
 if cnis_df is not None:
     st.subheader("🔎 Dados CNIS Carregados")
+    relatar_colagem(relatorio_cnis)
     st.dataframe(cnis_df)
 
     # Limpeza de dados CNIS
@@ -50,6 +55,7 @@ if cnis_df is not None:
 
 if carta_df is not None:
     st.subheader("🔎 Dados Carta de Benefício Carregados")
+    relatar_colagem(relatorio_carta)
     st.dataframe(carta_df)
 
     # Limpeza de dados Carta
@@ -75,22 +81,10 @@ if cnis_df is not None and carta_df is not None:
     Es = 21.8  # Expectativa de Sobrevida
     Id = 60    # Idade
 
-    # Funções Matemáticas Modulares
-    def calcular_fator_previdenciario(Tc, a, Es, Id):
-        FP = (Tc * a / Es) * (1 + ((Id + Tc * a) / 100))
-        return round(FP, 4)
-
-    def calcular_salario_beneficio(media_salarios, fator_previdenciario):
-        salario_beneficio = media_salarios * fator_previdenciario
-        return round(salario_beneficio, 2)
-
-    def calcular_renda_mensal_inicial(salario_beneficio, coeficiente=1.0):
-        return round(salario_beneficio * coeficiente, 2)
-
     # Execução dos Cálculos
-    FP = calcular_fator_previdenciario(Tc, a, Es, Id)
-    beneficio = calcular_salario_beneficio(media_cnis, FP)
-    renda_inicial = calcular_renda_mensal_inicial(beneficio)
+    FP = fator_previdenciario(Tc, a, Es, Id)
+    beneficio = salario_beneficio(media_cnis, FP)
+    renda_inicial = renda_mensal_inicial(beneficio)
 
     st.write(f"**Média dos 80% maiores salários CNIS:** R$ {media_cnis:,.2f}")
     st.write(f"**Média dos 80% maiores salários Carta:** R$ {media_carta:,.2f}")
@@ -100,7 +94,7 @@ if cnis_df is not None and carta_df is not None:
 
     # Explicação dos salários desconsiderados
     if 'Observação' in carta_df.columns:
-        desconsid = carta_df[carta_df['Observação'].astype(str).str.contains("DESCONSIDERADO", na=False)]
+        desconsid = carta_df[com_marcador(marcadores(carta_df['Observação']), DESCONSIDERADO)]
         if not desconsid.empty:
             st.subheader("🚩 Salários Desconsiderados na Carta")
             st.dataframe(desconsid)
@@ -2,6 +2,10 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 
+from calculo_inss.salarios import limpar_dados
+from calculo_inss.marcadores import DESCONSIDERADO, com_marcador, marcadores, pesos
+from calculo_inss.formulas import fator_previdenciario, salario_beneficio, renda_mensal_inicial
+
 st.title("🧮 Cálculo Previdenciário Concentrado - Engenharia Reversa & Fuzzy - v2")
 
 st.header("📥 Carregar Dados Pré-Processados (CNIS e Carta)")
@@ -10,33 +14,15 @@ uploaded_cnis = st.file_uploader("Importe o arquivo CSV dos salários CNIS", typ
 uploaded_carta = st.file_uploader("Importe o arquivo CSV dos salários da Carta de Benefício", type="csv")
 
 # ================= Funções Utilitárias ====================
-def limpar_dados(df, coluna_salario):
-    df = df.dropna()
-    df = df[df[coluna_salario].apply(lambda x: str(x).replace('.', '').replace(',', '').replace(' ', '').replace('e', '').replace('E', '').isnumeric())]
-    df[coluna_salario] = df[coluna_salario].astype(float)
-    return df
-
-def aplicar_fuzzy(row):
-    if "DESCONSIDERADO" in str(row):
-        return 0.5
-    return 1.0
-
 def calcular_media_ponderada(df, coluna_salario, coluna_observacao=None):
     if coluna_observacao:
-        df['Peso'] = df[coluna_observacao].apply(aplicar_fuzzy)
+        # Peso fuzzy a partir dos marcadores da observação (DESCONSIDERADO pesa 0,5)
+        df['Marcadores'] = marcadores(df[coluna_observacao])
+        df['Peso'] = pesos(df['Marcadores'])
         return np.average(df[coluna_salario], weights=df['Peso'])
     else:
         return df[coluna_salario].mean()
 
-def fator_previdenciario(Tc, a, Es, Id):
-    return round((Tc * a / Es) * (1 + ((Id + Tc * a) / 100)), 4)
-
-def salario_beneficio(media_salarios, FP):
-    return round(media_salarios * FP, 2)
-
-def renda_mensal_inicial(salario_beneficio, coef=1.0):
-    return round(salario_beneficio * coef, 2)
-
 # =========================
 # 🚀 Cálculo Real e Engenharia Reversa
 # =========================
@@ -80,7 +66,7 @@ if uploaded_cnis and uploaded_carta:
     # ===================
     st.subheader("🚩 Salários Críticos Identificados")
 
-    desconsid = carta_df[carta_df.columns].apply(lambda x: x.astype(str).str.contains("DESCONSIDERADO", na=False)).any(axis=1)
+    desconsid = com_marcador(carta_df['Marcadores'], DESCONSIDERADO)
     criticos = carta_df[desconsid]
 
     if not criticos.empty:
@@ -0,0 +1,194 @@
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from calculo_inss.cache_streamlit import em_cache
+from calculo_inss.carteira import COLUNAS_RESUMO, ProcessamentoCarteira, detalhar_caso, origem_extratos, origem_zip
+from calculo_inss.competencias import para_yyyymm
+from calculo_inss.leitura import COLUNA_ID
+from calculo_inss.limites import carregar_limites
+from calculo_inss.parametros import Parametros
+from calculo_inss.regras import regra_mais_vantajosa
+
+st.set_page_config(page_title="Cálculo Previdenciário - Carteira", layout="wide")
+
+st.title("📊 INSS Cálculo Previdenciário - Carteira de Beneficiários")
+st.caption("Envie todos os casos de uma vez (ZIP ou extratos por NIT/CPF): o cálculo roda em segundo plano "
+           "e a tabela é atualizada enquanto os casos ficam prontos.")
+
+# ===================
+# ETAPA 1 - ARQUIVOS DA CARTEIRA
+# ===================
+
+st.sidebar.header("🔽 Etapa 1: Arquivos da Carteira")
+formato = st.sidebar.radio("Formato", ["ZIP com os casos", "Extratos com vários beneficiários (NIT/CPF)"])
+coluna_id = st.sidebar.text_input("Coluna identificadora do beneficiário", value=COLUNA_ID)
+
+if formato.startswith("ZIP"):
+    uploaded_zip = st.sidebar.file_uploader("Importe o ZIP (<caso>/cnis.csv, carta.csv, desconsiderados.csv ou "
+                                            "<caso>_cnis.csv...)", type="zip")
+    enviados = [uploaded_zip] if uploaded_zip else []
+else:
+    enviados = [st.sidebar.file_uploader(f"Importe o extrato {nome}", type="csv")
+                for nome in ("do CNIS", "da Carta", "dos Salários Desconsiderados")]
+    enviados = enviados if all(enviados) else []
+
+# ===================
+# ETAPA 2 - PARÂMETROS
+# ===================
+
+st.sidebar.header("🔽 Etapa 2: Parâmetros")
+dib_texto = st.sidebar.text_input("DIB (AAAAMM, opcional): corrige todos os salários pela tabela local de índices")
+limitar = st.sidebar.checkbox("🔒 Limitar ao teto e ao salário mínimo")
+centavos = st.sidebar.checkbox("Modo exato em centavos")
+workers = st.sidebar.number_input("Processos em paralelo", min_value=1, value=1)
+
+dib = int(para_yyyymm(pd.Series([dib_texto]))[0]) if dib_texto.strip() else None
+if dib == 0:
+    st.sidebar.error(f"DIB inválida: {dib_texto}")
+    dib = None
+if limitar:
+    try:
+        carregar_limites()
+    except FileNotFoundError as erro:
+        st.sidebar.warning(str(erro))
+        limitar = False
+parametros = Parametros(dib=dib, limites=limitar, centavos=centavos)
+
+# ===================
+# ETAPA 3 - CÁLCULO EM SEGUNDO PLANO
+# ===================
+
+processamento = st.session_state.get('carteira')
+em_andamento = processamento is not None and processamento.ativo
+
+if st.sidebar.button("▶️ Calcular carteira", disabled=not enviados or em_andamento):
+    # A pasta temporária fica com o processamento: é removida ao descartá-lo ou quando a
+    # sessão é encerrada
+    if processamento is not None:
+        processamento.descartar()
+    pasta = Path(tempfile.mkdtemp(prefix='carteira_inss_'))
+    try:
+        if formato.startswith("ZIP"):
+            origem = origem_zip(enviados[0], pasta, coluna_id)
+        else:
+            caminhos = [pasta / f'{nome}.csv' for nome in ('cnis', 'carta', 'desconsiderados')]
+            for caminho, enviado in zip(caminhos, enviados):
+                caminho.write_bytes(enviado.getvalue())
+            origem = origem_extratos(*caminhos, coluna_id=coluna_id)
+        processamento = ProcessamentoCarteira(origem, parametros, workers=int(workers), pasta=pasta)
+    except (zipfile.BadZipFile, ValueError, KeyError) as erro:
+        st.error(f"Não foi possível ler a carteira: {erro}")
+        processamento = None
+    if processamento is not None and processamento.total == 0:
+        st.warning("Nenhum caso encontrado nos arquivos enviados.")
+        processamento = None
+    if processamento is not None:
+        processamento.iniciar()
+    else:
+        shutil.rmtree(pasta, ignore_errors=True)
+    st.session_state['carteira'] = processamento
+
+if processamento is None:
+    st.info("Importe o ZIP com os casos ou os três extratos e clique em **Calcular carteira**.")
+    st.stop()
+
+
+# ===================
+# RESUMO DA CARTEIRA
+# ===================
+
+def pagina_ordenada(tabela):
+    # Ordenação e paginação sobre a carteira inteira; só a página atual vai para a tela
+    col_ordem, col_sentido, col_tamanho, col_pagina = st.columns(4)
+    coluna = col_ordem.selectbox("Ordenar por", COLUNAS_RESUMO, index=COLUNAS_RESUMO.index('Diferença RMI'))
+    crescente = col_sentido.radio("Sentido", ["Decrescente", "Crescente"], horizontal=True) == "Crescente"
+    tamanho = col_tamanho.selectbox("Linhas por página", [25, 50, 100, 500])
+    paginas = max(1, -(-len(tabela) // tamanho))
+    pagina = col_pagina.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1,
+                                     key=f'pagina_{id(processamento)}_{tamanho}')
+    ordenada = tabela.sort_values(coluna, ascending=crescente, na_position='last', kind='stable')
+    st.dataframe(ordenada.iloc[(pagina - 1) * tamanho:pagina * tamanho], hide_index=True)
+
+
+# Só este trecho é reexecutado enquanto o cálculo roda: a página continua respondendo
+@st.fragment(run_every=1.0 if processamento.ativo else None)
+def painel_carteira():
+    concluidos, total = processamento.concluidos, processamento.total
+    if processamento.ativo:
+        st.progress(min(concluidos / total, 1.0), text=f"{concluidos} de {total} casos calculados")
+        if st.button("⏹️ Interromper"):
+            processamento.parar()
+    elif st.session_state.get('carteira_exibida') is not processamento:
+        # Terminou desde a última execução completa: atualiza também o detalhamento
+        st.session_state['carteira_exibida'] = processamento
+        st.rerun()
+    else:
+        situacao = "interrompido" if processamento.interrompido else "concluído"
+        st.success(f"Cálculo {situacao}: {concluidos} de {total} casos em {processamento.duracao:.1f} s")
+    if processamento.erro:
+        st.error(f"Falha na leitura da carteira: {processamento.erro}")
+
+    resumo = processamento.resumo()
+    col_casos, col_erros, col_ganho, col_diferenca = st.columns(4)
+    col_casos.metric("Casos calculados", f"{len(resumo):,}".replace(',', '.'))
+    col_erros.metric("Casos com erro", int(resumo['Erro'].notna().sum()))
+    col_ganho.metric("Casos com RMI acima da Carta", int((resumo['Diferença RMI'] > 0).sum()))
+    col_diferenca.metric("Diferença média na RMI", f"R$ {resumo['Diferença RMI'].mean():,.2f}" if len(resumo) else "-")
+
+    pagina_ordenada(resumo)
+    if not processamento.ativo:
+        st.download_button("📥 Exportar Resumo da Carteira (CSV)", data=resumo.to_csv(index=False),
+                           file_name='carteira_inss.csv')
+
+
+st.header("📋 Resumo da Carteira")
+painel_carteira()
+
+# ===================
+# DETALHAMENTO DE UM CASO
+# ===================
+
+resumo = processamento.resumo()
+if len(resumo):
+    st.header("🔍 Detalhamento de um Caso")
+    caso = st.selectbox("Caso", resumo['Caso'])
+    linha = resumo[resumo['Caso'] == caso].iloc[0]
+
+    col_media, col_sb, col_rmi, col_carta = st.columns(4)
+    col_media.metric("Média 80%", f"R$ {linha['Média dos 80% maiores salários']:,.2f}")
+    col_sb.metric("Salário de Benefício", f"R$ {linha['Salário de Benefício Calculado']:,.2f}")
+    col_rmi.metric("RMI", f"R$ {linha['Renda Mensal Inicial']:,.2f}", delta=f"{linha['Diferença RMI']:+,.2f} vs Carta")
+    col_carta.metric("RMI da Carta", f"R$ {linha['RMI Carta']:,.2f}")
+
+    if pd.notna(linha['Erro']):
+        st.error(linha['Erro'])
+    else:
+        # Parâmetros do cálculo da carteira (não os da barra lateral, que podem ter mudado).
+        # Em cache por (origem, caso, parâmetros): paginar ou ordenar não relê os extratos.
+        cnis_df, carta_df, desconsid_df, tabela_substituicao, tabela_regras = em_cache(detalhar_caso)(
+            [processamento.pasta], processamento.origem, nome=caso, parametros=processamento.parametros)
+        st.subheader("🔁 Competências Substituídas e Ganho Marginal na RMI")
+        st.dataframe(tabela_substituicao[tabela_substituicao['Substituído']].sort_values(by='Ganho RMI', ascending=False))
+
+        st.subheader("⚖️ Comparação das Regras de Cálculo")
+        st.dataframe(tabela_regras)
+        # Sem DIB a aplicabilidade não é verificada: nenhuma regra é recomendada (como no app.py)
+        melhor_regra = regra_mais_vantajosa(tabela_regras) if processamento.parametros.dib is not None else None
+        if melhor_regra is not None:
+            st.success(f"Regra mais vantajosa: **{melhor_regra['Regra']}** - RMI R$ {melhor_regra['Renda Mensal Inicial']:,.2f}")
+        elif processamento.parametros.dib is None:
+            st.info("Sem DIB a aplicabilidade das regras não é verificada: a tabela compara os valores, "
+                    "mas nenhuma regra é indicada como a mais vantajosa.")
+
+        with st.expander("📄 Dados do caso"):
+            st.subheader("CNIS")
+            st.dataframe(cnis_df)
+            st.subheader("Carta de Concessão")
+            st.dataframe(carta_df)
+            st.subheader("Salários Desconsiderados")
+            st.dataframe(desconsid_df)
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.express as px
+
+from calculo_inss.cache_streamlit import chave_conteudo, em_cache, ler_csv
+from calculo_inss.cenarios import EIXOS, matriz_cenarios, varrer_cenarios
+from calculo_inss.parametros import Parametros
+from calculo_inss.pipeline import COLUNAS_RESULTADO, calcular_caso
+
+st.set_page_config(page_title="Cálculo Previdenciário - Cenários", layout="wide")
+
+st.title("📊 INSS Cálculo Previdenciário - Grade de Cenários")
+st.caption("Compare aposentar agora ou daqui a N meses e contagens alternativas de tempo de contribuição.")
+
+# ===================
+# ETAPA 1 - BENEFICIÁRIOS
+# ===================
+
+st.sidebar.header("🔽 Etapa 1: Beneficiários")
+origem = st.sidebar.radio("Origem das médias", ["Um caso (CNIS, Carta, Desconsiderados)", "Resultado do cálculo em lote (CSV)"])
+
+medias, nomes = None, None
+if origem.startswith("Um caso"):
+    uploaded_cnis = st.sidebar.file_uploader("Importe CSV do CNIS (Competência e Remuneração)", type="csv")
+    uploaded_carta = st.sidebar.file_uploader("Importe CSV da Carta de Benefício", type="csv")
+    uploaded_desconsid = st.sidebar.file_uploader("Importe CSV dos Salários Desconsiderados", type="csv")
+    if uploaded_cnis and uploaded_carta and uploaded_desconsid:
+        chaves = [chave_conteudo(f) for f in (uploaded_cnis, uploaded_carta, uploaded_desconsid)]
+        resultado = em_cache(calcular_caso)(chaves, ler_csv(uploaded_cnis), ler_csv(uploaded_carta),
+                                            ler_csv(uploaded_desconsid))
+        medias, nomes = np.array([resultado[COLUNAS_RESULTADO[0]]]), np.array([uploaded_cnis.name])
+else:
+    uploaded_lote = st.sidebar.file_uploader("Importe o CSV gerado por calculo_lote.py", type="csv")
+    if uploaded_lote:
+        lote = ler_csv(uploaded_lote).dropna(subset=[COLUNAS_RESULTADO[0]])
+        medias, nomes = lote[COLUNAS_RESULTADO[0]].to_numpy(dtype=np.float64), lote['Caso'].astype(str).to_numpy()
+
+# ===================
+# ETAPA 2 - EIXOS DA GRADE
+# ===================
+
+st.sidebar.header("🔽 Etapa 2: Eixos da Grade")
+padrao = Parametros()
+
+meses_max = st.sidebar.slider("Aposentar daqui a até (meses)", 0, 120, 24)
+passo_meses = st.sidebar.number_input("Passo (meses)", min_value=1, value=1)
+tc_min, tc_max = st.sidebar.slider("Tempo de contribuição - Tc (anos)", 15.0, 50.0, (35.0, 40.0), step=0.5)
+passo_tc = st.sidebar.number_input("Passo de Tc (meses)", min_value=1, value=6)
+id_min, id_max = st.sidebar.slider("Idade - Id (anos)", 40.0, 80.0, (padrao.Id - 5.0, padrao.Id + 5.0), step=0.5)
+passo_id = st.sidebar.number_input("Passo de Id (meses)", min_value=1, value=6)
+es_texto = st.sidebar.text_input("Expectativa de sobrevida - Es (valores separados por ;)", value=str(padrao.Es))
+aliquota = st.sidebar.number_input("Alíquota (a)", value=padrao.a, step=0.01)
+coef = st.sidebar.number_input("Coeficiente", value=padrao.coef, step=0.01)
+
+meses = np.arange(0, meses_max + 1, passo_meses)
+Tc = np.arange(tc_min, tc_max + 1e-9, passo_tc / 12)
+Id = np.arange(id_min, id_max + 1e-9, passo_id / 12)
+try:
+    Es = np.array([float(v.replace(',', '.')) for v in es_texto.split(';') if v.strip()])
+except ValueError:
+    Es = np.array([])
+if not len(Es) or (Es <= 0).any():
+    st.sidebar.error(f"Expectativa de sobrevida inválida: {es_texto!r}. Informe valores positivos separados por ; "
+                     "(ex.: 21,8; 23,5)")
+    Es = np.array([])
+
+if medias is not None and len(medias) and len(Es):
+    # ===================
+    # ETAPA 3 - VARREDURA
+    # ===================
+
+    n_pontos = len(medias) * len(meses) * len(Tc) * len(Id) * len(Es)
+    st.sidebar.write(f"**Pontos na grade:** {n_pontos:,}".replace(',', '.'))
+
+    tabela = varrer_cenarios(medias, meses=meses, Tc=Tc, Id=Id, Es=Es,
+                             parametros=Parametros(a=aliquota, coef=coef), nomes=nomes)
+
+    # ===================
+    # MAPA DE CALOR
+    # ===================
+
+    st.header("🌡️ Mapa de Calor da RMI")
+    eixos_livres = EIXOS[1:]
+    col_y, col_x, col_valor = st.columns(3)
+    eixo_y = col_y.selectbox("Linhas", eixos_livres, index=eixos_livres.index('Tc'))
+    eixo_x = col_x.selectbox("Colunas", [e for e in EIXOS if e != eixo_y], index=2)
+    valor = col_valor.selectbox("Valor", COLUNAS_RESULTADO[1:], index=2)
+
+    # Os eixos fora do mapa ficam fixos no valor escolhido
+    recorte = tabela
+    for eixo in EIXOS:
+        if eixo in (eixo_x, eixo_y):
+            continue
+        opcoes = pd.unique(tabela[eixo])
+        if len(opcoes) > 1:
+            escolhido = st.select_slider(f"{eixo} fixo em", options=list(opcoes))
+            recorte = recorte[recorte[eixo] == escolhido]
+        else:
+            recorte = recorte[recorte[eixo] == opcoes[0]]
+
+    matriz = matriz_cenarios(recorte, eixo_y, eixo_x, valor)
+    fig = px.imshow(matriz, aspect='auto', origin='lower', color_continuous_scale='Viridis',
+                    labels=dict(x=eixo_x, y=eixo_y, color=valor))
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ===================
+    # TABELA E EXPORTAÇÃO
+    # ===================
+
+    st.subheader("📋 Cenários (primeiras 1.000 linhas)")
+    st.dataframe(tabela.head(1000))
+    st.download_button("📥 Exportar Grade de Cenários (CSV)", data=tabela.to_csv(index=False),
+                       file_name='cenarios_inss.csv')
+elif medias is None or not len(medias):
+    st.info("Importe os arquivos de um caso ou o resultado do cálculo em lote para montar a grade.")
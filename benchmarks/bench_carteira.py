@@ -0,0 +1,132 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from calculo_inss.cenarios import varrer_cenarios
+from calculo_inss.competencias import indice_mensal, yyyymm_de_indice
+from calculo_inss.formulas import calcular_beneficio
+from calculo_inss.leitura import casos_de_extratos
+from calculo_inss.limites import limitar_beneficio, limitar_salarios
+from calculo_inss.lote import gravar_carteira, processar_extrato, processar_historico, processar_lote
+from calculo_inss.parametros import Parametros
+from calculo_inss.selecao import media_80_maiores_lote
+from calculo_inss.sintetico import INICIO, gerar_matriz, gravar_extratos
+
+# Carteiras de 1 a 1M beneficiários.
+#
+# O caminho vetorizado (matriz beneficiários x competências) vai até 1M: a matriz é
+# processada em blocos de BLOCO beneficiários, como faria uma carteira lida por partes
+# (1M x 360 competências não cabe inteira em memória). As medidas de tempo da seleção e
+# dos limites repetem um bloco real da carteira (gerar os demais dominaria o tempo); o
+# cálculo final usa as médias reais de todos os beneficiários, e o pico de memória é o
+# da carteira inteira gerada e processada bloco a bloco. Os caminhos por arquivo
+# (extratos CSV em fluxo, Parquet) vão até 10 mil casos: o custo por caso é o mesmo
+# e a geração dos arquivos domina acima disso.
+
+BLOCO = 20_000
+
+
+def tabela_limites(meses=360):
+    # Tabela de teto/mínimo em memória (formato de limites.carregar_limites), sem arquivo
+    teto = np.repeat(np.linspace(58_200, 778_602, meses // 12 + 1).astype(np.int64), 12)[:meses]
+    minimo = np.repeat(np.linspace(6_400, 141_200, meses // 12 + 1).astype(np.int64), 12)[:meses]
+    return int(indice_mensal(INICIO)), teto, minimo
+
+
+def blocos_da_carteira(beneficiarios, meses=360):
+    # Matrizes de até BLOCO beneficiários que, juntas, formam a carteira inteira
+    for inicio in range(0, beneficiarios, BLOCO):
+        yield gerar_matriz(min(BLOCO, beneficiarios - inicio), meses, inicio=inicio)
+
+
+def medias_da_carteira(beneficiarios, meses=360):
+    medias = np.empty(beneficiarios)
+    for inicio, matriz in zip(range(0, beneficiarios, BLOCO), blocos_da_carteira(beneficiarios, meses)):
+        medias[inicio:inicio + len(matriz)] = media_80_maiores_lote(matriz)
+    return medias
+
+
+class CarteiraVetorizada:
+    params = [1, 1_000, 100_000, 1_000_000]
+    param_names = ['beneficiarios']
+    params_rapido = [1, 1_000]
+    timeout = 600
+
+    def setup(self, beneficiarios):
+        self.matriz = gerar_matriz(min(beneficiarios, BLOCO), 360)
+        self.blocos = -(-beneficiarios // BLOCO)
+        self.medias = medias_da_carteira(beneficiarios, self.matriz.shape[1])
+        self.parametros = Parametros()
+        self.limites = tabela_limites(self.matriz.shape[1])
+        self.competencias = yyyymm_de_indice(indice_mensal(INICIO) + np.arange(self.matriz.shape[1]))
+        self.dibs = np.resize(self.competencias[-120:], beneficiarios)
+
+    def time_selecao_80_lote(self, beneficiarios):
+        # Carteira inteira: o primeiro bloco processado uma vez por bloco da carteira
+        for _ in range(self.blocos):
+            media_80_maiores_lote(self.matriz)
+
+    def time_calculo_final(self, beneficiarios):
+        p = self.parametros
+        calcular_beneficio(self.medias, p.Tc, p.a, p.expectativa(), p.Id, p.coef)
+
+    def time_limites(self, beneficiarios):
+        # Teto/mínimo por competência na matriz (primeiro bloco, uma vez por bloco) e na RMI
+        # da carteira, uma DIB por beneficiário
+        for _ in range(self.blocos):
+            limitar_salarios(self.matriz, self.competencias, self.limites)
+        p = self.parametros
+        _, SB, RMI = calcular_beneficio(self.medias, p.Tc, p.a, p.expectativa(), p.Id, p.coef)
+        limitar_beneficio(SB, RMI, self.dibs, self.limites)
+
+    def peakmem_selecao_80_lote(self, beneficiarios):
+        # Carteira inteira gerada e processada bloco a bloco: cresce só com o array de médias
+        medias_da_carteira(beneficiarios, self.matriz.shape[1])
+
+
+class Cenarios:
+    # Grade de 13 datas x 11 Tc x 11 Id por beneficiário
+    params = [1, 100, 10_000]
+    param_names = ['beneficiarios']
+    params_rapido = [1, 100]
+
+    def setup(self, beneficiarios):
+        self.medias = medias_da_carteira(beneficiarios)
+
+    def time_varrer_cenarios(self, beneficiarios):
+        varrer_cenarios(self.medias, meses=np.arange(13), Tc=np.linspace(35, 40, 11), Id=np.linspace(55, 60, 11))
+
+
+class CarteiraArquivos:
+    params = [1, 100, 10_000]
+    param_names = ['beneficiarios']
+    params_rapido = [1, 100]
+    timeout = 600
+
+    def setup(self, beneficiarios):
+        self.pasta = Path(tempfile.mkdtemp(prefix='bench_inss_'))
+        self.extratos = gravar_extratos(self.pasta, beneficiarios)
+        self.parquet = None
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return
+        self.parquet = self.pasta / 'carteira.parquet'
+        gravar_carteira(casos_de_extratos(*self.extratos), processar_extrato, self.parquet)
+
+    def teardown(self, beneficiarios):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def time_extratos_em_fluxo(self, beneficiarios):
+        processar_lote(casos_de_extratos(*self.extratos), processar=processar_extrato)
+
+    def time_parquet(self, beneficiarios):
+        if self.parquet is None:
+            raise NotImplementedError("pyarrow não instalado")
+        from calculo_inss.colunar import casos_de_parquet
+        processar_lote(casos_de_parquet(self.parquet), processar=processar_historico)
+
+    def peakmem_extratos_em_fluxo(self, beneficiarios):
+        processar_lote(casos_de_extratos(*self.extratos), processar=processar_extrato)
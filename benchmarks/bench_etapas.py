@@ -0,0 +1,99 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from calculo_inss.competencias import para_yyyymm
+from calculo_inss.historico import HistoricoContribuicao
+from calculo_inss.marcadores import marcadores
+from calculo_inss.parametros import Parametros
+from calculo_inss.pipeline import (aplicar_indice_corrigido, calcular_caso, calcular_valores, normalizar_caso,
+                                   preparar_caso, selecionar_80_maiores)
+from calculo_inss.salarios import normalizar_salarios
+from calculo_inss.sintetico import gerar_caso
+from calculo_inss.substituicao import base_do_caso, melhor_por_competencia
+
+# Etapas do pipeline de um caso, na ordem do app.py, para históricos de 10 a 50 anos.
+
+
+class Etapas:
+    params = [120, 360, 600]
+    param_names = ['meses']
+
+    def setup(self, meses):
+        self.frames = gerar_caso(0, 0, meses)
+        self.csv = [df.to_csv(index=False) for df in self.frames]
+        self.limpos = normalizar_caso(*self.frames)
+        cnis_df, carta_df, desconsid_df = preparar_caso(*self.frames)
+        self.base = base_do_caso(cnis_df, carta_df, desconsid_df)
+        self.melhor = melhor_por_competencia(*self.base)[1]
+        self.preparados = (cnis_df, desconsid_df)
+
+    def time_etapa1_leitura(self, meses):
+        for texto in self.csv:
+            pd.read_csv(io.StringIO(texto))
+
+    def time_etapa2_sanitizacao(self, meses):
+        normalizar_caso(*self.frames)
+
+    def time_etapa3_correcao(self, meses):
+        carta_df = self.limpos[1].copy()
+        aplicar_indice_corrigido(carta_df, carta_df.columns[2], carta_df.columns[3])
+
+    def time_etapa4_selecao(self, meses):
+        cnis_df, desconsid_df = self.preparados
+        selecionar_80_maiores(cnis_df, cnis_df.columns[1])
+        selecionar_80_maiores(desconsid_df, desconsid_df.columns[2])
+
+    def time_etapa5_substituicao(self, meses):
+        melhor_por_competencia(*self.base)
+
+    def time_etapa6_calculo_final(self, meses):
+        calcular_valores(self.melhor)
+
+    def time_caso_completo(self, meses):
+        calcular_caso(*self.frames)
+
+    def time_caso_centavos(self, meses):
+        calcular_caso(*self.frames, Parametros(centavos=True))
+
+    def peakmem_caso_completo(self, meses):
+        calcular_caso(*self.frames)
+
+
+class Parsing:
+    # Conversões vetorizadas sobre colunas grandes (extratos em massa)
+    params = [10 ** 3, 10 ** 5, 10 ** 6]
+    param_names = ['linhas']
+    params_rapido = [10 ** 3, 10 ** 5]
+
+    def setup(self, linhas):
+        cnis_df, carta_df, _ = gerar_caso(0, 0, 600)
+        repeticoes = -(-linhas // len(carta_df))
+        self.salarios = pd.Series(np.tile(cnis_df['Remuneração'].to_numpy(), repeticoes)[:linhas])
+        self.datas = pd.Series(np.tile(carta_df['Data'].to_numpy(), repeticoes)[:linhas])
+        self.observacoes = pd.Series(np.tile(carta_df['Observação'].to_numpy(), repeticoes)[:linhas])
+
+    def time_salarios_pt_br(self, linhas):
+        normalizar_salarios(self.salarios)
+
+    def time_competencias(self, linhas):
+        para_yyyymm(self.datas)
+
+    def time_marcadores(self, linhas):
+        marcadores(self.observacoes)
+
+
+class Historico:
+    params = [120, 360, 600]
+    param_names = ['meses']
+
+    def setup(self, meses):
+        self.frames = gerar_caso(0, 0, meses)
+        self.historico = HistoricoContribuicao.de_dataframes(*self.frames)
+
+    def time_de_dataframes(self, meses):
+        HistoricoContribuicao.de_dataframes(*self.frames)
+
+    def time_calcular(self, meses):
+        self.historico.calcular()
@@ -0,0 +1,238 @@
+import argparse
+import importlib
+import itertools
+import json
+import platform
+import re
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+# Executor dos benchmarks no formato do asv (airspeed velocity), sem depender dele:
+#
+#   benchmarks/bench_*.py   classes com params / param_names, setup / teardown e métodos
+#                           time_* (tempo por chamada) e peakmem_* (pico de memória)
+#
+# Diferenças em relação ao asv: setup roda uma vez por combinação de parâmetros (e não
+# por método), o pico de memória é o das alocações rastreadas pelo tracemalloc (NumPy e
+# pandas incluídos) e não o RSS do processo, e params_rapido (opcional) limita os
+# parâmetros com --rapido. Setup ou benchmark que levanta NotImplementedError é pulado.
+#
+# Cada execução é anexada ao histórico (JSON Lines) com commit, máquina e versões, e
+# comparada com a última medição anterior do mesmo benchmark:
+#
+#   python benchmarks/executar.py --rapido
+#   python benchmarks/executar.py --filtro 'Etapas\.time_caso' --comparar anterior
+#   python benchmarks/executar.py --comparar 1a2b3c4 --limiar 1.2 --falhar-em-regressao
+
+PASTA = Path(__file__).resolve().parent
+HISTORICO_PADRAO = PASTA / 'resultados' / 'historico.jsonl'
+
+
+def descobrir_benchmarks(filtro=None):
+    # Gera (nome 'modulo.Classe.metodo', classe, metodo)
+    padrao = re.compile(filtro) if filtro else None
+    for arquivo in sorted(PASTA.glob('bench_*.py')):
+        modulo = importlib.import_module(f'benchmarks.{arquivo.stem}')
+        for nome_classe, classe in vars(modulo).items():
+            if not isinstance(classe, type) or classe.__module__ != modulo.__name__:
+                continue
+            for metodo in sorted(vars(classe)):
+                if not metodo.startswith(('time_', 'peakmem_')):
+                    continue
+                nome = f'{arquivo.stem}.{nome_classe}.{metodo}'
+                if padrao is None or padrao.search(nome):
+                    yield nome, classe, metodo
+
+
+def combinacoes(classe, rapido=False):
+    params = getattr(classe, 'params_rapido', None) if rapido else None
+    params = params if params is not None else getattr(classe, 'params', None)
+    if params is None:
+        return [()]
+    nomes = getattr(classe, 'param_names', [])
+    # Como no asv: lista simples para um parâmetro, lista de listas para vários
+    if len(nomes) <= 1:
+        return [(p,) for p in params]
+    return list(itertools.product(*params))
+
+
+def medir_tempo(funcao, repeticoes):
+    # Número de chamadas por repetição ajustado para durar ao menos 0,2 s (timeit.autorange)
+    temporizador = timeit.Timer(funcao)
+    numero, _ = temporizador.autorange()
+    tempos = np.array(temporizador.repeat(repeat=repeticoes, number=numero)) / numero
+    return {'valor': float(np.median(tempos)), 'min': float(tempos.min()), 'unidade': 's',
+            'repeticoes': repeticoes, 'chamadas': numero}
+
+
+def medir_memoria(funcao):
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'valor': float(pico), 'min': float(pico), 'unidade': 'B', 'repeticoes': 1, 'chamadas': 1}
+
+
+def executar(filtro=None, rapido=False, repeticoes=5):
+    # Agrupa os métodos por (classe, parâmetros) para rodar o setup uma vez por grupo
+    grupos = {}
+    for nome, classe, metodo in descobrir_benchmarks(filtro):
+        grupos.setdefault(classe, []).append((nome, metodo))
+
+    for classe, metodos in grupos.items():
+        nomes_parametros = getattr(classe, 'param_names', [])
+        for parametros in combinacoes(classe, rapido):
+            rotulo = dict(zip(nomes_parametros, parametros))
+            instancia = classe()
+            try:
+                if hasattr(instancia, 'setup'):
+                    instancia.setup(*parametros)
+            except NotImplementedError as motivo:
+                for nome, _ in metodos:
+                    yield {'benchmark': nome, 'parametros': rotulo, 'pulado': str(motivo)}
+                continue
+            try:
+                for nome, metodo in metodos:
+                    funcao = getattr(instancia, metodo)
+                    chamada = lambda: funcao(*parametros)  # noqa: E731
+                    try:
+                        if metodo.startswith('time_'):
+                            medida = medir_tempo(chamada, repeticoes)
+                        else:
+                            medida = medir_memoria(chamada)
+                    except NotImplementedError as motivo:
+                        yield {'benchmark': nome, 'parametros': rotulo, 'pulado': str(motivo)}
+                        continue
+                    yield {'benchmark': nome, 'parametros': rotulo, **medida}
+            finally:
+                if hasattr(instancia, 'teardown'):
+                    instancia.teardown(*parametros)
+
+
+# ===================
+# HISTÓRICO E COMPARAÇÃO
+# ===================
+
+def contexto():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'maquina': platform.node(),
+        'processador': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def ler_historico(caminho):
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return pd.DataFrame()
+    with caminho.open(encoding='utf-8') as arquivo:
+        return pd.DataFrame([json.loads(linha) for linha in arquivo if linha.strip()])
+
+
+def gravar_historico(caminho, registros):
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with caminho.open('a', encoding='utf-8') as arquivo:
+        for registro in registros:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+
+def _chave(registro):
+    return registro['benchmark'] + json.dumps(registro['parametros'], sort_keys=True)
+
+
+def referencias(historico, comparar, maquina):
+    # Última medição de cada benchmark: da execução anterior ('anterior') ou de um commit
+    if historico.empty or not comparar:
+        return {}
+    historico = historico[(historico['maquina'] == maquina) & historico['valor'].notna()]
+    if comparar != 'anterior':
+        historico = historico[historico['commit'].fillna('').str.startswith(comparar)]
+    return {_chave(registro): registro for registro in historico.to_dict('records')}
+
+
+def formatar(valor, unidade):
+    if unidade == 'B':
+        for prefixo, escala in (('GB', 2 ** 30), ('MB', 2 ** 20), ('kB', 2 ** 10)):
+            if valor >= escala:
+                return f'{valor / escala:.2f} {prefixo}'
+        return f'{valor:.0f} B'
+    for prefixo, escala in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if valor >= escala:
+            return f'{valor / escala:.3g} {prefixo}'
+    return f'{valor / 1e-9:.3g} ns'
+
+
+# ===================
+# LINHA DE COMANDO
+# ===================
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do cálculo previdenciário (formato asv)")
+    parser.add_argument('--filtro', default=None, help="Expressão regular sobre 'modulo.Classe.metodo'")
+    parser.add_argument('--rapido', action='store_true', help="Só os parâmetros menores (params_rapido)")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Repetições de cada medida de tempo")
+    parser.add_argument('--historico', default=str(HISTORICO_PADRAO), help="Arquivo JSON Lines do histórico")
+    parser.add_argument('--nao-gravar', action='store_true', help="Não anexa esta execução ao histórico")
+    parser.add_argument('--comparar', default='anterior',
+                        help="Referência: 'anterior' (última medição), um commit, ou '' para não comparar")
+    parser.add_argument('--limiar', type=float, default=1.10, help="Razão acima da qual a medida é regressão")
+    parser.add_argument('--falhar-em-regressao', action='store_true', help="Código de saída 1 se houver regressão")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    comum = contexto()
+    anteriores = referencias(ler_historico(args.historico), args.comparar, comum['maquina'])
+
+    registros, regressoes = [], 0
+    for medida in executar(args.filtro, args.rapido, args.repeticoes):
+        parametros = ', '.join(f'{k}={v}' for k, v in medida['parametros'].items())
+        linha = f"{medida['benchmark']:<55} {parametros:<24}"
+        if 'pulado' in medida:
+            print(f'{linha} pulado: {medida["pulado"]}', flush=True)
+            continue
+        registro = {**comum, **medida}
+        registros.append(registro)
+        linha += f" {formatar(medida['valor'], medida['unidade']):>12}"
+        anterior = anteriores.get(_chave(registro))
+        if anterior is not None and anterior['min']:
+            # Compara os mínimos: menos sensíveis a ruído do sistema que a mediana
+            razao = medida['min'] / anterior['min']
+            regressao = razao > args.limiar
+            regressoes += regressao
+            linha += f"  x{razao:.2f} vs {anterior['commit'] or '?'}" + ('  REGRESSÃO' if regressao else '')
+        print(linha, flush=True)
+
+    if registros and not args.nao_gravar:
+        gravar_historico(args.historico, registros)
+    if regressoes:
+        print(f'{regressoes} regressão(ões) acima de x{args.limiar:.2f}', file=sys.stderr)
+    return 1 if regressoes and args.falhar_em_regressao else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,14 @@
 import pandas as pd
-import numpy as np
 import streamlit as st
 
+from calculo_inss.cache_streamlit import chave_conteudo, em_cache, ler_csv
+from calculo_inss.competencias import analisar_competencias
+from calculo_inss.marcos import adicionar_marcos, descrever_marcos
+from calculo_inss.pipeline import aplicar_indice_corrigido, selecionar_80_maiores
+from calculo_inss.salarios import limpar_dados
+from calculo_inss.marcadores import DESCONSIDERADO, com_marcador, coluna_observacao, marcadores
+from calculo_inss.formulas import fator_previdenciario, salario_beneficio
+
 st.set_page_config(page_title="Cálculo Previdenciário INSS V5", layout="wide")
 
 st.title("📊 INSS Cálculo Previdenciário - Revisão da Vida Toda (v5)")
@@ -14,8 +21,11 @@ cnis_file = st.sidebar.file_uploader("Importar CSV do CNIS", type="csv")
 carta_file = st.sidebar.file_uploader("Importar CSV da Carta de Benefício", type="csv")
 
 if cnis_file and carta_file:
-    cnis = pd.read_csv(cnis_file)
-    carta = pd.read_csv(carta_file)
+    # Leitura e etapas em cache pelo hash do conteúdo dos arquivos
+    chave_cnis, chave_carta = chave_conteudo(cnis_file), chave_conteudo(carta_file)
+
+    cnis = ler_csv(cnis_file)
+    carta = ler_csv(carta_file)
 
     st.subheader("📄 Dados CNIS")
     st.dataframe(cnis)
@@ -27,52 +37,46 @@ if cnis_file and carta_file:
     # ===============================
     st.sidebar.header("🧹 Etapa 2: Sanitização")
 
-    def sanitize_dataframe(df, salary_col):
-        df = df.dropna(subset=[salary_col])
-        df = df[df[salary_col].apply(lambda x: str(x).replace('.', '').replace(',', '').isdigit())]
-        df[salary_col] = df[salary_col].astype(float)
-        return df
-
-    cnis = sanitize_dataframe(cnis, cnis.columns[1])
-    carta = sanitize_dataframe(carta, carta.columns[2])
+    cnis = em_cache(limpar_dados)([chave_cnis], cnis, col_remuneracao=cnis.columns[1])
+    carta = em_cache(limpar_dados)([chave_carta], carta, col_remuneracao=carta.columns[2])
 
     # ===============================
     # ETAPA 3: CLASSIFICAÇÃO TEMPORAL & MARCOS LEGAIS
     # ===============================
     st.sidebar.header("📆 Etapa 3: Classificação Temporal")
 
-    def extract_year(data):
-        try:
-            return int(str(data)[:4])
-        except:
-            return np.nan
+    def adicionar_ano(df, col_data):
+        _, _, ano = analisar_competencias(df[col_data])
+        df['Ano'] = pd.arrays.IntegerArray(ano, mask=ano == 0)
+        return df
+
+    cnis = em_cache(adicionar_ano)([chave_cnis], cnis, col_data=cnis.columns[0])
+    carta = em_cache(adicionar_ano)([chave_carta], carta, col_data=carta.columns[1])
 
-    cnis['Ano'] = cnis[cnis.columns[0]].apply(extract_year)
-    carta['Ano'] = carta[carta.columns[1]].apply(extract_year)
+    # Marcos legais (bits), moeda e plano econômico de cada competência, uma vez por arquivo
+    cnis = em_cache(adicionar_marcos)([chave_cnis], cnis, col_competencia=cnis.columns[0])
+    carta = em_cache(adicionar_marcos)([chave_carta], carta, col_competencia=carta.columns[1])
+
+    st.subheader("📆 Competências por Marco Legal e Moeda")
+    resumo_marcos = cnis.assign(**{'Marcos Legais': descrever_marcos(cnis['Marcos'])})
+    st.dataframe(resumo_marcos.groupby(['Moeda', 'Plano Econômico', 'Marcos Legais'], sort=False)
+                 .size().rename('Competências').reset_index())
 
     # ===============================
     # ETAPA 4: CORREÇÃO MONETÁRIA AVANÇADA
     # ===============================
     st.sidebar.header("💰 Etapa 4: Correção Monetária")
 
-    def aplicar_corrigido(df, salario_col, indice_col):
-        df['Salário Corrigido'] = df[salario_col] * df[indice_col]
-        return df
-
-    carta = aplicar_corrigido(carta, carta.columns[2], carta.columns[3])
+    carta = em_cache(aplicar_indice_corrigido)([chave_carta], carta, col_salario=carta.columns[2],
+                                               col_indice=carta.columns[3])
 
     # ===============================
     # ETAPA 5: SELEÇÃO DOS 80% MELHORES SALÁRIOS
     # ===============================
     st.sidebar.header("📊 Etapa 5: Seleção dos 80% Maiores")
 
-    def top_80(df, col_corrigido):
-        df = df.sort_values(by=col_corrigido, ascending=False)
-        n = int(0.8 * len(df))
-        return df.head(n)
-
-    top_cnis = top_80(cnis, cnis.columns[1])
-    top_carta = top_80(carta, 'Salário Corrigido')
+    top_cnis = em_cache(selecionar_80_maiores)([chave_cnis], cnis, col_corrigido=cnis.columns[1])
+    top_carta = em_cache(selecionar_80_maiores)([chave_carta], carta, col_corrigido='Salário Corrigido')
 
     st.subheader("📌 80% Maiores Salários CNIS")
     st.dataframe(top_cnis)
@@ -96,14 +100,8 @@ if cnis_file and carta_file:
     Id = 60  # Idade
     coef = 1.0
 
-    def fator_previdenciario(Tc, a, Es, Id):
-        return round((Tc * a / Es) * (1 + ((Id + Tc * a) / 100)), 4)
-
     FP = fator_previdenciario(Tc, a, Es, Id)
 
-    def salario_beneficio(media, FP):
-        return round(media * FP, 2)
-
     sal_benef_cnis = salario_beneficio(media_cnis, FP)
     sal_benef_carta = salario_beneficio(media_carta, FP)
 
@@ -122,7 +120,8 @@ if cnis_file and carta_file:
     # ===============================
 
     st.subheader("🚩 Salários Desconsiderados na Carta")
-    criticos = carta[carta.apply(lambda x: x.astype(str).str.contains("DESCONSIDERADO", na=False)).any(axis=1)]
+    flags = em_cache(marcadores)([chave_carta], carta[coluna_observacao(carta)])
+    criticos = carta[com_marcador(flags, DESCONSIDERADO)]
     st.dataframe(criticos)
 
     # ===============================
@@ -3,6 +3,14 @@ import numpy as np
 import streamlit as st
 import matplotlib.pyplot as plt
 
+from calculo_inss.cache_streamlit import chave_conteudo, em_cache, ler_csv
+from calculo_inss.diagnostico import Diagnostico
+from calculo_inss.memo import calcular_caso_com_memo
+from calculo_inss.parametros import Parametros
+from calculo_inss.pipeline import COLUNAS_RESULTADO, aplicar_indice_corrigido, selecionar_80_maiores
+from calculo_inss.salarios import limpar_dados
+from calculo_inss.substituicao import resolver_caso
+
 st.set_page_config(page_title="Cálculo Previdenciário - Revisão Final", layout="wide")
 
 st.title("📊 INSS Cálculo Previdenciário - Revisão Final (v6)")
@@ -16,10 +24,19 @@ uploaded_cnis = st.sidebar.file_uploader("Importe CSV do CNIS (Competência e Re
 uploaded_carta = st.sidebar.file_uploader("Importe CSV da Carta de Benefício", type="csv")
 uploaded_desconsid = st.sidebar.file_uploader("Importe CSV dos Salários Desconsiderados", type="csv")
 
+# Diagnóstico: tempo, linhas e pico de memória de cada etapa desta execução
+diagnostico_ativo = st.sidebar.checkbox("🩺 Diagnóstico de desempenho")
+
 if uploaded_cnis and uploaded_carta and uploaded_desconsid:
-    cnis_df = pd.read_csv(uploaded_cnis)
-    carta_df = pd.read_csv(uploaded_carta)
-    desconsid_df = pd.read_csv(uploaded_desconsid)
+    diagnostico = Diagnostico(memoria=diagnostico_ativo)
+    # Leitura e etapas em cache pelo hash do conteúdo dos arquivos
+    chave_cnis, chave_carta, chave_desconsid = (chave_conteudo(f) for f in (uploaded_cnis, uploaded_carta, uploaded_desconsid))
+
+    with diagnostico.etapa('Etapa 1 - Leitura') as registro:
+        cnis_df = ler_csv(uploaded_cnis)
+        carta_df = ler_csv(uploaded_carta)
+        desconsid_df = ler_csv(uploaded_desconsid)
+        registro['Linhas'] = len(cnis_df) + len(carta_df) + len(desconsid_df)
 
     st.subheader("📄 Dados CNIS")
     st.dataframe(cnis_df)
@@ -34,15 +51,10 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 2: Sanitização & Classificação")
 
-    def limpar_dados(df, col_remuneracao):
-        df = df.dropna(subset=[col_remuneracao])
-        df = df[df[col_remuneracao].apply(lambda x: str(x).replace('.', '').replace(',', '').replace(' ', '').replace('e', '').replace('E', '').replace('-', '').isdigit())]
-        df[col_remuneracao] = df[col_remuneracao].astype(float)
-        return df
-
-    cnis_df = limpar_dados(cnis_df, cnis_df.columns[1])
-    carta_df = limpar_dados(carta_df, carta_df.columns[2])
-    desconsid_df = limpar_dados(desconsid_df, desconsid_df.columns[2])
+    with diagnostico.etapa('Etapa 2 - Sanitização', linhas=len(cnis_df) + len(carta_df) + len(desconsid_df)):
+        cnis_df = em_cache(limpar_dados)([chave_cnis], cnis_df, col_remuneracao=cnis_df.columns[1])
+        carta_df = em_cache(limpar_dados)([chave_carta], carta_df, col_remuneracao=carta_df.columns[2])
+        desconsid_df = em_cache(limpar_dados)([chave_desconsid], desconsid_df, col_remuneracao=desconsid_df.columns[2])
 
     # ===================
     # ETAPA 3 - CORREÇÃO MONETÁRIA
@@ -50,11 +62,9 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 3: Correção Monetária")
 
-    def aplicar_indice_corrigido(df, col_salario, col_indice):
-        df['Salário Corrigido'] = df[col_salario] * df[col_indice]
-        return df
-
-    carta_df = aplicar_indice_corrigido(carta_df, carta_df.columns[2], carta_df.columns[3])
+    with diagnostico.etapa('Etapa 3 - Correção monetária', linhas=len(carta_df)):
+        carta_df = em_cache(aplicar_indice_corrigido)([chave_carta], carta_df, col_salario=carta_df.columns[2],
+                                                      col_indice=carta_df.columns[3])
 
     # ===================
     # ETAPA 4 - SELEÇÃO 80% MAIORES SALÁRIOS
@@ -62,13 +72,10 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 4: Seleção dos 80% Maiores Salários")
 
-    def selecionar_80_maiores(df, col_corrigido):
-        n_maiores = int(0.8 * len(df))
-        return df.nlargest(n_maiores, col_corrigido)
-
-    top_cnis = selecionar_80_maiores(cnis_df, cnis_df.columns[1])
-    top_carta = selecionar_80_maiores(carta_df, carta_df.columns[4])
-    top_desconsid = selecionar_80_maiores(desconsid_df, desconsid_df.columns[2])
+    with diagnostico.etapa('Etapa 4 - Seleção 80%', linhas=len(cnis_df) + len(carta_df) + len(desconsid_df)):
+        top_cnis = em_cache(selecionar_80_maiores)([chave_cnis], cnis_df, col_corrigido=cnis_df.columns[1])
+        top_carta = em_cache(selecionar_80_maiores)([chave_carta], carta_df, col_corrigido=carta_df.columns[4])
+        top_desconsid = em_cache(selecionar_80_maiores)([chave_desconsid], desconsid_df, col_corrigido=desconsid_df.columns[2])
 
     st.subheader("📊 80% Maiores Salários CNIS")
     st.dataframe(top_cnis)
@@ -85,10 +92,14 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 5: Consolidação e Substituição")
 
-    df_consolidado = pd.concat([top_cnis[[cnis_df.columns[0], cnis_df.columns[1]]],
-                                top_desconsid[[desconsid_df.columns[0], desconsid_df.columns[2]]]])
-
-    df_consolidado = df_consolidado.sort_values(by=df_consolidado.columns[1], ascending=False).reset_index(drop=True)
+    # Um salário por competência (o maior entre CNIS, Carta e Desconsiderados): a mesma
+    # base do resultado final da Etapa 6
+    with diagnostico.etapa('Etapa 5 - Consolidação') as registro:
+        tabela_substituicao, _ = em_cache(resolver_caso)([chave_cnis, chave_carta, chave_desconsid],
+                                                         cnis_df, carta_df, desconsid_df)
+        registro['Linhas'] = len(tabela_substituicao)
+    selecionados = tabela_substituicao[tabela_substituicao['Selecionado']]
+    df_consolidado = selecionados[['Competência', 'Melhor Valor', 'Fonte']].sort_values(by='Melhor Valor', ascending=False)
 
     st.subheader("📋 Base Consolidada para Cálculo Final")
     st.dataframe(df_consolidado)
@@ -99,33 +110,11 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
 
     st.sidebar.header("🔽 Etapa 6: Cálculo Final")
 
-    def calcular_media_final(df):
-        n_maiores = int(0.8 * len(df))
-        return df.nlargest(n_maiores, df.columns[1])[df.columns[1]].mean()
-
-    media_final = calcular_media_final(df_consolidado)
-
-    # Parâmetros previdenciários normativos
-    Tc = 38 + (1/12) + (25/365)
-    a = 0.31
-    Es = 21.8
-    Id = 60
-    coef = 1.0
-
-    def fator_previdenciario(Tc, a, Es, Id):
-        return round((Tc * a / Es) * (1 + ((Id + Tc * a) / 100)), 4)
-
-    FP = fator_previdenciario(Tc, a, Es, Id)
-
-    def salario_beneficio(media_salarios, FP):
-        return round(media_salarios * FP, 2)
-
-    salario_benef = salario_beneficio(media_final, FP)
-
-    def renda_mensal_inicial(salario_beneficio, coef=1.0):
-        return round(salario_beneficio * coef, 2)
-
-    renda_inicial = renda_mensal_inicial(salario_benef, coef)
+    # Parâmetros previdenciários normativos (Tc 38a 1m 25d, a 0,31, Es 21,8, Id 60, coef 1,0).
+    # O resultado fica no armazém local: o mesmo caso reenviado não é recalculado.
+    with diagnostico.etapa('Etapa 6 - Cálculo final (FP, SB, RMI)', linhas=len(cnis_df) + len(carta_df) + len(desconsid_df)):
+        resultado = calcular_caso_com_memo(cnis_df, carta_df, desconsid_df, Parametros())
+    media_final, FP, salario_benef, renda_inicial = (resultado[coluna] for coluna in COLUNAS_RESULTADO)
 
     # ===================
     # RESULTADOS DETALHADOS
@@ -155,13 +144,29 @@ if uploaded_cnis and uploaded_carta and uploaded_desconsid:
     # ===================
 
     st.subheader("📈 Gráfico Comparativo dos Salários")
-    plt.figure(figsize=(12,6))
-    plt.plot(df_consolidado[df_consolidado.columns[0]], df_consolidado[df_consolidado.columns[1]], marker='o', label='Salários Consolidados')
-    plt.xticks(rotation=90)
-    plt.ylabel('Valor (R$)')
-    plt.title('Comparativo dos Salários Considerados no Cálculo')
-    plt.legend()
-    st.pyplot(plt)
+    with diagnostico.etapa('Gráfico', linhas=len(df_consolidado)):
+        plt.figure(figsize=(12,6))
+        plt.plot(df_consolidado[df_consolidado.columns[0]], df_consolidado[df_consolidado.columns[1]], marker='o', label='Salários Consolidados')
+        plt.xticks(rotation=90)
+        plt.ylabel('Valor (R$)')
+        plt.title('Comparativo dos Salários Considerados no Cálculo')
+        plt.legend()
+        st.pyplot(plt)
+
+    # ===================
+    # DIAGNÓSTICO
+    # ===================
+
+    if diagnostico_ativo:
+        with st.expander("🩺 Diagnóstico", expanded=True):
+            tabela_diagnostico = diagnostico.como_dataframe()
+            st.dataframe(tabela_diagnostico)
+            st.bar_chart(tabela_diagnostico, x='Etapa', y='Tempo (s)')
+            st.download_button("📥 Exportar Diagnóstico (CSV)", data=tabela_diagnostico.to_csv(index=False),
+                               file_name='diagnostico_etapas.csv')
+            st.download_button("📥 Exportar Diagnóstico (JSON)",
+                               data=tabela_diagnostico.to_json(orient='records', force_ascii=False),
+                               file_name='diagnostico_etapas.json')
 
     # ===================
     # ENGENHARIA REVERSA DETALHADA
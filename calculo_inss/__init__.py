@@ -0,0 +1,25 @@
+from .parametros import Parametros
+from .pipeline import calcular_caso, preparar_caso
+from .lote import descobrir_casos, ler_manifesto, processar_caso, processar_lote, exportar_resultados
+from .paralelo import processar_lote_paralelo, processar_em_fluxo
+from .selecao import media_80_maiores, media_80_maiores_lote, valores_80_maiores, indices_80_maiores
+from .formulas import fator_previdenciario, salario_beneficio, renda_mensal_inicial, calcular_beneficio
+from .expectativa import expectativa_sobrevida, fator_previdenciario_ibge, construir_tabua
+from .indices import fatores_correcao, corrigir_salarios, construir_indices
+from .memo import ArmazemResultados, calcular_caso_com_memo
+from .leitura import ler_em_blocos, agrupar_por_beneficiario, casos_de_extratos, compactar
+from .colunar import normalizar_historico, gravar_parquet, EscritorParquet, ler_parquet, casos_de_parquet, calcular_historico
+from .historico import HistoricoContribuicao
+from .ponto_fixo import para_centavos, corrigir_centavos, calcular_beneficio_centavos
+from .marcadores import marcadores, adicionar_marcadores, com_marcador, pesos, descrever
+from .substituicao import resolver_substituicao, calcular_substituicao, substituicao_caso, substituicao_carteira
+from .incremental import MotorIncremental
+from .cenarios import varrer_cenarios, matriz_cenarios
+from .regras import comparar_regras, regra_mais_vantajosa, comparar_regras_carteira
+from .diagnostico import Diagnostico, perfilar
+from .sintetico import gerar_caso, gerar_carteira, gravar_diretorio, gravar_extratos, gerar_matriz
+from .colagem import ler_colagem, detectar_dialeto, descrever_relatorio
+from .competencias import para_yyyymm, analisar_competencias, para_datetime, indice_mensal
+from .marcos import classificar, marcos, com_marco, adicionar_marcos, descrever_marcos
+from .limites import limitar_salarios, limitar_centavos, limitar_beneficio, limites_vigentes, construir_limites
+from .carteira import ProcessamentoCarteira, origem_zip, origem_extratos, carregar_caso, resumir
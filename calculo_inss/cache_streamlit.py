@@ -0,0 +1,58 @@
+import hashlib
+from functools import wraps
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+
+# Cache dos dashboards Streamlit endereçado pelo conteúdo dos arquivos enviados.
+#
+# Cada interação com um widget reexecuta o script inteiro; com este cache a leitura,
+# a sanitização e o cálculo só rodam de novo quando o conteúdo de algum arquivo (hash
+# SHA-256 dos bytes) ou algum parâmetro muda. Os DataFrames nunca são hasheados pelo
+# Streamlit (argumentos com "_" são ignorados na chave); a chave é o hash do upload.
+
+MAX_ENTRADAS = 64
+TTL_SEGUNDOS = 60 * 60
+
+
+def chave_conteudo(arquivo):
+    # O hash de cada upload é calculado uma vez por sessão (file_id muda a cada novo envio)
+    chaves = st.session_state.setdefault('_chaves_upload', {})
+    identificador = getattr(arquivo, 'file_id', None) or id(arquivo)
+    if identificador not in chaves:
+        chaves[identificador] = hashlib.sha256(arquivo.getvalue()).hexdigest()
+    return chaves[identificador]
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS, ttl=TTL_SEGUNDOS, show_spinner=False)
+def _ler_csv(chave, _conteudo, opcoes):
+    return pd.read_csv(BytesIO(_conteudo), **dict(opcoes))
+
+
+def ler_csv(arquivo, **opcoes):
+    return _ler_csv(chave_conteudo(arquivo), arquivo.getvalue(), tuple(sorted(opcoes.items())))
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS, ttl=TTL_SEGUNDOS, show_spinner=False)
+def _executar(nome, chaves, parametros, _funcao, _dados):
+    return _funcao(*_dados, **dict(parametros))
+
+
+def em_cache(funcao):
+    # Envolve uma etapa que recebe DataFrames derivados dos uploads:
+    #   etapa = em_cache(limpar_dados)
+    #   df = etapa([chave_cnis], cnis_df, col_remuneracao='Remuneração')
+    # A chave é (nome da etapa, hashes dos arquivos de origem, parâmetros nomeados).
+    nome = f'{funcao.__module__}.{funcao.__qualname__}'
+
+    @wraps(funcao)
+    def executar(chaves, *dados, **parametros):
+        return _executar(nome, tuple(chaves), tuple(sorted(parametros.items())), funcao, dados)
+
+    return executar
+
+
+def limpar_cache():
+    _ler_csv.clear()
+    _executar.clear()
@@ -0,0 +1,232 @@
+import shutil
+import threading
+import time
+import weakref
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .formulas import calcular_beneficio
+from .leitura import COLUNA_ID, casos_de_extratos
+from .limites import limitar_beneficio
+from .competencias import para_yyyymm
+from .lote import ARQUIVOS, calcular_isolado, descobrir_casos
+from .marcadores import DESCONSIDERADO, coluna_observacao, com_marcador, marcadores
+from .paralelo import processar_em_fluxo
+from .parametros import Parametros
+from .pipeline import (COLUNAS_RESULTADO, aplicar_correcao_tabela, aplicar_indice_corrigido, aplicar_limites,
+                       coluna_valor)
+from .regras import comparar_regras
+from .salarios import limpar_dados
+from .selecao import media_80_maiores
+
+# Carteira de beneficiários para os dashboards: vários casos enviados de uma vez e
+# calculados em segundo plano, sem Streamlit neste módulo.
+#
+# Origens:
+#   arquivos   ZIP com os layouts de lote.descobrir_casos (<caso>/cnis.csv... ou
+#              <caso>_cnis.csv...) em qualquer nível de pasta
+#   extratos   três CSVs com vários beneficiários (coluna NIT/CPF), enviados soltos ou
+#              dentro do ZIP como cnis.csv, carta.csv, desconsiderados.csv
+#
+# Cada caso é calculado como no lote (calcular_isolado: a mesma base substituída, um
+# salário por competência, de substituicao.resolver_caso e do detalhamento; erros ficam
+# no próprio caso) e guarda também a média da Carta, sem os salários desconsiderados. RMI
+# da Carta e diferença são calculadas depois, para a carteira inteira de uma vez (resumir).
+
+COLUNAS_CARTA = ['Média Carta', 'RMI Carta', 'Diferença RMI']
+COLUNAS_RESUMO = ['Caso'] + COLUNAS_RESULTADO + COLUNAS_CARTA + ['Erro']
+
+
+# ===================
+# ORIGENS
+# ===================
+
+def origem_extratos(cnis, carta, desconsiderados, coluna_id=COLUNA_ID):
+    return {'tipo': 'extratos', 'caminhos': [Path(c) for c in (cnis, carta, desconsiderados)], 'coluna_id': coluna_id}
+
+
+def origem_pasta(pasta, coluna_id=COLUNA_ID):
+    pasta = Path(pasta)
+    diretorios = [pasta] + sorted(p for p in pasta.rglob('*') if p.is_dir() and '__MACOSX' not in p.parts)
+    for diretorio in diretorios:
+        trio = [diretorio / f'{nome}.csv' for nome in ARQUIVOS]
+        if all(c.exists() for c in trio) and coluna_id in pd.read_csv(trio[0], nrows=0).columns:
+            return origem_extratos(*trio, coluna_id=coluna_id)
+    return {'tipo': 'arquivos', 'casos': [caso for diretorio in diretorios for caso in descobrir_casos(diretorio)],
+            'coluna_id': coluna_id}
+
+
+def origem_zip(arquivo, pasta, coluna_id=COLUNA_ID):
+    # extractall descarta caminhos absolutos e componentes '..' dos nomes
+    with zipfile.ZipFile(arquivo) as zip_:
+        zip_.extractall(pasta)
+    return origem_pasta(pasta, coluna_id)
+
+
+def casos_da_origem(origem):
+    if origem['tipo'] == 'arquivos':
+        return origem['casos']
+    return casos_de_extratos(*origem['caminhos'], coluna_id=origem['coluna_id'])
+
+
+def contar_casos(origem):
+    if origem['tipo'] == 'arquivos':
+        return len(origem['casos'])
+    # Beneficiários distintos nos três extratos (só a coluna id é lida)
+    ids = [pd.read_csv(c, usecols=[origem['coluna_id']], dtype='string')[origem['coluna_id']].str.strip()
+           for c in origem['caminhos']]
+    return int(pd.concat(ids).dropna().nunique())
+
+
+def carregar_caso(origem, nome):
+    # (cnis_df, carta_df, desconsid_df) de um caso, para o detalhamento
+    nome = str(nome)
+    if origem['tipo'] == 'arquivos':
+        for caso in origem['casos']:
+            if caso['caso'] == nome:
+                return tuple(pd.read_csv(caso[arquivo]) for arquivo in ARQUIVOS)
+    else:
+        # Extratos ordenados pelo id: a leitura para ao passar do caso procurado
+        for id_caso, *frames in casos_da_origem(origem):
+            if id_caso == nome:
+                return tuple(frames)
+            if id_caso > nome:
+                break
+    raise KeyError(f"Caso não encontrado na carteira: {nome}")
+
+
+def detalhar_caso(origem, nome, parametros=None):
+    # Dados, tabela de substituição e comparação das regras de um caso (detalhamento)
+    from .substituicao import substituicao_caso
+    parametros = parametros or Parametros()
+    cnis_df, carta_df, desconsid_df = carregar_caso(origem, nome)
+    tabela_substituicao, _ = substituicao_caso(cnis_df, carta_df, desconsid_df, parametros)
+    tabela_regras = comparar_regras(para_yyyymm(tabela_substituicao['Competência']),
+                                    tabela_substituicao['Melhor Valor'], parametros)
+    return cnis_df, carta_df, desconsid_df, tabela_substituicao, tabela_regras
+
+
+# ===================
+# CÁLCULO
+# ===================
+
+def media_carta(carta_df, parametros=None):
+    # Média dos 80% maiores salários corrigidos da Carta, na mesma base do cálculo, sem
+    # as linhas marcadas como desconsideradas na Observação
+    parametros = parametros or Parametros()
+    carta_df = carta_df[~com_marcador(marcadores(carta_df[coluna_observacao(carta_df)]), DESCONSIDERADO)]
+    carta_df = limpar_dados(carta_df, carta_df.columns[2])
+    if parametros.limites:
+        carta_df = aplicar_limites(carta_df, carta_df.columns[1], carta_df.columns[2])
+    if parametros.dib is None:
+        carta_df = aplicar_indice_corrigido(carta_df, carta_df.columns[2], carta_df.columns[3])
+    else:
+        carta_df = aplicar_correcao_tabela(carta_df, carta_df.columns[1], carta_df.columns[2], parametros.dib)
+    return media_80_maiores(carta_df[coluna_valor(carta_df, carta_df.columns[2])].to_numpy(dtype=np.float64))
+
+
+def processar_com_carta(caso, parametros=None, armazem=None):
+    # caso: dict de lote.descobrir_casos ou (id, cnis_df, carta_df, desconsid_df) dos extratos
+    if isinstance(caso, dict):
+        try:
+            caso = (caso['caso'], *(pd.read_csv(caso[arquivo]) for arquivo in ARQUIVOS))
+        except Exception as erro:
+            return {'Caso': caso['caso'], **dict.fromkeys(COLUNAS_RESULTADO), 'Média Carta': np.nan,
+                    'Erro': f'{type(erro).__name__}: {erro}'}
+    nome, cnis_df, carta_df, desconsid_df = caso
+    resultado = calcular_isolado(str(nome), cnis_df, carta_df, desconsid_df, parametros, armazem)
+    try:
+        resultado['Média Carta'] = media_carta(carta_df, parametros)
+    except Exception as erro:
+        resultado['Média Carta'] = np.nan
+        erro = f'Média da Carta: {type(erro).__name__}: {erro}'
+        resultado['Erro'] = erro if resultado['Erro'] is None else f"{resultado['Erro']}; {erro}"
+    return resultado
+
+
+def resumir(linhas, parametros=None):
+    # Tabela da carteira; RMI da Carta e diferença calculadas para todos os casos de uma vez
+    parametros = parametros or Parametros()
+    tabela = pd.DataFrame(linhas, columns=['Caso'] + COLUNAS_RESULTADO + ['Média Carta', 'Erro'])
+    tabela[COLUNAS_RESULTADO + ['Média Carta']] = tabela[COLUNAS_RESULTADO + ['Média Carta']].astype(np.float64)
+    _, SB, RMI = calcular_beneficio(tabela['Média Carta'].to_numpy(), parametros.Tc, parametros.a,
+                                    parametros.expectativa(), parametros.Id, parametros.coef)
+    if parametros.limites:
+        SB, RMI = limitar_beneficio(SB, RMI, parametros.dib)
+    tabela['RMI Carta'] = RMI
+    tabela['Diferença RMI'] = tabela['Renda Mensal Inicial'].to_numpy() - RMI
+    return tabela[COLUNAS_RESUMO]
+
+
+class ProcessamentoCarteira:
+    # Cálculo da carteira numa thread: a interface consulta o progresso e o resumo parcial
+    # a cada interação sem esperar o fim. Com workers > 1 os casos vão para processos
+    # (paralelo.processar_em_fluxo) e a thread só recolhe as linhas.
+    # pasta: diretório temporário da origem (ZIP extraído, extratos enviados), removido
+    # por descartar() ou quando o processamento é coletado (sessão encerrada) ou o
+    # processo termina.
+    __slots__ = ('origem', 'parametros', 'workers', 'pasta', 'total', 'linhas', 'erro', 'inicio', 'duracao',
+                 '_parar', '_thread', '_remover_pasta', '__weakref__')
+
+    def __init__(self, origem, parametros=None, workers=1, pasta=None):
+        self.origem = origem
+        self.pasta = None if pasta is None else str(pasta)
+        self._remover_pasta = None if pasta is None else weakref.finalize(self, shutil.rmtree, self.pasta, True)
+        self.parametros = parametros or Parametros()
+        self.workers = workers
+        self.total = contar_casos(origem)
+        self.linhas = []
+        self.erro = None
+        self.inicio = None
+        self.duracao = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        self._thread = threading.Thread(target=self._executar, name='carteira_inss', daemon=True)
+        self._thread.start()
+        return self
+
+    def _executar(self):
+        try:
+            for linha in processar_em_fluxo(casos_da_origem(self.origem), self.parametros, self.workers,
+                                            processar=processar_com_carta):
+                self.linhas.append(linha)
+                if self._parar.is_set():
+                    break
+        except Exception as erro:
+            self.erro = f'{type(erro).__name__}: {erro}'
+        finally:
+            self.duracao = time.perf_counter() - self.inicio
+
+    def parar(self):
+        self._parar.set()
+
+    def descartar(self):
+        self.parar()
+        if self._remover_pasta is not None:
+            self._remover_pasta()
+
+    def aguardar(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.ativo
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def concluidos(self):
+        return len(self.linhas)
+
+    @property
+    def interrompido(self):
+        return self._parar.is_set()
+
+    def resumo(self):
+        return resumir(self.linhas[:self.concluidos], self.parametros)
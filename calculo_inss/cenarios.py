@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from .competencias import indice_mensal, yyyymm_de_indice
+from .expectativa import ano_tabua_vigente, expectativa_sobrevida
+from .formulas import calcular_beneficio
+from .limites import limitar_beneficio
+from .parametros import Parametros
+from .pipeline import COLUNAS_RESULTADO
+
+# Grade de cenários (sensibilidade) sobre Tc, Id, Es e data de aposentadoria.
+#
+# Eixos: beneficiário x meses adiante x Tc x Id x Es. "Aposentar daqui a N meses" soma
+# N/12 a Tc e a Id (e, com tábua IBGE + DIB, troca a tábua vigente). As colunas Tc e Id
+# guardam o valor do eixo (hoje), para que cada eixo tenha os mesmos valores em todos os
+# meses; os valores na data da aposentadoria ficam em 'Tc efetivo' e 'Id efetivo'. Tudo é feito por
+# broadcasting NumPy: o FP é avaliado só nos eixos de parâmetros e o SB/RMI na grade
+# inteira, sem laço em Python. A média de cada beneficiário é a já calculada na DIB
+# original (a correção monetária dos salários não é refeita para cada data). Com
+# parametros.limites, SB e RMI da grade são limitados ao mínimo e ao teto da DIB de cada
+# data numa única chamada.
+
+EIXOS = ['Beneficiário', 'Meses', 'Tc', 'Id', 'Es']
+
+
+def _eixo(valores, padrao):
+    return np.atleast_1d(np.asarray(padrao if valores is None else valores, dtype=np.float64))
+
+
+def varrer_cenarios(medias, meses=None, Tc=None, Id=None, Es=None, parametros=None, nomes=None):
+    # medias: média dos 80% maiores de cada beneficiário. Eixos omitidos ficam no valor
+    # de parametros. Es omitido com parametros.ano_tabua vem da tábua para cada Id.
+    parametros = parametros or Parametros()
+    medias = np.atleast_1d(np.asarray(medias, dtype=np.float64))
+    meses = _eixo(meses, 0)
+    Tc = _eixo(Tc, parametros.Tc)
+    Id = _eixo(Id, parametros.Id)
+    dib = None
+    if parametros.dib is not None:
+        dib = yyyymm_de_indice(indice_mensal(parametros.dib) + meses.astype(np.int64))
+
+    adiante = meses[None, :, None, None, None] / 12
+    Tc_grade = Tc[None, None, :, None, None] + adiante
+    Id_grade = Id[None, None, None, :, None] + adiante
+
+    if Es is not None:
+        Es = _eixo(Es, None)
+        Es_grade = Es[None, None, None, None, :]
+    elif parametros.ano_tabua is None:
+        Es = _eixo(None, parametros.Es)
+        Es_grade = Es.reshape(1, 1, 1, 1, 1)
+    else:
+        ano = np.full(meses.shape, parametros.ano_tabua)
+        if dib is not None:
+            ano = ano_tabua_vigente(dib // 100, dib % 100)
+        Es_grade = expectativa_sobrevida(ano[None, :, None, None, None], Id_grade, parametros.sexo)
+        Es = None
+
+    FP, SB, RMI = calcular_beneficio(medias[:, None, None, None, None], Tc_grade, parametros.a, Es_grade, Id_grade,
+                                     parametros.coef)
+    if parametros.limites:
+        SB, RMI = limitar_beneficio(SB, RMI, None if dib is None else dib[None, :, None, None, None])
+    forma = np.broadcast_shapes(SB.shape, FP.shape, Es_grade.shape)
+
+    nomes = np.arange(len(medias)) if nomes is None else np.asarray(nomes)
+    colunas = {
+        'Beneficiário': np.broadcast_to(nomes[:, None, None, None, None], forma),
+        'Meses': np.broadcast_to(meses[None, :, None, None, None], forma),
+        'Tc': np.broadcast_to(Tc[None, None, :, None, None], forma),
+        'Id': np.broadcast_to(Id[None, None, None, :, None], forma),
+        'Es': np.broadcast_to(Es_grade, forma),
+        'Tc efetivo': np.broadcast_to(Tc_grade, forma),
+        'Id efetivo': np.broadcast_to(Id_grade, forma),
+        COLUNAS_RESULTADO[0]: np.broadcast_to(medias[:, None, None, None, None], forma),
+        COLUNAS_RESULTADO[1]: np.broadcast_to(FP, forma),
+        COLUNAS_RESULTADO[2]: np.broadcast_to(SB, forma),
+        COLUNAS_RESULTADO[3]: np.broadcast_to(RMI, forma),
+    }
+    return pd.DataFrame({nome: valores.ravel() for nome, valores in colunas.items()})
+
+
+def matriz_cenarios(tabela, linhas, colunas, valor='Renda Mensal Inicial'):
+    # Recorte 2-D da grade para o mapa de calor (demais eixos já filtrados pelo chamador)
+    return tabela.pivot_table(index=linhas, columns=colunas, values=valor, aggfunc='first')
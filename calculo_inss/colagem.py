@@ -0,0 +1,263 @@
+import re
+from html.parser import HTMLParser
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+# Leitura de dados colados (CNIS / Carta) numa passada só.
+#
+# O dialeto é detectado uma vez, numa amostra das primeiras linhas:
+#   html           tabelas do site do INSS (<table>), sem dependência de lxml/bs4
+#   delimitado     tabulação, ';', '|' ou ',' (contagem consistente por linha)
+#   espacos        colunas separadas por espaços simples ("R$ 1.234,56" é um campo só;
+#                  a última coluna, como a Observação da Carta, absorve os espaços)
+#   largura_fixa   texto extraído de PDF do CNIS (colunas alinhadas por 2+ espaços)
+#
+# Linhas que não seguem o formato (cabeçalhos de página repetidos, rodapés, linhas com
+# campos a mais) são separadas antes do parsing e devolvidas no relatório; as demais
+# são lidas de uma vez pelo engine C do pandas, com todas as colunas como texto
+# (a conversão de valores fica para limpar_dados / normalizar_salarios). Texto em que
+# nenhuma separação de colunas é reconhecida ('coluna') não gera tabela: só o relatório.
+
+COLUNAS_CNIS = ['Competência', 'Remuneração']
+COLUNAS_CARTA = ['SEQ', 'Data', 'Salário', 'Índice', 'Salário Corrigido', 'Observação']
+COLUNAS_DESCONSIDERADOS = ['Competência', 'Obs', 'Salário']
+
+SEPARADORES = ['\t', ';', '|', ',']
+AMOSTRA_LINHAS = 200
+# Fração das linhas da amostra que precisa seguir o dialeto (o resto são títulos, rodapés...)
+CONSISTENCIA = 0.6
+
+_ASPAS = re.compile(r'"[^"]*"')
+_LARGURA_FIXA = r'\s{2,}|\t'
+_VIRGULA_DECIMAL = r'\d,\d{1,2}(?=\s|$)'
+_COMPETENCIA = r'\d{1,2}[/\-.]\d{2,4}|\d{4}[/\-.]\d{1,2}'
+_NUMERO = r'-?(?:R\$\s*)?[\d.,]+'
+_MOEDA = r'R\$\s+(?=-?\d)'
+
+# Tipo do primeiro campo de cada linha: linhas de dados têm o mesmo tipo
+TEXTO, COMPETENCIA, NUMERO = 0, 1, 2
+
+
+def _tipos(campos, separador=None):
+    # Tipo de cada campo; com separador, o do primeiro campo de cada linha (sem dividi-la)
+    campos = pd.Series(campos, dtype='string')
+    fim = r'\s*$' if separador is None else rf'\s*(?:{separador}|$)'
+    return np.select([campos.str.match(rf'\s*(?:{_COMPETENCIA}){fim}').fillna(False).to_numpy(dtype=bool),
+                      campos.str.match(rf'\s*(?:{_NUMERO}){fim}').fillna(False).to_numpy(dtype=bool)],
+                     [COMPETENCIA, NUMERO], TEXTO)
+
+
+def _moda(valores):
+    valores, contagens = np.unique(valores, return_counts=True)
+    return valores[contagens.argmax()], contagens.max() / contagens.sum()
+
+
+# ===================
+# DETECÇÃO DO DIALETO
+# ===================
+
+def detectar_dialeto(linhas):
+    # Devolve ('delimitado', sep), ('largura_fixa', None), ('espacos', r'\s+') ou ('coluna', None)
+    amostra = pd.Series(linhas[:AMOSTRA_LINHAS], dtype='string').str.replace(_ASPAS, '', regex=True)
+    for sep in SEPARADORES:
+        contagem = amostra.str.count(re.escape(sep)).to_numpy()
+        if sep == ',' and amostra.str.count(_VIRGULA_DECIMAL).sum() * 2 >= contagem.sum():
+            # Vírgulas que são decimais pt-BR ("1.234,56"), não separadores
+            continue
+        if (contagem > 0).mean() >= CONSISTENCIA:
+            return 'delimitado', sep
+    amostra = amostra.str.strip().str.replace(_MOEDA, 'R$', regex=True)
+    if (amostra.str.count(_LARGURA_FIXA).to_numpy() > 0).mean() >= CONSISTENCIA:
+        return 'largura_fixa', None
+    moda, frequencia = _moda(amostra.str.count(r'\s+').to_numpy())
+    if moda > 0 and frequencia >= CONSISTENCIA:
+        return 'espacos', r'\s+'
+    return 'coluna', None
+
+
+def _decimal(campos):
+    # Separador decimal predominante dos valores (só informativo: os valores ficam como texto)
+    campos = pd.Series(campos, dtype='string')
+    virgula = campos.str.contains(r'\d,\d{1,2}\s*$', regex=True).sum()
+    ponto = campos.str.contains(r'\d\.\d{1,2}\s*$', regex=True).sum()
+    if not virgula and not ponto:
+        return None
+    return ',' if virgula >= ponto else '.'
+
+
+# ===================
+# HTML
+# ===================
+
+class _TabelasHTML(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tabelas = []
+        self._pilha = []
+        self._linha = None
+        self._celula = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._pilha.append([])
+        elif tag == 'tr' and self._pilha:
+            self._linha = []
+        elif tag in ('td', 'th') and self._linha is not None:
+            self._celula = []
+        elif tag == 'br' and self._celula is not None:
+            self._celula.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th') and self._celula is not None:
+            self._linha.append(' '.join(''.join(self._celula).split()))
+            self._celula = None
+        elif tag == 'tr' and self._linha is not None:
+            if self._linha:
+                self._pilha[-1].append(self._linha)
+            self._linha = None
+        elif tag == 'table' and self._pilha:
+            self.tabelas.append(self._pilha.pop())
+
+    def handle_data(self, dados):
+        if self._celula is not None:
+            self._celula.append(dados)
+
+
+def tabela_html(texto):
+    # Linhas (listas de células) da maior tabela do HTML: a de salários
+    leitor = _TabelasHTML()
+    leitor.feed(texto)
+    leitor.close()
+    return max(leitor.tabelas, key=len, default=[])
+
+
+# ===================
+# LEITURA
+# ===================
+
+def _nomes(n_campos, colunas):
+    colunas = list(colunas or [])
+    return colunas[:n_campos] + [f'Coluna {i + 1}' for i in range(len(colunas), n_campos)]
+
+
+def _relatorio(formato, separador=None, decimal=None, cabecalho=False, linhas=0, rejeitadas=None):
+    return {'formato': formato, 'separador': separador, 'decimal': decimal, 'cabecalho': cabecalho,
+            'linhas': linhas, 'rejeitadas': rejeitadas or []}
+
+
+def _separar_rejeitadas(numeros, linhas, n_campos, tipos, campos_da_linha, campos_extras=False):
+    # Linhas de dados: primeiro campo do tipo mais comum (competência, número) e não mais
+    # campos que o usual (exceto com campos_extras: largura fixa e HTML, em que colunas
+    # vazias mudam a contagem). Cabeçalho: a linha só de texto logo antes da primeira
+    # linha de dados. O resto (títulos, rodapés, cabeçalhos repetidos) é rejeitado.
+    tipo_usual = _moda(tipos[tipos != TEXTO])[0] if (tipos != TEXTO).any() else TEXTO
+    de_dados = tipos == tipo_usual
+    usual, _ = _moda(n_campos[de_dados])
+    limite = n_campos[de_dados].max() if campos_extras else usual
+    manter = de_dados & (n_campos <= limite) & ~((n_campos == 1) & (usual > 1))
+    usual = limite
+
+    cabecalho = None
+    primeira = int(np.argmax(manter)) if manter.any() else len(linhas)
+    if tipo_usual != TEXTO and primeira > 0 and (_tipos(campos_da_linha(primeira - 1)) == TEXTO).all():
+        cabecalho = primeira - 1
+        manter[cabecalho] = True
+    rejeitadas = [(int(n), linha) for n, linha in zip(numeros[~manter], linhas[~manter])]
+    return manter, cabecalho is not None, int(usual), rejeitadas
+
+
+def ler_colagem(texto, colunas=None):
+    # Devolve (DataFrame com colunas de texto ou None, relatório). colunas: nomes usados
+    # quando o texto colado não traz cabeçalho (ex.: COLUNAS_CNIS).
+    texto = (texto or '').lstrip('\ufeff')
+    if not texto.strip():
+        return None, _relatorio(None)
+    if re.search(r'<table\b', texto, re.IGNORECASE):
+        return _ler_colagem_html(texto, colunas)
+
+    todas = pd.Series(texto.splitlines(), dtype='string')
+    preenchidas = np.flatnonzero(~todas.str.fullmatch(r'\s*').to_numpy(dtype=bool))
+    serie, numeros = todas.iloc[preenchidas].reset_index(drop=True), preenchidas + 1
+    linhas = serie.to_numpy(dtype=object)
+
+    formato, sep = detectar_dialeto(linhas)
+    if formato == 'coluna':
+        # Sem separação de colunas reconhecível: nenhuma linha vira tabela
+        return None, _relatorio(formato, rejeitadas=[(int(n), linha) for n, linha in zip(numeros, linhas)])
+    # Padrão que separa os campos (só para contar campos e classificar as linhas)
+    if formato == 'delimitado':
+        padrao = re.escape(sep)
+        if '"' in texto:
+            serie = serie.str.replace(_ASPAS, '', regex=True)
+    else:
+        serie = serie.str.strip()
+        padrao = {'largura_fixa': _LARGURA_FIXA, 'espacos': r'\s+'}[formato]
+    n_campos = serie.str.count(padrao).to_numpy() + 1
+    if formato == 'espacos':
+        # "R$ 1.234,56" é um campo só, e os campos além das colunas esperadas (espaços
+        # dentro da Observação) ficam na última coluna
+        serie = serie.str.replace(_MOEDA, 'R$', regex=True)
+        n_campos = serie.str.count(padrao).to_numpy() + 1
+        if colunas:
+            n_campos = np.minimum(n_campos, len(colunas))
+    manter, cabecalho, usual, rejeitadas = _separar_rejeitadas(numeros, linhas, n_campos, _tipos(serie, padrao),
+                                                                lambda i: re.split(padrao, serie.iat[i]),
+                                                                campos_extras=formato == 'largura_fixa'
+                                                                or (formato == 'espacos' and bool(colunas)))
+
+    opcoes = dict(header=0 if cabecalho else None, dtype=str, keep_default_na=False, na_values=[''])
+    if formato == 'espacos':
+        campos = serie[manter].str.split(padrao, n=usual - 1, regex=True, expand=True).reindex(columns=range(usual))
+        campos = campos.mask(campos.isna() | (campos == '')).to_numpy(dtype=object)
+        if cabecalho:
+            df = pd.DataFrame(campos[1:], columns=[str(c) for c in campos[0]])
+        else:
+            df = pd.DataFrame(campos, columns=_nomes(usual, colunas))
+    elif formato == 'largura_fixa':
+        aceitas = StringIO('\n'.join(linhas[manter]))
+        df = pd.read_fwf(aceitas, colspecs='infer', infer_nrows=min(int(manter.sum()), 1000), **opcoes)
+    else:
+        aceitas = StringIO('\n'.join(linhas[manter]))
+        df = pd.read_csv(aceitas, sep=sep, engine='c', skipinitialspace=True, **opcoes)
+
+    if not cabecalho and formato != 'espacos':
+        df.columns = _nomes(df.shape[1], colunas)
+    return _finalizar(df, _relatorio(formato, sep, None, cabecalho, len(df), rejeitadas))
+
+
+def _ler_colagem_html(texto, colunas):
+    linhas = tabela_html(texto)
+    if not linhas:
+        return None, _relatorio('html')
+    n_campos = np.array([len(linha) for linha in linhas])
+    textos = np.array([' | '.join(linha) for linha in linhas], dtype=object)
+    manter, cabecalho, usual, rejeitadas = _separar_rejeitadas(np.arange(1, len(linhas) + 1), textos, n_campos,
+                                                                _tipos([linha[0] for linha in linhas]), linhas.__getitem__,
+                                                                campos_extras=True)
+    aceitas = [linha + [''] * (usual - len(linha)) for linha, ok in zip(linhas, manter) if ok]
+    nomes = aceitas.pop(0) if cabecalho else _nomes(usual, colunas)
+    df = pd.DataFrame(aceitas, columns=nomes, dtype=object).replace('', np.nan)
+    return _finalizar(df, _relatorio('html', None, None, cabecalho, len(df), rejeitadas))
+
+
+def _finalizar(df, relatorio):
+    amostra = df.iloc[:AMOSTRA_LINHAS].to_numpy(dtype=object).ravel()
+    relatorio['decimal'] = _decimal(amostra[pd.notna(amostra)])
+    return df, relatorio
+
+
+def descrever_relatorio(relatorio):
+    # Resumo de uma linha para exibição (ex.: st.caption)
+    if relatorio['formato'] is None:
+        return "Nenhum dado colado."
+    nomes_sep = {'\t': 'tabulação', ';': 'ponto e vírgula', '|': 'barra vertical', ',': 'vírgula', r'\s+': 'espaços'}
+    partes = [f"Formato: {relatorio['formato']}"]
+    if relatorio['separador']:
+        partes.append(f"separador: {nomes_sep.get(relatorio['separador'], relatorio['separador'])}")
+    if relatorio['decimal']:
+        partes.append(f"decimal: '{relatorio['decimal']}'")
+    partes.append("com cabeçalho" if relatorio['cabecalho'] else "sem cabeçalho")
+    partes.append(f"{relatorio['linhas']} linhas lidas, {len(relatorio['rejeitadas'])} rejeitadas")
+    return '; '.join(partes)
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+from .competencias import para_yyyymm
+from .marcadores import DESCONSIDERADO, com_marcador, coluna_observacao, marcadores
+from .pipeline import normalizar_caso
+from .ponto_fixo import para_centavos
+from .salarios import normalizar_salarios
+
+# Formato colunar canônico dos históricos de contribuição (Parquet / Arrow).
+#
+#   beneficiario      string   NIT/CPF ou nome do caso
+#   competencia       int32    YYYYMM
+#   salario_centavos  int64    salário nominal em centavos (arredondamento meio para cima)
+#   fonte             uint8    FONTE_CNIS / FONTE_CARTA / FONTE_DESCONSIDERADOS
+#   desconsiderado    bool     marcado como DESCONSIDERADO pelo INSS
+#   indice            float64  Índice de correção informado na Carta (1 nas demais fontes)
+#
+# Uma carteira normalizada é gravada uma vez e recarregada sem repetir limpar_dados /
+# parsing de datas; as colunas vão do Arrow para o NumPy sem cópia. É também o formato
+# de troca entre app.py, calc.py e PEDIDODEREVISÃO.py. pyarrow é dependência opcional,
+# necessária apenas para gravar/ler Parquet.
+
+FONTE_CNIS = 0
+FONTE_CARTA = 1
+FONTE_DESCONSIDERADOS = 2
+
+ESQUEMA = {
+    'beneficiario': 'string',
+    'competencia': 'int32',
+    'salario_centavos': 'int64',
+    'fonte': 'uint8',
+    'desconsiderado': 'bool',
+    'indice': 'float64',
+}
+
+CASOS_POR_GRUPO = 1_000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as erro:
+        raise ImportError("O formato Parquet/Arrow requer o pacote pyarrow (pip install pyarrow)") from erro
+    return pyarrow
+
+
+def _bloco(beneficiario, competencias, salarios, fonte, desconsiderado, indice=1.0):
+    return pd.DataFrame({
+        'beneficiario': pd.array([beneficiario] * len(salarios), dtype='string'),
+        'competencia': para_yyyymm(competencias),
+        'salario_centavos': para_centavos(salarios),
+        'fonte': np.full(len(salarios), fonte, dtype=np.uint8),
+        'desconsiderado': np.broadcast_to(np.asarray(desconsiderado, dtype=bool), (len(salarios),)).copy(),
+        'indice': np.broadcast_to(np.asarray(indice, dtype=np.float64), (len(salarios),)).copy(),
+    })
+
+
+def normalizar_historico(beneficiario, cnis_df, carta_df, desconsid_df):
+    cnis_df, carta_df, desconsid_df = normalizar_caso(cnis_df, carta_df, desconsid_df)
+    historico = pd.concat([
+        _bloco(beneficiario, cnis_df[cnis_df.columns[0]], cnis_df[cnis_df.columns[1]], FONTE_CNIS, False),
+        _bloco(beneficiario, carta_df[carta_df.columns[1]], carta_df[carta_df.columns[2]], FONTE_CARTA,
+               com_marcador(marcadores(carta_df[coluna_observacao(carta_df)]), DESCONSIDERADO),
+               normalizar_salarios(carta_df[carta_df.columns[3]], milhar=False)[0].to_numpy()),
+        _bloco(beneficiario, desconsid_df[desconsid_df.columns[0]], desconsid_df[desconsid_df.columns[2]],
+               FONTE_DESCONSIDERADOS, True),
+    ], ignore_index=True)
+    return historico.astype(ESQUEMA)
+
+
+def gravar_parquet(historico, destino):
+    pa = _pyarrow()
+    tabela = pa.Table.from_pandas(historico.astype(ESQUEMA), preserve_index=False)
+    pa.parquet.write_table(tabela, destino)
+    return destino
+
+
+class EscritorParquet:
+    # Gravação em fluxo: os históricos são acumulados até casos_por_grupo e gravados como
+    # um row group, de modo que a carteira inteira nunca fica em memória
+    __slots__ = ('destino', 'casos_por_grupo', 'casos', '_pendentes', '_escritor')
+
+    def __init__(self, destino, casos_por_grupo=CASOS_POR_GRUPO):
+        self.destino = destino
+        self.casos_por_grupo = casos_por_grupo
+        self.casos = 0
+        self._pendentes = []
+        self._escritor = None
+
+    def acrescentar(self, historico):
+        self._pendentes.append(historico)
+        self.casos += 1
+        if len(self._pendentes) >= self.casos_por_grupo:
+            self._gravar_pendentes()
+
+    def _gravar_pendentes(self):
+        pa = _pyarrow()
+        historico = pd.concat(self._pendentes, ignore_index=True) if self._pendentes else pd.DataFrame(columns=list(ESQUEMA))
+        tabela = pa.Table.from_pandas(historico.astype(ESQUEMA), preserve_index=False)
+        if self._escritor is None:
+            self._escritor = pa.parquet.ParquetWriter(self.destino, tabela.schema)
+        self._escritor.write_table(tabela.cast(self._escritor.schema))
+        self._pendentes = []
+
+    def fechar(self):
+        if self._pendentes or self._escritor is None:
+            self._gravar_pendentes()
+        self._escritor.close()
+        return self.destino
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+def ler_arrow(origem, beneficiarios=None):
+    pa = _pyarrow()
+    filtros = None if beneficiarios is None else [('beneficiario', 'in', list(beneficiarios))]
+    # Carteiras gravadas antes da coluna indice continuam legíveis (índice 1)
+    colunas = [c for c in ESQUEMA if c in pa.parquet.read_schema(origem).names]
+    tabela = pa.parquet.read_table(origem, columns=colunas, filters=filtros).combine_chunks()
+    if 'indice' not in colunas:
+        tabela = tabela.append_column('indice', pa.array(np.ones(tabela.num_rows)))
+    return tabela
+
+
+def para_numpy(tabela):
+    # Colunas inteiras sem nulos saem do Arrow sem cópia (bool do Arrow é compactado
+    # em bits e string não tem layout NumPy: essas duas são convertidas; índices inválidos
+    # da Carta são nulos no Arrow e voltam como NaN)
+    colunas = {}
+    for nome, tipo in ESQUEMA.items():
+        coluna = tabela.column(nome)
+        if coluna.num_chunks == 0:
+            colunas[nome] = np.empty(0, dtype=object if tipo == 'string' else tipo)
+        else:
+            colunas[nome] = coluna.chunk(0).to_numpy(zero_copy_only=tipo not in ('string', 'bool', 'float64'))
+    return colunas
+
+
+def ler_parquet(origem, beneficiarios=None):
+    return ler_arrow(origem, beneficiarios).to_pandas().astype(ESQUEMA)
+
+
+def casos_de_parquet(origem):
+    # Gera (beneficiario, colunas NumPy do caso) sem groupby do pandas
+    colunas = para_numpy(ler_arrow(origem))
+    ordem = np.argsort(colunas['beneficiario'], kind='stable')
+    ids = colunas['beneficiario'][ordem]
+    inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else []
+    for inicio, fim in zip(inicios, list(inicios[1:]) + [len(ids)]):
+        posicoes = ordem[inicio:fim]
+        yield ids[inicio], {nome: valores[posicoes] for nome, valores in colunas.items() if nome != 'beneficiario'}
+
+
+def calcular_historico(colunas, parametros=None):
+    # Mesmo cálculo de pipeline.calcular_caso, a partir do formato normalizado
+    from .historico import HistoricoContribuicao
+    return HistoricoContribuicao.de_colunas(colunas).calcular(parametros)
@@ -0,0 +1,115 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Competências como inteiros YYYYMM (int32) e como índice mensal contínuo
+# (ano * 12 + mês - 1), que permite aritmética de meses e indexação direta em tabelas.
+#
+# Formatos aceitos (texto, números ou datas), todos numa expressão só:
+#   MM/AAAA, MM-AAAA, MM.AAAA          01/1995
+#   AAAA-MM, AAAA/MM, datas ISO        1995-01, 1995-01-15, 1995-01-15 00:00:00
+#   DD/MM/AAAA, DD/MM/AA               15/01/1995, 15/01/95
+#   AAAAMM                             199501, 199501.0
+#   mês por extenso                    jan/1995, Janeiro de 1995, JAN/95
+#   MM/AA                              01/95 (AA < PIVO_ANO_2_DIGITOS -> 20AA, senão 19AA)
+#
+# Um histórico de 50 anos tem no máximo ~600 competências distintas: cada texto
+# distinto é interpretado uma vez (pd.factorize) e o resultado é distribuído às linhas
+# por indexação. Os textos já vistos ficam num cache do módulo, compartilhado entre os
+# arquivos de uma sessão ou de um lote. Competências inválidas viram 0; os textos
+# recusados são listados por competencias_invalidas, para serem relatados.
+
+PIVO_ANO_2_DIGITOS = 40
+TAMANHO_CACHE = 100_000
+
+_MESES = {'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+          'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12}
+
+_FORMATOS = re.compile(r"""^\s*(?:
+    (?P<d_dia>\d{1,2})[/\-.](?P<d_mes>\d{1,2})[/\-.](?P<d_ano>\d{4})
+  | (?P<i_ano>\d{4})[/\-.](?P<i_mes>\d{1,2})
+  | (?P<m_mes>\d{1,2})[/\-.](?P<m_ano>\d{4})
+  | (?P<c_ano>\d{4})(?P<c_mes>\d{2})(?:\.0*)?\s*$
+  | (?P<n_mes>""" + '|'.join(_MESES) + r""")[a-zç]*\.?(?:\s+de\s+|[/\-.\s]*)(?P<n_ano>\d{4}|\d{2})(?!\d)
+  | (?P<e_dia>\d{1,2})[/\-.](?P<e_mes>\d{1,2})[/\-.](?P<e_ano>\d{2})(?!\d)
+  | (?P<a_mes>\d{1,2})[/\-.](?P<a_ano>\d{2})(?!\d|[/\-.]\d)
+)""", re.VERBOSE | re.IGNORECASE)
+
+_CACHE = {}
+
+
+def _interpretar(textos):
+    # Interpretação vetorizada de textos distintos -> YYYYMM (0 se inválido)
+    partes = pd.Series(textos, dtype=object).str.extract(_FORMATOS)
+    mes = partes['d_mes'].fillna(partes['i_mes']).fillna(partes['m_mes']).fillna(partes['c_mes'])
+    mes = pd.to_numeric(mes.fillna(partes['e_mes']).fillna(partes['a_mes']), errors='coerce')
+    mes = mes.fillna(partes['n_mes'].str.lower().map(_MESES))
+    ano = partes['d_ano'].fillna(partes['i_ano']).fillna(partes['m_ano']).fillna(partes['c_ano'])
+    ano = ano.fillna(partes['n_ano']).fillna(partes['e_ano'])
+    ano = pd.to_numeric(ano.fillna(partes['a_ano']), errors='coerce')
+    ano = ano.where(ano >= 100, ano + np.where(ano < PIVO_ANO_2_DIGITOS, 2000, 1900))
+    yyyymm = (ano * 100 + mes).where((mes >= 1) & (mes <= 12))
+    return yyyymm.fillna(0).to_numpy(dtype=np.int32)
+
+
+def _yyyymm_distintos(distintos):
+    chaves = [str(valor) for valor in distintos]
+    novos = [chave for chave in dict.fromkeys(chaves) if chave not in _CACHE]
+    if novos:
+        if len(_CACHE) + len(novos) > TAMANHO_CACHE:
+            _CACHE.clear()
+        _CACHE.update(zip(novos, _interpretar(novos).tolist()))
+    return np.fromiter((_CACHE[chave] for chave in chaves), dtype=np.int32, count=len(chaves))
+
+
+def para_yyyymm(serie):
+    serie = pd.Series(serie)
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return (serie.dt.year * 100 + serie.dt.month).fillna(0).to_numpy(dtype=np.int32)
+    codigos, distintos = pd.factorize(serie)
+    # Código -1 (ausente) aponta para o 0 acrescentado ao fim
+    return np.append(_yyyymm_distintos(distintos), np.int32(0))[codigos]
+
+
+def competencias_invalidas(serie):
+    # Textos distintos preenchidos que não viram competência (as linhas ficariam com 0)
+    serie = pd.Series(serie)
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return []
+    _, distintos = pd.factorize(serie)
+    textos = [str(valor) for valor in distintos]
+    return [texto for texto, yyyymm in zip(textos, _yyyymm_distintos(distintos)) if yyyymm == 0 and texto.strip()]
+
+
+def analisar_competencias(serie):
+    # (YYYYMM, índice mensal, ano) numa passada; inválidas: 0, -1 e 0. Classificações por
+    # período (antes/depois de 07/1994, da EC 103...) viram comparações de inteiros.
+    yyyymm = para_yyyymm(serie)
+    validas = yyyymm > 0
+    indice = np.where(validas, indice_mensal(yyyymm), -1).astype(np.int32)
+    return yyyymm, indice, (yyyymm // 100).astype(np.int16)
+
+
+def para_datetime(yyyymm):
+    # YYYYMM -> datetime64 no dia 1 do mês (NaT para inválidas), para gráficos e exibição
+    yyyymm = np.asarray(yyyymm, dtype=np.int64)
+    meses = np.where(yyyymm > 0, indice_mensal(yyyymm) - indice_mensal(197001), 0)
+    return pd.Series(meses.astype('datetime64[M]').astype('datetime64[ns]')).where(yyyymm > 0)
+
+
+def indice_mensal(yyyymm):
+    yyyymm = np.asarray(yyyymm, dtype=np.int64)
+    return (yyyymm // 100) * 12 + (yyyymm % 100) - 1
+
+
+def yyyymm_de_indice(indice):
+    indice = np.asarray(indice, dtype=np.int64)
+    return ((indice // 12) * 100 + indice % 12 + 1).astype(np.int32)
+
+
+def formatar_competencia(yyyymm):
+    # YYYYMM -> 'MM/AAAA' (texto vazio para competências inválidas)
+    yyyymm = np.asarray(yyyymm, dtype=np.int64)
+    texto = pd.Series(yyyymm % 100).map('{:02d}'.format) + '/' + pd.Series(yyyymm // 100).astype(str)
+    return texto.where(yyyymm > 0, '').to_numpy(dtype=object)
@@ -0,0 +1,167 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+import pandas as pd
+
+# Instrumentação por etapa: tempo de parede, linhas processadas e pico de memória.
+#
+#   diagnostico = Diagnostico(memoria=True)
+#   with diagnostico.etapa('Etapa 2 - Sanitização', linhas=len(cnis_df)):
+#       ...
+#   limpar = diagnostico.cronometrar('limpar_dados')(limpar_dados)
+#
+# Com acumular=True as execuções de uma etapa com o mesmo nome somam-se num único
+# registro (tempo e linhas somados, pico de memória máximo): é assim que o lote mostra
+# onde vai o tempo de milhares de casos.
+#
+# O pico de memória vem do tracemalloc (só com memoria=True: o rastreamento deixa o
+# código mais lento) e é medido a partir da memória em uso no início da etapa. Etapas
+# aninhadas repassam o pico para a etapa de fora. O rastreamento só fica ligado enquanto
+# há uma etapa aberta: termina com a etapa mais externa, mesmo se ela falhar, e não
+# continua ativo no processo (servidor do Streamlit) depois da execução.
+
+COLUNAS_DIAGNOSTICO = ['Etapa', 'Tempo (s)', 'Linhas', 'Linhas/s', 'Memória pico (MB)']
+
+
+class Diagnostico:
+    __slots__ = ('memoria', 'registros', '_pilha', '_acumulados', '_iniciou_tracemalloc')
+
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.registros = []
+        self._pilha = []
+        self._acumulados = {}
+        self._iniciou_tracemalloc = False
+
+    def encerrar(self):
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    @contextmanager
+    def etapa(self, nome, linhas=None, acumular=False):
+        # O registro é devolvido para que 'linhas' possa ser informado ao fim da etapa
+        registro = {'Etapa': nome, 'Linhas': linhas}
+        if self.memoria and not self._pilha and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        medir_memoria = self.memoria and tracemalloc.is_tracing()
+        if medir_memoria:
+            atual, pico = tracemalloc.get_traced_memory()
+            for externo in self._pilha:
+                externo['_pico'] = max(externo['_pico'], pico)
+            tracemalloc.reset_peak()
+            registro['_base'], registro['_pico'] = atual, atual
+        self._pilha.append(registro)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['Tempo (s)'] = time.perf_counter() - inicio
+            self._pilha.pop()
+            # Outra sessão pode ter encerrado o rastreamento que esta etapa usava
+            medir_memoria = medir_memoria and tracemalloc.is_tracing()
+            if medir_memoria:
+                pico = max(tracemalloc.get_traced_memory()[1], registro.pop('_pico'))
+                registro['Memória pico (MB)'] = (pico - registro.pop('_base')) / 2 ** 20
+                for externo in self._pilha:
+                    externo['_pico'] = max(externo['_pico'], pico)
+            else:
+                registro.pop('_base', None)
+                registro.pop('_pico', None)
+            if not self._pilha:
+                self.encerrar()
+            anterior = self._acumulados.get(nome) if acumular else None
+            if anterior is None:
+                self.registros.append(registro)
+                if acumular:
+                    self._acumulados[nome] = registro
+            else:
+                anterior['Tempo (s)'] += registro['Tempo (s)']
+                if registro['Linhas'] is not None:
+                    anterior['Linhas'] = (anterior['Linhas'] or 0) + registro['Linhas']
+                if 'Memória pico (MB)' in registro:
+                    anterior['Memória pico (MB)'] = max(anterior.get('Memória pico (MB)', 0),
+                                                        registro['Memória pico (MB)'])
+
+    def cronometrar(self, nome=None):
+        # Decorador: linhas = len() do resultado, quando houver
+        def decorar(funcao):
+            @wraps(funcao)
+            def executar(*args, **kwargs):
+                with self.etapa(nome or funcao.__name__) as registro:
+                    resultado = funcao(*args, **kwargs)
+                    if registro['Linhas'] is None and hasattr(resultado, '__len__'):
+                        registro['Linhas'] = len(resultado)
+                    return resultado
+            return executar
+        return decorar
+
+    def como_dataframe(self):
+        tabela = pd.DataFrame(self.registros).reindex(columns=COLUNAS_DIAGNOSTICO)
+        tabela['Linhas/s'] = tabela['Linhas'] / tabela['Tempo (s)']
+        return tabela
+
+    def exportar(self, destino):
+        # .json (lista de registros) ou .csv
+        destino = Path(destino)
+        tabela = self.como_dataframe()
+        if destino.suffix.lower() == '.json':
+            destino.write_text(tabela.to_json(orient='records', force_ascii=False, indent=2), encoding='utf-8')
+        else:
+            tabela.to_csv(destino, index=False)
+        return destino
+
+    def limpar(self):
+        self.registros = []
+        self._acumulados = {}
+
+
+# ===================
+# PERFILAMENTO (cProfile / pyinstrument)
+# ===================
+
+@contextmanager
+def perfilar(destino=None, modo='cprofile', linhas=40):
+    # Captura um perfil do bloco. Com destino: .prof (pstats binário), .html (pyinstrument)
+    # ou texto. O relatório em texto fica em resultado['relatorio'].
+    resultado = {'relatorio': None}
+    if modo == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError as erro:
+            raise ImportError("O modo pyinstrument requer o pacote pyinstrument (pip install pyinstrument)") from erro
+        perfil = Profiler()
+        perfil.start()
+        try:
+            yield resultado
+        finally:
+            perfil.stop()
+            resultado['relatorio'] = perfil.output_text()
+            if destino is not None:
+                destino = Path(destino)
+                conteudo = perfil.output_html() if destino.suffix.lower() == '.html' else resultado['relatorio']
+                destino.write_text(conteudo, encoding='utf-8')
+        return
+
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield resultado
+    finally:
+        perfil.disable()
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats('cumulative').print_stats(linhas)
+        resultado['relatorio'] = texto.getvalue()
+        if destino is not None:
+            destino = Path(destino)
+            if destino.suffix.lower() == '.prof':
+                perfil.dump_stats(destino)
+            else:
+                destino.write_text(resultado['relatorio'], encoding='utf-8')
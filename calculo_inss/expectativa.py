@@ -0,0 +1,106 @@
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .formulas import fator_previdenciario
+from .salarios import normalizar_salarios
+
+# Expectativa de sobrevida (Es) das tábuas completas de mortalidade do IBGE.
+#
+# As tábuas são convertidas uma única vez (construir_tabua) num array int16 denso
+# [ano - ANO_INICIAL, idade, sexo], em décimos de ano (o IBGE publica Es com uma casa
+# decimal, então a conversão é exata), gravado em .npy. Em tempo de execução o arquivo é
+# aberto com mmap: nenhum processo relê as tabelas do IBGE e os workers de um lote
+# compartilham as mesmas páginas de memória.
+#
+# Origem esperada (CSV): ano, idade, sexo, expectativa
+#   sexo: A/ambos, M/masculino, F/feminino   (o fator previdenciário usa "ambos")
+
+ANO_INICIAL = 1998  # primeira tábua aplicada ao fator previdenciário (Lei 9.876/99)
+IDADE_MAXIMA = 120
+AUSENTE = -1
+SEXOS = {'a': 0, 'ambos': 0, 'm': 1, 'masculino': 1, 'f': 2, 'feminino': 2}
+
+CAMINHO_PADRAO = Path(__file__).parent / 'dados' / 'tabua_es.npy'
+
+
+def caminho_tabua():
+    return Path(os.environ.get('CALCULO_INSS_TABUA_ES', CAMINHO_PADRAO))
+
+
+def codigo_sexo(sexo):
+    codigos = pd.Series(np.atleast_1d(sexo), dtype='string').str.strip().str.lower().map(SEXOS)
+    if codigos.isna().any():
+        raise ValueError(f"Sexo inválido na tábua: {sorted(set(np.atleast_1d(sexo)[codigos.isna().to_numpy()]))}")
+    return codigos.to_numpy(dtype=np.int64)
+
+
+def construir_tabua(origem, destino=None):
+    destino = Path(destino or caminho_tabua())
+    tabua = pd.read_csv(origem, dtype=str)
+    tabua.columns = [c.strip().lower() for c in tabua.columns]
+    faltando = [c for c in ('ano', 'idade', 'sexo', 'expectativa') if c not in tabua.columns]
+    if faltando:
+        raise ValueError(f"Tábua sem as colunas: {', '.join(faltando)}")
+
+    anos = tabua['ano'].astype(int).to_numpy()
+    idades = tabua['idade'].astype(int).to_numpy()
+    sexos = codigo_sexo(tabua['sexo'].to_numpy())
+    expectativas, rejeitados = normalizar_salarios(tabua['expectativa'])
+    if rejeitados.any() or anos.min() < ANO_INICIAL or idades.min() < 0 or idades.max() > IDADE_MAXIMA:
+        raise ValueError("Tábua com valores fora do domínio (ano, idade ou expectativa)")
+
+    denso = np.full((anos.max() - ANO_INICIAL + 1, IDADE_MAXIMA + 1, len(set(SEXOS.values()))), AUSENTE, dtype=np.int16)
+    denso[anos - ANO_INICIAL, idades, sexos] = np.rint(expectativas.to_numpy() * 10)
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    np.save(destino, denso)
+    carregar_tabua.cache_clear()
+    from .memo import tabelas_atualizadas
+    tabelas_atualizadas()
+    return destino
+
+
+@lru_cache(maxsize=4)
+def carregar_tabua(caminho=None):
+    caminho = Path(caminho or caminho_tabua())
+    if not caminho.exists():
+        raise FileNotFoundError(f"Tábua de expectativa de sobrevida não encontrada em {caminho}; "
+                                "gere-a com: python -m calculo_inss.expectativa <tabua_ibge.csv>")
+    return np.load(caminho, mmap_mode='r')
+
+
+def expectativa_sobrevida(ano, idade, sexo='ambos', tabua=None):
+    # Consulta vetorizada O(1) por elemento; combinações fora da tábua retornam NaN (grades
+    # de cenários). Parametros.expectativa recusa a combinação ausente com ValueError
+    tabua = carregar_tabua() if tabua is None else tabua
+    ano, idade = np.broadcast_arrays(np.asarray(ano, dtype=np.int64), np.floor(idade).astype(np.int64))
+    sexo = np.broadcast_to(codigo_sexo(sexo).reshape(np.shape(sexo) or ()), ano.shape)
+
+    i_ano = ano - ANO_INICIAL
+    dentro = (i_ano >= 0) & (i_ano < tabua.shape[0]) & (idade >= 0) & (idade < tabua.shape[1])
+    decimos = np.full(ano.shape, AUSENTE, dtype=np.int16)
+    decimos[dentro] = tabua[i_ano[dentro], idade[dentro], sexo[dentro]]
+    resultado = np.where(decimos == AUSENTE, np.nan, decimos / 10)
+    return resultado if resultado.ndim else resultado[()]
+
+
+def ano_tabua_vigente(ano_dib, mes_dib):
+    # A tábua do ano X é publicada em 1º de dezembro de X+1 e vale até novembro de X+2
+    ano_dib, mes_dib = np.asarray(ano_dib), np.asarray(mes_dib)
+    return np.where(mes_dib >= 12, ano_dib - 1, ano_dib - 2)
+
+
+def fator_previdenciario_ibge(Tc, a, Id, ano_tabua, sexo='ambos', tabua=None):
+    Es = expectativa_sobrevida(ano_tabua, Id, sexo, tabua)
+    return fator_previdenciario(Tc, a, Es, Id)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Uso: python -m calculo_inss.expectativa <tabua_ibge.csv> [destino.npy]")
+    print(construir_tabua(*sys.argv[1:]))
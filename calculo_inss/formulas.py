@@ -0,0 +1,64 @@
+import numpy as np
+
+# Fórmulas do benefício (Lei 9.876/99) sobre arrays NumPy.
+# Escalares e arrays são aceitos e combinados por broadcasting:
+#
+#   FP  = round((Tc * a / Es) * (1 + (Id + Tc * a) / 100), 4)
+#   SB  = round(média * FP, 2)
+#   RMI = round(SB * coef, 2)
+
+
+def _produto_exato(a, b):
+    # Erro de arredondamento de a * b (Dekker / Veltkamp), sem FMA
+    p = a * b
+    c = 134217729.0 * a
+    a_hi = c - (c - a)
+    a_lo = a - a_hi
+    c = 134217729.0 * b
+    b_hi = c - (c - b)
+    b_lo = b - b_hi
+    return ((a_hi * b_hi - p) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+
+
+def arredondar(valores, casas, meio_para_cima=False):
+    # Mesmo resultado do round() do Python, elemento a elemento: o round() arredonda o valor
+    # binário exato, então um "x.5" que só surge do produto por 10**casas é desempatado pelo
+    # erro desse produto; empates verdadeiros ficam com o par mais próximo (np.rint).
+    # Com meio_para_cima, empates verdadeiros se afastam do zero (regra das cartas do INSS).
+    valores = np.asarray(valores, dtype=np.float64)
+    escala = 10.0 ** casas
+    escalado = valores * escala
+    if meio_para_cima:
+        resultado = np.sign(escalado) * np.floor(np.abs(escalado) + 0.5)
+    else:
+        resultado = np.rint(escalado)
+
+    empate = (escalado - np.floor(escalado)) == 0.5
+    if empate.any():
+        erro = _produto_exato(valores, escala)
+        resultado = np.where(empate & (erro < 0), np.floor(escalado), resultado)
+        resultado = np.where(empate & (erro > 0), np.ceil(escalado), resultado)
+
+    resultado = resultado / escala
+    return resultado if resultado.ndim else resultado[()]
+
+
+def fator_previdenciario(Tc, a, Es, Id):
+    Tc, a, Es, Id = (np.asarray(v, dtype=np.float64) for v in (Tc, a, Es, Id))
+    return arredondar((Tc * a / Es) * (1 + ((Id + Tc * a) / 100)), 4)
+
+
+def salario_beneficio(media_salarios, FP):
+    return arredondar(np.asarray(media_salarios, dtype=np.float64) * FP, 2)
+
+
+def renda_mensal_inicial(salario_beneficio, coef=1.0):
+    return arredondar(np.asarray(salario_beneficio, dtype=np.float64) * coef, 2)
+
+
+def calcular_beneficio(media_salarios, Tc, a, Es, Id, coef=1.0):
+    # FP, SB e RMI de uma vez para todo o conjunto (carteira ou grade de cenários)
+    FP = fator_previdenciario(Tc, a, Es, Id)
+    SB = salario_beneficio(media_salarios, FP)
+    RMI = renda_mensal_inicial(SB, coef)
+    return FP, SB, RMI
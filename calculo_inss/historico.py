@@ -0,0 +1,157 @@
+import numpy as np
+
+from .colunar import FONTE_CARTA, FONTE_CNIS, FONTE_DESCONSIDERADOS
+from .competencias import para_yyyymm
+from .indices import fatores_correcao
+from .limites import limitar_centavos, limitar_salarios
+from .marcadores import DESCONSIDERADO as MARCADOR_DESCONSIDERADO, com_marcador, coluna_observacao, marcadores
+from .parametros import Parametros
+from .pipeline import indices_da_carta, normalizar_caso
+from .ponto_fixo import aplicar_indice_centavos, corrigir_centavos, para_centavos
+from .salarios import normalizar_salarios
+from .selecao import indices_80_maiores
+from .substituicao import calcular_substituicao, calcular_substituicao_centavos
+
+# Histórico de contribuição de um beneficiário em arrays paralelos, no lugar dos
+# vários DataFrames por caso (cnis_df, carta_df, desconsid_df, top_*, df_consolidado).
+#
+#   competencias  int32  YYYYMM
+#   centavos      int64  salário nominal em centavos
+#   flags         uint8  bits de fonte + DESCONSIDERADO
+#   indices       float64  Índice informado na Carta (1 nas demais fontes); sem DIB, todas
+#                          as fontes do mês são corrigidas pelo índice da Carta (indices_do_mes)
+#
+# São 21 bytes por competência, sem índice de DataFrame nem colunas object: 100 mil
+# beneficiários com ~300 competências cabem em ~630 MB.
+
+CNIS = 0x01
+CARTA = 0x02
+DESCONSIDERADOS = 0x04   # arquivo de salários desconsiderados
+DESCONSIDERADO = 0x08    # competência marcada como DESCONSIDERADO pelo INSS
+
+FONTES = CNIS | CARTA | DESCONSIDERADOS
+
+
+class HistoricoContribuicao:
+    __slots__ = ('competencias', 'centavos', 'flags', 'indices')
+
+    def __init__(self, competencias, centavos, flags, indices=None):
+        self.competencias = np.asarray(competencias, dtype=np.int32)
+        self.centavos = np.asarray(centavos, dtype=np.int64)
+        self.flags = np.asarray(flags, dtype=np.uint8)
+        self.indices = np.ones(len(self.centavos)) if indices is None else np.asarray(indices, dtype=np.float64)
+        if not len(self.competencias) == len(self.centavos) == len(self.flags) == len(self.indices):
+            raise ValueError("competencias, centavos, flags e indices precisam ter o mesmo tamanho")
+
+    @classmethod
+    def vazio(cls):
+        return cls(np.empty(0, np.int32), np.empty(0, np.int64), np.empty(0, np.uint8))
+
+    @classmethod
+    def de_salarios(cls, competencias, salarios, flags, indices=1.0):
+        # salarios em reais (float); centavos com arredondamento meio para cima
+        centavos = para_centavos(salarios)
+        return cls(para_yyyymm(competencias), centavos, np.broadcast_to(np.asarray(flags, dtype=np.uint8), centavos.shape),
+                   np.broadcast_to(np.asarray(indices, dtype=np.float64), centavos.shape))
+
+    @classmethod
+    def de_dataframes(cls, cnis_df, carta_df, desconsid_df):
+        # Layouts posicionais do pipeline; os DataFrames são descartados após a conversão
+        cnis_df, carta_df, desconsid_df = normalizar_caso(cnis_df, carta_df, desconsid_df)
+        marcados = com_marcador(marcadores(carta_df[coluna_observacao(carta_df)]), MARCADOR_DESCONSIDERADO)
+        return cls.mesclar([
+            cls.de_salarios(cnis_df[cnis_df.columns[0]], cnis_df[cnis_df.columns[1]], CNIS),
+            cls.de_salarios(carta_df[carta_df.columns[1]], carta_df[carta_df.columns[2]],
+                            np.where(marcados, CARTA | DESCONSIDERADO, CARTA),
+                            normalizar_salarios(carta_df[carta_df.columns[3]], milhar=False)[0].to_numpy()),
+            cls.de_salarios(desconsid_df[desconsid_df.columns[0]], desconsid_df[desconsid_df.columns[2]],
+                            DESCONSIDERADOS | DESCONSIDERADO),
+        ])
+
+    @classmethod
+    def de_colunas(cls, colunas):
+        # Colunas do formato colunar (colunar.ESQUEMA), sem o beneficiário
+        bits = np.zeros(3, dtype=np.uint8)
+        bits[[FONTE_CNIS, FONTE_CARTA, FONTE_DESCONSIDERADOS]] = [CNIS, CARTA, DESCONSIDERADOS]
+        flags = bits[colunas['fonte']] | np.where(colunas['desconsiderado'], DESCONSIDERADO, 0).astype(np.uint8)
+        return cls(colunas['competencia'], colunas['salario_centavos'], flags, colunas.get('indice'))
+
+    @classmethod
+    def mesclar(cls, historicos):
+        historicos = list(historicos)
+        if not historicos:
+            return cls.vazio()
+        return cls(np.concatenate([h.competencias for h in historicos]),
+                   np.concatenate([h.centavos for h in historicos]),
+                   np.concatenate([h.flags for h in historicos]),
+                   np.concatenate([h.indices for h in historicos]))
+
+    def __len__(self):
+        return len(self.centavos)
+
+    def __repr__(self):
+        return f'HistoricoContribuicao({len(self)} competências, {self.nbytes} bytes)'
+
+    @property
+    def nbytes(self):
+        return self.competencias.nbytes + self.centavos.nbytes + self.flags.nbytes + self.indices.nbytes
+
+    def _recorte(self, posicoes):
+        return HistoricoContribuicao(self.competencias[posicoes], self.centavos[posicoes], self.flags[posicoes],
+                                     self.indices[posicoes])
+
+    def filtrar(self, bits):
+        # Competências com qualquer um dos bits informados (ex.: CNIS | DESCONSIDERADOS)
+        return self._recorte((self.flags & bits) != 0)
+
+    def fontes(self):
+        # Códigos de fonte do formato colunar (FONTE_CNIS / FONTE_CARTA / FONTE_DESCONSIDERADOS)
+        return np.where(self.flags & CARTA, FONTE_CARTA,
+                        np.where(self.flags & DESCONSIDERADOS, FONTE_DESCONSIDERADOS, FONTE_CNIS)).astype(np.uint8)
+
+    def indices_do_mes(self):
+        # Índice da própria linha na Carta; nas demais fontes, o da Carta na mesma competência
+        da_carta = (self.flags & CARTA) != 0
+        return np.where(da_carta, self.indices, indices_da_carta(self.competencias, self.competencias[da_carta],
+                                                                 self.indices[da_carta]))
+
+    def valores(self, dib=None, limites=False):
+        # Salários em reais; com limites, entre o mínimo e o teto da competência; com a DIB
+        # (YYYYMM), corrigidos pela tabela local de índices, senão pelo Índice da Carta
+        valores = self.centavos / 100
+        if limites:
+            valores = limitar_salarios(valores, self.competencias)
+        if dib is None:
+            return valores * self.indices_do_mes()
+        fatores = fatores_correcao(self.competencias, dib)
+        sem_indice = np.isnan(fatores)
+        if sem_indice.any():
+            faltando = ', '.join(map(str, np.unique(self.competencias[sem_indice])[:5]))
+            raise ValueError(f"Competências sem índice de correção até {dib}: {faltando}")
+        return valores * fatores
+
+    def valores_centavos(self, dib=None, limites=False):
+        # Centavos int64; com a DIB, corrigidos em ponto fixo (calculo_inss.ponto_fixo), senão
+        # pelo Índice da Carta (índice inválido: 0, fora do cálculo)
+        centavos = limitar_centavos(self.centavos, self.competencias) if limites else self.centavos
+        if dib is None:
+            return aplicar_indice_centavos(centavos, self.indices_do_mes())
+        return corrigir_centavos(centavos, self.competencias, dib)
+
+    def maiores_80(self, dib=None):
+        # Seleção O(n) dos 80% maiores salários (corrigidos, se houver DIB), sem ordem definida
+        return self._recorte(indices_80_maiores(self.valores(dib)))
+
+    def ordenado(self):
+        return self._recorte(np.argsort(self.competencias, kind='stable'))
+
+    def calcular(self, parametros=None):
+        # Mesmo cálculo de pipeline.calcular_caso: um salário por competência (o maior
+        # entre as fontes) e os 80% maiores dessa base
+        parametros = parametros or Parametros()
+        if parametros.centavos:
+            return calcular_substituicao_centavos(self.competencias,
+                                                  self.valores_centavos(parametros.dib, parametros.limites),
+                                                  self.fontes(), parametros)
+        return calcular_substituicao(self.competencias, self.valores(parametros.dib, parametros.limites),
+                                     self.fontes(), parametros)
@@ -0,0 +1,178 @@
+import heapq
+
+from .formulas import fator_previdenciario, renda_mensal_inicial, salario_beneficio
+from .limites import limitar_beneficio, limitar_salarios
+from .parametros import Parametros
+from .pipeline import COLUNAS_RESULTADO
+from .selecao import n_80_maiores
+
+# Recalculo incremental da média dos 80% maiores quando uma competência é editada.
+#
+# Dois heaps com remoção preguiçosa: 'topo' (min-heap com os k maiores, k = 80% de n) e
+# 'resto' (max-heap com os demais), mais a soma corrente do topo. Inserir, remover ou
+# alterar um salário custa O(log n); média, SB e RMI saem na hora, com o FP calculado
+# uma vez por conjunto de parâmetros. A soma corrente é refeita do zero a cada
+# RESSOMA alterações para não acumular erro de ponto flutuante.
+#
+# Com parametros.limites, cada salário inserido ou alterado fica entre o mínimo e o teto
+# da sua competência (a chave, 'MM/AAAA' ou YYYYMM), como os salários do pipeline; os
+# valores iniciais já chegam limitados. Os valores do motor estão corrigidos: o limite
+# vale para o nominal (valor / fator da competência, ver pipeline.fatores_do_caso) e o
+# fator é reaplicado depois. Sem fator informado, o valor é tomado como nominal.
+
+TOPO = 0
+RESTO = 1
+RESSOMA = 1024
+
+
+class MotorIncremental:
+    __slots__ = ('parametros', '_fatores', '_FP', '_vivos', '_topo', '_resto', '_n_topo', '_soma', '_seq', '_alteracoes')
+
+    def __init__(self, valores=None, parametros=None, fatores=None):
+        # valores: {chave (ex.: competência): salário corrigido}; fatores: {chave: fator de correção}
+        self.parametros = parametros or Parametros()
+        self._fatores = dict(fatores or {})
+        self._FP = None
+        self._vivos = {}
+        self._topo = []
+        self._resto = []
+        self._n_topo = 0
+        self._soma = 0.0
+        self._seq = 0
+        self._alteracoes = 0
+        for chave, valor in (valores or {}).items():
+            self._vivos[chave] = [float(valor), self._proximo(), RESTO]
+        self._resto = [(-v, s, c) for c, (v, s, _) in self._vivos.items()]
+        heapq.heapify(self._resto)
+        self._equilibrar()
+
+    def _proximo(self):
+        self._seq += 1
+        return self._seq
+
+    def _limpar(self, heap, local):
+        # Descarta do topo do heap as entradas removidas ou já movidas
+        while heap:
+            _, seq, chave = heap[0]
+            entrada = self._vivos.get(chave)
+            if entrada is not None and entrada[1] == seq and entrada[2] == local:
+                return
+            heapq.heappop(heap)
+
+    def _mover(self, chave, local):
+        entrada = self._vivos[chave]
+        entrada[1], entrada[2] = self._proximo(), local
+        if local == TOPO:
+            heapq.heappush(self._topo, (entrada[0], entrada[1], chave))
+            self._n_topo += 1
+            self._soma += entrada[0]
+        else:
+            heapq.heappush(self._resto, (-entrada[0], entrada[1], chave))
+
+    def _tirar_do_topo(self):
+        self._limpar(self._topo, TOPO)
+        valor, _, chave = heapq.heappop(self._topo)
+        self._n_topo -= 1
+        self._soma -= valor
+        self._mover(chave, RESTO)
+
+    def _tirar_do_resto(self):
+        self._limpar(self._resto, RESTO)
+        _, _, chave = heapq.heappop(self._resto)
+        self._mover(chave, TOPO)
+
+    def _equilibrar(self):
+        k = n_80_maiores(len(self._vivos))
+        while self._n_topo > k:
+            self._tirar_do_topo()
+        while self._n_topo < k:
+            self._tirar_do_resto()
+        # Troca enquanto o maior do resto superar o menor do topo
+        while self._n_topo:
+            self._limpar(self._topo, TOPO)
+            self._limpar(self._resto, RESTO)
+            if not self._resto or -self._resto[0][0] <= self._topo[0][0]:
+                break
+            self._tirar_do_topo()
+            self._tirar_do_resto()
+
+    def _alterado(self):
+        self._alteracoes += 1
+        if self._alteracoes % RESSOMA == 0:
+            self._soma = sum(v for v, _, local in self._vivos.values() if local == TOPO)
+        # Entradas obsoletas se acumulam com a remoção preguiçosa: reconstrói os heaps
+        # quando passam do dobro das vivas
+        if len(self._topo) + len(self._resto) > 2 * len(self._vivos) + 64:
+            self._topo = [(v, s, c) for c, (v, s, local) in self._vivos.items() if local == TOPO]
+            self._resto = [(-v, s, c) for c, (v, s, local) in self._vivos.items() if local == RESTO]
+            heapq.heapify(self._topo)
+            heapq.heapify(self._resto)
+
+    # ===================
+    # EDIÇÃO
+    # ===================
+
+    def inserir(self, chave, valor):
+        if chave in self._vivos:
+            raise KeyError(f"Competência já presente: {chave}")
+        if self.parametros.limites:
+            fator = self._fatores.get(chave, 1.0)
+            valor = float(limitar_salarios([valor / fator], [chave])[0]) * fator
+        self._vivos[chave] = [float(valor), 0, None]
+        self._limpar(self._topo, TOPO)
+        self._mover(chave, TOPO if self._topo and valor >= self._topo[0][0] else RESTO)
+        self._equilibrar()
+        self._alterado()
+
+    def remover(self, chave):
+        valor, _, local = self._vivos.pop(chave)
+        if local == TOPO:
+            self._n_topo -= 1
+            self._soma -= valor
+        self._equilibrar()
+        self._alterado()
+
+    def atualizar(self, chave, valor):
+        if chave in self._vivos:
+            self.remover(chave)
+        self.inserir(chave, valor)
+
+    def definir_parametros(self, parametros):
+        self.parametros = parametros
+        self._FP = None
+
+    # ===================
+    # CONSULTA
+    # ===================
+
+    def __len__(self):
+        return len(self._vivos)
+
+    def __contains__(self, chave):
+        return chave in self._vivos
+
+    def valor(self, chave):
+        return self._vivos[chave][0]
+
+    def selecionado(self, chave):
+        return self._vivos[chave][2] == TOPO
+
+    @property
+    def FP(self):
+        if self._FP is None:
+            p = self.parametros
+            self._FP = float(fator_previdenciario(p.Tc, p.a, p.expectativa(), p.Id))
+        return self._FP
+
+    def media(self):
+        return self._soma / self._n_topo if self._n_topo else float('nan')
+
+    def resultado(self):
+        # Mesmas fórmulas do pipeline (calculo_inss.formulas), sobre escalares
+        media = self.media()
+        salario_benef = float(salario_beneficio(media, self.FP))
+        renda_inicial = float(renda_mensal_inicial(salario_benef, self.parametros.coef))
+        if self.parametros.limites:
+            salario_benef, renda_inicial = (float(v) for v in limitar_beneficio(salario_benef, renda_inicial,
+                                                                                self.parametros.dib))
+        return dict(zip(COLUNAS_RESULTADO, [media, self.FP, salario_benef, renda_inicial]))
@@ -0,0 +1,124 @@
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .competencias import indice_mensal, para_yyyymm
+from .salarios import normalizar_salarios
+
+# Correção monetária dos salários de contribuição com séries mensais locais.
+#
+# Origem esperada (CSV): competencia, serie, variacao   (variação mensal em %)
+# As séries (INPC, IPCA-E, TR, IRSM, URV, ...) são encadeadas conforme o período de
+# vigência de cada índice (CADEIA_SALARIOS) e o produto acumulado da cadeia é
+# pré-calculado uma única vez:
+#
+#   acumulado[i] = prod(1 + variacao[j]) para j < i
+#   fator(competência c, data-alvo t) = acumulado[t] / acumulado[c]
+#
+# ou seja, aplica a variação dos meses c .. t-1. Qualquer par (competência, alvo)
+# custa uma divisão, e corrigir um histórico inteiro é um único gather vetorizado.
+# Trocas de moeda (Cruzado, Cruzeiro Real, URV...) entram como variação do mês da troca.
+
+# (início da vigência YYYYMM, série) — Lei 8.213/91, Art. 31 e alterações posteriores
+CADEIA_SALARIOS = (
+    (196401, 'ORTN'),
+    (198603, 'OTN'),
+    (198902, 'BTN'),
+    (199103, 'INPC'),
+    (199301, 'IRSM'),
+    (199403, 'URV'),
+    (199407, 'IPC-r'),
+    (199507, 'INPC'),
+    (199605, 'IGP-DI'),
+    (200403, 'INPC'),
+)
+
+CAMINHO_PADRAO = Path(__file__).parent / 'dados' / 'indices.npz'
+
+
+def caminho_indices():
+    return Path(os.environ.get('CALCULO_INSS_INDICES', CAMINHO_PADRAO))
+
+
+def encadear(series, cadeia=CADEIA_SALARIOS):
+    # series: {nome: pd.Series de variações (fração) indexada por índice mensal}
+    inicio = min(s.index.min() for s in series.values())
+    fim = max(s.index.max() for s in series.values())
+    meses = np.arange(inicio, fim + 1)
+    variacao = np.full(len(meses), np.nan)
+
+    vigencias = indice_mensal([c[0] for c in cadeia])
+    periodo = np.searchsorted(vigencias, meses, side='right') - 1
+    for i, (_, nome) in enumerate(cadeia):
+        if nome not in series:
+            continue
+        no_periodo = periodo == i
+        variacao[no_periodo] = series[nome].reindex(meses[no_periodo]).to_numpy()
+
+    # Meses sem índice publicado não corrigem (variação zero) mas ficam marcados
+    ausente = np.isnan(variacao)
+    acumulado = np.concatenate([[1.0], np.cumprod(1.0 + np.where(ausente, 0.0, variacao))])
+    return inicio, acumulado, ausente
+
+
+def construir_indices(origem, destino=None, cadeia=CADEIA_SALARIOS):
+    destino = Path(destino or caminho_indices())
+    tabela = pd.read_csv(origem, dtype=str)
+    tabela.columns = [c.strip().lower() for c in tabela.columns]
+    faltando = [c for c in ('competencia', 'serie', 'variacao') if c not in tabela.columns]
+    if faltando:
+        raise ValueError(f"Tabela de índices sem as colunas: {', '.join(faltando)}")
+
+    meses = indice_mensal(para_yyyymm(tabela['competencia']))
+    variacoes, rejeitados = normalizar_salarios(tabela['variacao'])
+    if rejeitados.any() or (meses < 0).any():
+        raise ValueError("Tabela de índices com competência ou variação inválida")
+
+    tabela = tabela.assign(mes=meses, variacao=variacoes.to_numpy() / 100)
+    series = {nome.strip().upper(): grupo.set_index('mes')['variacao'].sort_index()
+              for nome, grupo in tabela.groupby('serie')}
+    inicio, acumulado, ausente = encadear(series, tuple((v, n.upper()) for v, n in cadeia))
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(destino, mes_inicial=np.int64(inicio), acumulado=acumulado, ausente=ausente,
+             **{f'serie:{nome}': np.column_stack([s.index.to_numpy(), s.to_numpy()]) for nome, s in series.items()})
+    carregar_indices.cache_clear()
+    from .memo import tabelas_atualizadas
+    tabelas_atualizadas()
+    return destino
+
+
+@lru_cache(maxsize=4)
+def carregar_indices(caminho=None):
+    caminho = Path(caminho or caminho_indices())
+    if not caminho.exists():
+        raise FileNotFoundError(f"Tabela de índices de correção não encontrada em {caminho}; "
+                                "gere-a com: python -m calculo_inss.indices <indices.csv>")
+    with np.load(caminho) as arquivo:
+        return int(arquivo['mes_inicial']), arquivo['acumulado'], arquivo['ausente']
+
+
+def fatores_correcao(competencias, alvo, tabela=None):
+    # competencias e alvo em YYYYMM; fora do período coberto o fator é NaN
+    mes_inicial, acumulado, _ = carregar_indices() if tabela is None else tabela
+    origem = indice_mensal(competencias) - mes_inicial
+    destino = np.broadcast_to(indice_mensal(alvo) - mes_inicial, origem.shape)
+
+    validos = (origem >= 0) & (destino >= origem) & (destino < len(acumulado)) & (np.asarray(competencias) > 0)
+    fatores = np.full(origem.shape, np.nan)
+    fatores[validos] = acumulado[destino[validos]] / acumulado[origem[validos]]
+    return fatores
+
+
+def corrigir_salarios(salarios, competencias, alvo, tabela=None):
+    return np.asarray(salarios, dtype=np.float64) * fatores_correcao(competencias, alvo, tabela)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Uso: python -m calculo_inss.indices <indices.csv> [destino.npz]")
+    print(construir_indices(*sys.argv[1:]))
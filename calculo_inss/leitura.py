@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from .salarios import normalizar_salarios
+
+# Leitura em fluxo de extratos com vários beneficiários (CNIS / Carta / Desconsiderados
+# em massa). O arquivo é lido em blocos (chunksize), só com as colunas necessárias e
+# tipos explícitos, e reagrupado por beneficiário sem nunca carregar o arquivo inteiro:
+# a memória usada é a de um bloco mais o beneficiário que atravessa a fronteira do bloco.
+#
+# Os extratos devem vir agrupados e ordenados pela coluna identificadora (NIT/CPF),
+# como saem das extrações em massa; um beneficiário fora de ordem gera ValueError.
+#
+# Cada bloco é convertido uma vez para tipos compactos antes de ser repartido:
+#   valor / fator     float64 (pt-BR ou en-US; inválidos viram NaN e limpar_dados os descarta)
+#   competência       category (texto original preservado; cada mês distinto é
+#                     interpretado uma vez por para_yyyymm)
+#   texto             category (observações e marcadores)
+#   inteiro           Int32
+
+COLUNA_ID = 'NIT'
+TAMANHO_BLOCO = 200_000
+
+# Colunas usadas de cada extrato, pela posição depois da coluna id (layouts do pipeline);
+# colunas além dessas não são lidas
+LAYOUT_CNIS = ('competencia', 'valor')
+LAYOUT_CARTA = ('inteiro', 'competencia', 'valor', 'fator', 'valor', 'texto')
+LAYOUT_DESCONSIDERADOS = ('competencia', 'texto', 'valor')
+
+
+def ler_em_blocos(caminho, coluna_id=COLUNA_ID, colunas=None, tamanho_bloco=TAMANHO_BLOCO, **opcoes):
+    # Lido como texto (dtype 'string'): evita a inferência de tipos bloco a bloco, que
+    # pode divergir entre blocos; a conversão para tipos compactos é feita por compactar
+    if colunas is not None and coluna_id not in colunas:
+        colunas = [coluna_id] + list(colunas)
+    return pd.read_csv(caminho, usecols=colunas, dtype='string', chunksize=tamanho_bloco, **opcoes)
+
+
+def colunas_do_layout(caminho, layout, coluna_id=COLUNA_ID):
+    # {coluna: tipo} das colunas usadas, pela posição depois da coluna id
+    colunas = [c for c in pd.read_csv(caminho, nrows=0).columns if c != coluna_id]
+    return dict(zip(colunas, layout))
+
+
+def compactar(bloco, tipos):
+    # Conversão vetorizada do bloco inteiro (texto -> tipos compactos), uma vez por bloco
+    convertido = {}
+    for coluna, tipo in tipos.items():
+        if tipo in ('valor', 'fator'):
+            convertido[coluna], _ = normalizar_salarios(bloco[coluna], milhar=tipo == 'valor')
+        elif tipo == 'inteiro':
+            convertido[coluna] = pd.to_numeric(bloco[coluna], errors='coerce').astype('Int32')
+        else:
+            convertido[coluna] = bloco[coluna].astype('category')
+    return bloco.assign(**convertido)
+
+
+def agrupar_por_beneficiario(blocos, coluna_id=COLUNA_ID, tipos=None):
+    # Gera (id, DataFrame do beneficiário sem a coluna id), na ordem do arquivo.
+    # Com tipos ({coluna: tipo}), cada bloco é compactado antes de ser repartido.
+    pendente = None
+    anterior = None
+
+    for bloco in blocos:
+        if pendente is not None:
+            bloco = pd.concat([pendente, bloco], ignore_index=True)
+        compacto = bloco if tipos is None else compactar(bloco, tipos)
+        ids = bloco[coluna_id].fillna('').str.strip().to_numpy(dtype=object)
+        inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=np.int64)
+
+        # O último grupo do bloco pode continuar no próximo (guardado ainda como texto,
+        # para ser compactado junto com o bloco seguinte)
+        for inicio, fim in zip(inicios[:-1], inicios[1:]):
+            anterior = _verificar_ordem(anterior, ids[inicio])
+            yield ids[inicio], compacto.iloc[inicio:fim].drop(columns=coluna_id).reset_index(drop=True)
+        pendente = bloco.iloc[inicios[-1]:] if len(inicios) else None
+
+    if pendente is not None and len(pendente):
+        ultimo = pendente[coluna_id].fillna('').str.strip().iat[0]
+        _verificar_ordem(anterior, ultimo)
+        pendente = pendente if tipos is None else compactar(pendente, tipos)
+        yield ultimo, pendente.drop(columns=coluna_id).reset_index(drop=True)
+
+
+def _verificar_ordem(anterior, atual):
+    if anterior is not None and atual <= anterior:
+        raise ValueError(f"Extrato fora de ordem: beneficiário {atual!r} aparece depois de {anterior!r}")
+    return atual
+
+
+def casos_de_extratos(cnis, carta, desconsiderados, coluna_id=COLUNA_ID, tamanho_bloco=TAMANHO_BLOCO):
+    # Junção por intercalação (merge-join) dos três extratos ordenados pelo id.
+    # Gera (id, cnis_df, carta_df, desconsid_df); quem não aparece num extrato recebe
+    # um DataFrame vazio com as colunas daquele extrato.
+    extratos = list(zip((cnis, carta, desconsiderados), (LAYOUT_CNIS, LAYOUT_CARTA, LAYOUT_DESCONSIDERADOS)))
+    tipos = [colunas_do_layout(c, layout, coluna_id) for c, layout in extratos]
+    fluxos = [agrupar_por_beneficiario(ler_em_blocos(c, coluna_id, list(t), tamanho_bloco), coluna_id, t)
+              for (c, _), t in zip(extratos, tipos)]
+    vazios = [compactar(pd.read_csv(c, usecols=list(t), nrows=0, dtype='string'), t) for (c, _), t in zip(extratos, tipos)]
+    atuais = [next(fluxo, None) for fluxo in fluxos]
+
+    while any(atual is not None for atual in atuais):
+        id_atual = min(atual[0] for atual in atuais if atual is not None)
+        frames = []
+        for i, atual in enumerate(atuais):
+            if atual is not None and atual[0] == id_atual:
+                frames.append(atual[1])
+                atuais[i] = next(fluxos[i], None)
+            else:
+                frames.append(vazios[i])
+        yield (id_atual, *frames)
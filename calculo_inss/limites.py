@@ -0,0 +1,122 @@
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .competencias import indice_mensal, para_yyyymm
+from .salarios import normalizar_salarios
+
+# Limites do salário de contribuição e do benefício: teto do RGPS e salário mínimo.
+#
+# Origem esperada (CSV): competencia, teto, minimo   (valores na moeda da época)
+# Basta uma linha por mudança de valor: a tabela é expandida uma única vez para um
+# array mensal denso (valor vigente repetido até a mudança seguinte), em centavos, e
+# gravada em .npz. Limitar um histórico ou uma carteira inteira é um gather pelo índice
+# mensal seguido de np.clip, sem laço nem desvio por caso:
+#
+#   salário de contribuição   entre o mínimo e o teto da própria competência
+#                             (antes da correção monetária: Lei 8.212/91, art. 28)
+#   SB e RMI                  entre o mínimo e o teto vigentes na DIB
+#                             (Lei 8.213/91, arts. 29 §2º e 33)
+#
+# Competências anteriores à tabela (ou inválidas) ficam sem limite; posteriores usam
+# os últimos valores da tabela. Sem DIB, SB e RMI usam os últimos valores.
+
+CAMINHO_PADRAO = Path(__file__).parent / 'dados' / 'limites.npz'
+SEM_TETO = np.iinfo(np.int64).max
+
+
+def caminho_limites():
+    return Path(os.environ.get('CALCULO_INSS_LIMITES', CAMINHO_PADRAO))
+
+
+def construir_limites(origem, destino=None):
+    destino = Path(destino or caminho_limites())
+    tabela = pd.read_csv(origem, dtype=str)
+    tabela.columns = [c.strip().lower() for c in tabela.columns]
+    faltando = [c for c in ('competencia', 'teto', 'minimo') if c not in tabela.columns]
+    if faltando:
+        raise ValueError(f"Tabela de limites sem as colunas: {', '.join(faltando)}")
+
+    competencias = para_yyyymm(tabela['competencia'])
+    teto, rejeitados_teto = normalizar_salarios(tabela['teto'])
+    minimo, rejeitados_minimo = normalizar_salarios(tabela['minimo'])
+    if (competencias == 0).any() or rejeitados_teto.any() or rejeitados_minimo.any():
+        raise ValueError("Tabela de limites com competência ou valor inválido")
+    if (minimo.to_numpy() > teto.to_numpy()).any():
+        raise ValueError("Tabela de limites com salário mínimo acima do teto")
+
+    # Última linha de cada competência vale; meses sem linha herdam a mudança anterior
+    meses = indice_mensal(competencias)
+    ordem = np.argsort(meses, kind='stable')
+    meses = meses[ordem]
+    ultimas = np.r_[meses[1:] != meses[:-1], True]
+    meses = meses[ultimas]
+    inicio = meses[0]
+    vigente = np.searchsorted(meses - inicio, np.arange(meses[-1] - inicio + 1), side='right') - 1
+
+    from .ponto_fixo import para_centavos
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(destino, mes_inicial=np.int64(inicio),
+             teto=para_centavos(teto.to_numpy()[ordem][ultimas])[vigente],
+             minimo=para_centavos(minimo.to_numpy()[ordem][ultimas])[vigente])
+    carregar_limites.cache_clear()
+    from .memo import tabelas_atualizadas
+    tabelas_atualizadas()
+    return destino
+
+
+@lru_cache(maxsize=4)
+def carregar_limites(caminho=None):
+    caminho = Path(caminho or caminho_limites())
+    if not caminho.exists():
+        raise FileNotFoundError(f"Tabela de teto e salário mínimo não encontrada em {caminho}; "
+                                "gere-a com: python -m calculo_inss.limites <limites.csv>")
+    with np.load(caminho) as arquivo:
+        return int(arquivo['mes_inicial']), arquivo['teto'], arquivo['minimo']
+
+
+def limites_centavos(competencias, tabela=None):
+    # (teto, mínimo) em centavos por competência YYYYMM (ou texto); None = últimos valores
+    mes_inicial, teto, minimo = carregar_limites() if tabela is None else tabela
+    if competencias is None:
+        return teto[-1], minimo[-1]
+    competencias = np.asarray(competencias)
+    if competencias.dtype.kind not in 'iu':
+        competencias = para_yyyymm(competencias)
+    posicoes = indice_mensal(competencias) - mes_inicial
+    cobertas = (posicoes >= 0) & (competencias > 0)
+    posicoes = np.clip(posicoes, 0, len(teto) - 1)
+    return np.where(cobertas, teto[posicoes], SEM_TETO), np.where(cobertas, minimo[posicoes], 0)
+
+
+def limites_vigentes(competencias, tabela=None):
+    # (teto, mínimo) em reais; sem limite o teto é infinito
+    teto, minimo = limites_centavos(competencias, tabela)
+    return np.where(teto == SEM_TETO, np.inf, teto / 100), minimo / 100
+
+
+def limitar_salarios(salarios, competencias, tabela=None):
+    teto, minimo = limites_vigentes(competencias, tabela)
+    return np.clip(np.asarray(salarios, dtype=np.float64), minimo, teto)
+
+
+def limitar_centavos(centavos, competencias, tabela=None):
+    teto, minimo = limites_centavos(competencias, tabela)
+    return np.clip(np.asarray(centavos, dtype=np.int64), minimo, teto)
+
+
+def limitar_beneficio(SB, RMI, dib=None, tabela=None, centavos=False):
+    # SB e RMI entre o mínimo e o teto da DIB. dib pode ser um array (uma DIB por
+    # beneficiário ou por cenário): a carteira inteira é limitada numa chamada.
+    teto, minimo = (limites_centavos if centavos else limites_vigentes)(dib, tabela)
+    return np.clip(SB, minimo, teto), np.clip(RMI, minimo, teto)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Uso: python -m calculo_inss.limites <limites.csv> [destino.npz]")
+    print(construir_limites(*sys.argv[1:]))
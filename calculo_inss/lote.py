@@ -0,0 +1,261 @@
+import argparse
+import sys
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from .diagnostico import Diagnostico, perfilar
+from .leitura import COLUNA_ID, TAMANHO_BLOCO, casos_de_extratos
+from .memo import ArmazemResultados, calcular_caso_com_memo
+from .parametros import Parametros
+from .pipeline import COLUNAS_RESULTADO, calcular_caso
+
+# Execução em lote: um caso = um trio de arquivos CNIS / Carta / Desconsiderados.
+#
+# Layouts aceitos:
+#   diretorio/<caso>/cnis.csv, carta.csv, desconsiderados.csv
+#   diretorio/<caso>_cnis.csv, <caso>_carta.csv, <caso>_desconsiderados.csv
+#   manifesto CSV com as colunas caso, cnis, carta, desconsiderados
+#   três extratos com vários beneficiários (coluna NIT/CPF), lidos em fluxo (leitura.py)
+#   carteira já normalizada em Parquet (colunar.py)
+
+ARQUIVOS = ('cnis', 'carta', 'desconsiderados')
+
+
+def _caso(nome, cnis, carta, desconsiderados):
+    return {'caso': str(nome), 'cnis': Path(cnis), 'carta': Path(carta), 'desconsiderados': Path(desconsiderados)}
+
+
+def descobrir_casos(diretorio):
+    diretorio = Path(diretorio)
+    casos = []
+
+    for sub in sorted(p for p in diretorio.iterdir() if p.is_dir()):
+        caminhos = [sub / f'{nome}.csv' for nome in ARQUIVOS]
+        if all(c.exists() for c in caminhos):
+            casos.append(_caso(sub.name, *caminhos))
+
+    for cnis in sorted(diretorio.glob('*_cnis.csv')):
+        prefixo = cnis.name[:-len('_cnis.csv')]
+        caminhos = [diretorio / f'{prefixo}_{nome}.csv' for nome in ARQUIVOS]
+        if all(c.exists() for c in caminhos):
+            casos.append(_caso(prefixo, *caminhos))
+
+    return casos
+
+
+def ler_manifesto(caminho):
+    caminho = Path(caminho)
+    manifesto = pd.read_csv(caminho, dtype=str)
+    faltando = [c for c in ('caso',) + ARQUIVOS if c not in manifesto.columns]
+    if faltando:
+        raise ValueError(f"Manifesto sem as colunas: {', '.join(faltando)}")
+    # Caminhos relativos são resolvidos a partir da pasta do manifesto
+    base = caminho.parent
+    return [_caso(linha.caso, *(base / getattr(linha, nome) for nome in ARQUIVOS))
+            for linha in manifesto.itertuples(index=False)]
+
+
+def calcular_isolado(nome, cnis_df, carta_df, desconsid_df, parametros=None, armazem=None, diagnostico=None):
+    # Falhas ficam isoladas no próprio caso (coluna 'Erro').
+    # Com um ArmazemResultados, casos já calculados voltam direto do disco.
+    resultado = {'Caso': nome}
+    try:
+        if armazem is None:
+            resultado.update(calcular_caso(cnis_df, carta_df, desconsid_df, parametros, diagnostico))
+        else:
+            resultado.update(calcular_caso_com_memo(cnis_df, carta_df, desconsid_df, parametros or Parametros(), armazem))
+        resultado['Erro'] = None
+    except Exception as erro:
+        resultado.update(dict.fromkeys(COLUNAS_RESULTADO))
+        resultado['Erro'] = f'{type(erro).__name__}: {erro}'
+    return resultado
+
+
+def processar_caso(caso, parametros=None, armazem=None, diagnostico=None):
+    try:
+        frames = [pd.read_csv(caso[nome]) for nome in ARQUIVOS]
+    except Exception as erro:
+        resultado = {'Caso': caso['caso'], **dict.fromkeys(COLUNAS_RESULTADO)}
+        resultado['Erro'] = f'{type(erro).__name__}: {erro}'
+        return resultado
+    return calcular_isolado(caso['caso'], *frames, parametros, armazem, diagnostico)
+
+
+def processar_extrato(caso, parametros=None, armazem=None, diagnostico=None):
+    # caso = (id, cnis_df, carta_df, desconsid_df), como gerado por casos_de_extratos
+    return calcular_isolado(*caso, parametros, armazem, diagnostico)
+
+
+def processar_historico(caso, parametros=None, armazem=None):
+    # caso = (beneficiario, colunas NumPy), como gerado por colunar.casos_de_parquet.
+    # O formato já normalizado dispensa o memo: o cálculo parte direto dos arrays.
+    from .colunar import calcular_historico
+    nome, colunas = caso
+    resultado = {'Caso': str(nome)}
+    try:
+        resultado.update(calcular_historico(colunas, parametros))
+        resultado['Erro'] = None
+    except Exception as erro:
+        resultado.update(dict.fromkeys(COLUNAS_RESULTADO))
+        resultado['Erro'] = f'{type(erro).__name__}: {erro}'
+    return resultado
+
+
+def processar_lote(casos, parametros=None, armazem=None, processar=processar_caso):
+    parametros = parametros or Parametros()
+    linhas = [processar(caso, parametros, armazem) for caso in casos]
+    return pd.DataFrame(linhas, columns=['Caso'] + COLUNAS_RESULTADO + ['Erro'])
+
+
+def exportar_resultados(resultados, destino):
+    destino = Path(destino)
+    if destino.suffix.lower() == '.parquet':
+        resultados.to_parquet(destino, index=False)
+    else:
+        resultados.to_csv(destino, index=False)
+    return destino
+
+
+def gravar_em_fluxo(casos, processar, escritor):
+    # Repassa os casos ao cálculo gravando o histórico normalizado de cada um: uma única
+    # passada pela origem, sem materializar a carteira. Falhas ficam isoladas no caso,
+    # que fica fora do Parquet (o cálculo registra o erro na coluna 'Erro').
+    from .colunar import normalizar_historico
+    for caso in casos:
+        nome = caso['caso'] if processar is processar_caso else caso[0]
+        try:
+            if processar is processar_caso:
+                frames = [pd.read_csv(caso[arquivo]) for arquivo in ARQUIVOS]
+            else:
+                frames = [f.copy() for f in caso[1:]]
+            escritor.acrescentar(normalizar_historico(nome, *frames))
+        except Exception as erro:
+            print(f"Caso {nome} fora do Parquet: {type(erro).__name__}: {erro}", file=sys.stderr)
+        yield caso
+
+
+def gravar_carteira(casos, processar, destino):
+    from .colunar import EscritorParquet
+    with EscritorParquet(destino) as escritor:
+        for _ in gravar_em_fluxo(casos, processar, escritor):
+            pass
+    return destino
+
+
+# ===================
+# LINHA DE COMANDO
+# ===================
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Cálculo previdenciário em lote (CNIS + Carta + Desconsiderados)")
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument('--diretorio', help="Pasta com os arquivos dos casos")
+    origem.add_argument('--manifesto', help="CSV com as colunas caso, cnis, carta, desconsiderados")
+    origem.add_argument('--extratos', nargs=3, metavar=('CNIS', 'CARTA', 'DESCONSIDERADOS'),
+                        help="Extratos com vários beneficiários, ordenados pela coluna --coluna-id (leitura em fluxo)")
+    origem.add_argument('--parquet', help="Carteira normalizada em Parquet (ver --gravar-parquet)")
+    parser.add_argument('--coluna-id', default=COLUNA_ID, help="Coluna identificadora do beneficiário nos extratos")
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help="Linhas lidas por bloco nos extratos")
+    parser.add_argument('--gravar-parquet', default=None,
+                        help="Grava também os históricos normalizados em Parquet (origens --diretorio, --manifesto ou --extratos)")
+    parser.add_argument('--saida', required=True, help="Arquivo de resultado (.csv ou .parquet)")
+    parser.add_argument('--Tc', type=float, default=Parametros.Tc, help="Tempo de contribuição (anos)")
+    parser.add_argument('--a', type=float, default=Parametros.a, help="Alíquota")
+    parser.add_argument('--Es', type=float, default=Parametros.Es, help="Expectativa de sobrevida (anos)")
+    parser.add_argument('--Id', type=float, default=Parametros.Id, help="Idade do segurado (anos)")
+    parser.add_argument('--ano-tabua', type=int, default=None, help="Ano da tábua IBGE para obter Es (substitui --Es)")
+    parser.add_argument('--sexo', default=Parametros.sexo, help="Sexo na tábua IBGE (ambos, masculino, feminino)")
+    parser.add_argument('--coef', type=float, default=Parametros.coef, help="Coeficiente da RMI")
+    parser.add_argument('--dib', type=int, default=None, help="DIB (AAAAMM): corrige todos os salários pela tabela local de índices")
+    parser.add_argument('--centavos', action='store_true',
+                        help="Modo exato em centavos inteiros (arredondamento meio para cima)")
+    parser.add_argument('--limites', action='store_true',
+                        help="Limita salários, SB e RMI ao teto e ao salário mínimo (tabela local de limites)")
+    parser.add_argument('--memo', nargs='?', const='', default=None,
+                        help="Reaproveita resultados já calculados (SQLite; padrão em ~/.cache/calculo_inss)")
+    parser.add_argument('--diagnostico', default=None,
+                        help="Grava tempo, linhas e pico de memória de cada etapa (.json ou .csv)")
+    parser.add_argument('--perfil', default=None, help="Grava um perfil da execução (.prof, .txt ou .html)")
+    parser.add_argument('--perfil-modo', choices=('cprofile', 'pyinstrument'), default='cprofile',
+                        help="Perfilador usado com --perfil")
+    parser.add_argument('--workers', type=int, default=1, help="Processos em paralelo (0 = todos os núcleos)")
+    parser.add_argument('--chunksize', type=int, default=None, help="Casos por unidade de trabalho enviada a cada processo")
+    return parser.parse_args(argv)
+
+
+def _executar(args, diagnostico):
+    with diagnostico.etapa('Descoberta dos casos') as registro:
+        if args.parquet:
+            from .colunar import casos_de_parquet
+            casos = casos_de_parquet(args.parquet)
+            processar = processar_historico
+        elif args.extratos:
+            casos = casos_de_extratos(*args.extratos, coluna_id=args.coluna_id, tamanho_bloco=args.bloco)
+            processar = processar_extrato
+        else:
+            casos = descobrir_casos(args.diretorio) if args.diretorio else ler_manifesto(args.manifesto)
+            processar = processar_caso
+            registro['Linhas'] = len(casos)
+    parametros = Parametros(Tc=args.Tc, a=args.a, Es=args.Es, Id=args.Id, coef=args.coef,
+                            ano_tabua=args.ano_tabua, sexo=args.sexo, dib=args.dib,
+                            centavos=args.centavos, limites=args.limites)
+
+    armazem = None if args.memo is None else ArmazemResultados(args.memo or None)
+
+    # Com fontes em fluxo (extratos, Parquet) a leitura acontece dentro desta etapa, assim
+    # como a gravação do Parquet (--gravar-parquet), feita na mesma passada
+    escritor = None
+    if args.gravar_parquet and not args.parquet:
+        from .colunar import EscritorParquet
+        escritor = EscritorParquet(args.gravar_parquet)
+        casos = gravar_em_fluxo(casos, processar, escritor)
+    # Detalhamento por etapa do cálculo (limpeza, correção, seleção, FP/SB/RMI), somado
+    # sobre todos os casos. Só no próprio processo: com --workers os casos rodam em
+    # processos separados, e com --memo os já calculados não passam pelas etapas. A
+    # carteira em Parquet já vem normalizada e fica só na etapa 'Leitura e cálculo'.
+    if args.diagnostico and processar is not processar_historico:
+        if args.workers == 1:
+            processar = partial(processar, diagnostico=diagnostico)
+        else:
+            print("Diagnóstico: o detalhamento por etapa do cálculo requer --workers 1", file=sys.stderr)
+    with diagnostico.etapa('Leitura e cálculo') as registro:
+        try:
+            if args.workers == 1:
+                resultados = processar_lote(casos, parametros, armazem, processar)
+            else:
+                from .paralelo import processar_lote_paralelo
+                resultados = processar_lote_paralelo(casos, parametros, workers=args.workers, chunksize=args.chunksize,
+                                                     armazem=armazem, processar=processar)
+        finally:
+            if escritor is not None:
+                escritor.fechar()
+        registro['Linhas'] = len(resultados)
+
+    with diagnostico.etapa('Exportação', linhas=len(resultados)):
+        destino = exportar_resultados(resultados, args.saida)
+    return resultados, destino
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    diagnostico = Diagnostico(memoria=args.diagnostico is not None)
+
+    if args.perfil:
+        with perfilar(args.perfil, modo=args.perfil_modo):
+            resultados, destino = _executar(args, diagnostico)
+    else:
+        resultados, destino = _executar(args, diagnostico)
+
+    if args.diagnostico:
+        diagnostico.exportar(args.diagnostico)
+        print(diagnostico.como_dataframe().to_string(index=False), file=sys.stderr)
+
+    erros = resultados['Erro'].notna().sum()
+    print(f"{len(resultados)} casos processados ({erros} com erro) -> {destino}", file=sys.stderr)
+    return 1 if erros == len(resultados) and erros else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Marcadores da coluna Observação (Carta / CNIS) como campo de bits uint8.
+#
+# Só a coluna de observação é lida, uma vez: os textos são fatorados (pd.factorize),
+# cada valor distinto é normalizado (sem acento, maiúsculas) e varrido por uma única
+# regex compilada; o resultado volta para as linhas pelos códigos. As etapas de peso,
+# substituição e relatório reutilizam os bits em vez de procurar texto de novo.
+
+DESCONSIDERADO = 0x01
+EXTEMPORANEO = 0x02
+PENDENCIA = 0x04
+ABAIXO_MINIMO = 0x08
+CONCOMITANTE = 0x10
+ACERTO = 0x20
+IRREGULAR = 0x40
+
+# Termos já sem acento e em maiúsculas; siglas dos indicadores do CNIS incluídas
+VOCABULARIO = {
+    'DESCONSIDERADO': (DESCONSIDERADO, r'DESCONSIDERAD[OA]S?|NAO CONSIDERAD[OA]S?'),
+    'EXTEMPORANEO': (EXTEMPORANEO, r'EXTEMPORANE[OA]S?|PEXT|PREM-EXT|AEXT-[A-Z]+'),
+    'PENDENCIA': (PENDENCIA, r'PENDENCIAS?|PENDENTES?|IREM-INDPEND|PVIN-IRREG-PEND'),
+    'ABAIXO_MINIMO': (ABAIXO_MINIMO, r'PREC-MENOR-MIN|ABAIXO DO (?:SALARIO )?MINIMO|MENOR QUE O MINIMO'),
+    'CONCOMITANTE': (CONCOMITANTE, r'CONCOMITANTES?|IVIN-CONCOMIT|ATIVIDADES? CONCOMITANTES?'),
+    'ACERTO': (ACERTO, r'ACERTOS?|AVRC(?:-DEF)?|AVRC-REV|RETIFICAD[OA]S?'),
+    'IRREGULAR': (IRREGULAR, r'IRREGULAR(?:IDADE)?|PVIN-IRREG|IREC-[A-Z0-9]+'),
+}
+
+_REGEX = re.compile('|'.join(f'(?P<{nome}>\\b(?:{padrao}))' for nome, (_, padrao) in VOCABULARIO.items()))
+_BITS = {nome: bit for nome, (bit, _) in VOCABULARIO.items()}
+
+# Rótulos para relatórios, na ordem dos bits
+ROTULOS = {
+    DESCONSIDERADO: 'DESCONSIDERADO',
+    EXTEMPORANEO: 'EXTEMPORÂNEO',
+    PENDENCIA: 'PENDÊNCIA',
+    ABAIXO_MINIMO: 'ABAIXO DO MÍNIMO',
+    CONCOMITANTE: 'CONCOMITANTE',
+    ACERTO: 'ACERTO',
+    IRREGULAR: 'IRREGULAR',
+}
+
+
+def normalizar_texto(texto):
+    texto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).upper()
+
+
+def _bits_texto(texto):
+    bits = 0
+    for encontrado in _REGEX.finditer(normalizar_texto(texto)):
+        bits |= _BITS[encontrado.lastgroup]
+    return bits
+
+
+def coluna_observacao(df):
+    # 'Observação' (com ou sem acento / maiúsculas); senão a última coluna, como no layout da Carta
+    for coluna in df.columns:
+        if normalizar_texto(coluna).strip() in ('OBSERVACAO', 'OBSERVACOES', 'OBS'):
+            return coluna
+    return df.columns[-1]
+
+
+def marcadores(serie):
+    # uint8 por linha; valores vazios/NaN ficam sem marcador
+    codigos, distintos = pd.factorize(pd.Series(serie), use_na_sentinel=True)
+    # Posição extra (0) para os códigos -1 dos valores ausentes
+    bits = np.fromiter((_bits_texto(v) for v in distintos), dtype=np.uint8, count=len(distintos))
+    return np.append(bits, np.uint8(0))[codigos]
+
+
+def adicionar_marcadores(df, col_observacao=None):
+    df['Marcadores'] = marcadores(df[col_observacao or coluna_observacao(df)])
+    return df
+
+
+def com_marcador(flags, bits=DESCONSIDERADO):
+    return (np.asarray(flags, dtype=np.uint8) & bits) != 0
+
+
+def pesos(flags, peso_desconsiderado=0.5):
+    # Peso "fuzzy" dos dashboards: salários desconsiderados pesam metade
+    return np.where(com_marcador(flags, DESCONSIDERADO), peso_desconsiderado, 1.0)
+
+
+def descrever(flags):
+    # Texto legível de cada linha ("DESCONSIDERADO, EXTEMPORÂNEO"), feito por valor distinto
+    flags = np.asarray(flags, dtype=np.uint8)
+    distintos, codigos = np.unique(flags, return_inverse=True)
+    textos = np.array([', '.join(r for bit, r in ROTULOS.items() if valor & bit) for valor in distintos], dtype=object)
+    return textos[codigos.reshape(-1)]
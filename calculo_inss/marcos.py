@@ -0,0 +1,128 @@
+import numpy as np
+
+from .competencias import para_yyyymm
+
+# Classificação temporal das competências pelos marcos legais e econômicos.
+#
+# Todos os marcos (início de vigência YYYYMM) viram um único array ordenado de pontos de
+# corte; para cada intervalo entre dois cortes são pré-calculados o campo de bits dos
+# marcos (uint16), a moeda e o plano econômico. Classificar um histórico é então um
+# np.searchsorted mais três indexações, sem comparação de texto por linha; regras de
+# cálculo e filtros dos dashboards testam bits.
+#
+# Os bits marcam "a partir do marco" (PLANO_REAL: competência >= 07/1994), exceto
+# PERIODO_85_95 e URV, que valem só dentro do período.
+
+INICIO_PLANO_REAL = 199407
+LEI_9876 = 199911
+EC_103 = 201911
+EC_20 = 199812
+EC_41 = 200401
+REGRA_85_95 = 201506
+
+PLANO_REAL = 0x0001
+APOS_LEI_9876 = 0x0002
+APOS_EC_103 = 0x0004
+APOS_EC_20 = 0x0008
+APOS_EC_41 = 0x0010
+PERIODO_85_95 = 0x0020
+URV = 0x0040
+
+# bit: (início, fim exclusivo ou None, rótulo)
+MARCOS = {
+    PLANO_REAL: (INICIO_PLANO_REAL, None, 'Plano Real (07/1994)'),
+    APOS_LEI_9876: (LEI_9876, None, 'Lei 9.876/99'),
+    APOS_EC_103: (EC_103, None, 'EC 103/2019'),
+    APOS_EC_20: (EC_20, None, 'Teto da EC 20/98'),
+    APOS_EC_41: (EC_41, None, 'Teto da EC 41/03'),
+    PERIODO_85_95: (REGRA_85_95, EC_103, 'Regra 85/95 (Lei 13.183/15)'),
+    URV: (199403, INICIO_PLANO_REAL, 'URV'),
+}
+
+# (início, nome) em ordem; antes da primeira entrada vale a anterior a ela
+MOEDAS = [
+    (194211, 'Cruzeiro'),
+    (196702, 'Cruzeiro Novo'),
+    (197005, 'Cruzeiro'),
+    (198603, 'Cruzado'),
+    (198901, 'Cruzado Novo'),
+    (199003, 'Cruzeiro'),
+    (199308, 'Cruzeiro Real'),
+    (199403, 'URV'),
+    (INICIO_PLANO_REAL, 'Real'),
+]
+
+PLANOS = [
+    (194211, 'Anterior ao Plano Cruzado'),
+    (198603, 'Plano Cruzado'),
+    (198706, 'Plano Bresser'),
+    (198901, 'Plano Verão'),
+    (199003, 'Plano Collor I'),
+    (199102, 'Plano Collor II'),
+    (INICIO_PLANO_REAL, 'Plano Real'),
+]
+
+SEM_COMPETENCIA = 'Competência inválida'
+
+
+def _construir_tabela():
+    # Pontos de corte e, por intervalo, (bits, código da moeda, código do plano).
+    # A última posição de cada array é a das competências inválidas (índice -1).
+    cortes = sorted({inicio for inicio, _, _ in MARCOS.values()}
+                    | {fim for _, fim, _ in MARCOS.values() if fim is not None}
+                    | {inicio for inicio, _ in MOEDAS} | {inicio for inicio, _ in PLANOS}
+                    | {1})
+    cortes = np.array(cortes, dtype=np.int32)
+    bits = np.zeros(len(cortes) + 1, dtype=np.uint16)
+    for bit, (inicio, fim, _) in MARCOS.items():
+        bits[:-1] |= np.where((cortes >= inicio) & ((cortes < fim) if fim else True), bit, 0).astype(np.uint16)
+
+    def codigos(tabela):
+        inicios = np.array([inicio for inicio, _ in tabela])
+        return np.append(np.maximum(np.searchsorted(inicios, cortes, side='right') - 1, 0), len(tabela)).astype(np.uint8)
+
+    return cortes, bits, codigos(MOEDAS), codigos(PLANOS)
+
+
+_CORTES, _BITS, _MOEDAS, _PLANOS = _construir_tabela()
+NOMES_MOEDAS = np.array([nome for _, nome in MOEDAS] + [SEM_COMPETENCIA], dtype=object)
+NOMES_PLANOS = np.array([nome for _, nome in PLANOS] + [SEM_COMPETENCIA], dtype=object)
+
+
+def _intervalos(competencias):
+    competencias = np.asarray(competencias)
+    if competencias.dtype.kind not in 'iu':
+        competencias = para_yyyymm(competencias)
+    # Competência 0 (inválida) cai antes do corte 1: índice -1, a posição das inválidas
+    return np.searchsorted(_CORTES, competencias, side='right') - 1
+
+
+def classificar(competencias):
+    # (bits uint16, código da moeda, código do plano) por competência (YYYYMM ou texto)
+    intervalos = _intervalos(competencias)
+    return _BITS[intervalos], _MOEDAS[intervalos], _PLANOS[intervalos]
+
+
+def marcos(competencias):
+    return _BITS[_intervalos(competencias)]
+
+
+def com_marco(flags, bits=PLANO_REAL):
+    return (np.asarray(flags, dtype=np.uint16) & bits) != 0
+
+
+def adicionar_marcos(df, col_competencia):
+    bits, moeda, plano = classificar(df[col_competencia])
+    df['Marcos'] = bits
+    df['Moeda'] = NOMES_MOEDAS[moeda]
+    df['Plano Econômico'] = NOMES_PLANOS[plano]
+    return df
+
+
+def descrever_marcos(flags):
+    # Rótulos dos marcos de cada linha, feitos por valor distinto (como marcadores.descrever)
+    flags = np.asarray(flags, dtype=np.uint16)
+    distintos, codigos = np.unique(flags, return_inverse=True)
+    textos = np.array([', '.join(rotulo for bit, (_, _, rotulo) in MARCOS.items() if valor & bit)
+                       for valor in distintos], dtype=object)
+    return textos[codigos.reshape(-1)]
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import calcular_caso, normalizar_caso
+
+# Memoização persistente (SQLite) dos casos calculados.
+#
+# Chave = SHA-256 de (entradas normalizadas por limpar_dados + parâmetros do cálculo).
+# Cada linha guarda também a versão das tabelas locais (tábua IBGE de Es, índices de
+# correção e limites de teto/mínimo) e do motor de cálculo (VERSAO_CALCULO): ao
+# reconstruir uma tabela ou mudar a regra, invalidar_tabelas() descarta o que foi
+# calculado com a versão anterior. O tamanho é limitado por número
+# de entradas e por bytes, removendo primeiro as de acesso mais antigo (LRU). Vários
+# processos podem usar o mesmo arquivo (modo WAL). A contagem da tabela inteira só é
+# refeita depois de 1/FOLGA_DESPEJO dos limites em gravações deste processo (entradas ou
+# bytes), não a cada gravação: um lote de N casos não varre a tabela N vezes.
+
+CAMINHO_PADRAO = Path.home() / '.cache' / 'calculo_inss' / 'resultados.sqlite'
+MAX_ENTRADAS = 200_000
+MAX_BYTES = 512 * 1024 * 1024
+FOLGA_DESPEJO = 64
+VERSAO_CALCULO = 4   # 2: um salário por competência (substituicao), como no app.py
+                     # 3: sem DIB, todas as fontes pelo Índice da Carta do mês
+                     # 4: DD/MM/AA reconhecido; competência não reconhecida é erro
+
+
+def caminho_memo():
+    return Path(os.environ.get('CALCULO_INSS_MEMO', CAMINHO_PADRAO))
+
+
+def versao_tabelas():
+    from .expectativa import caminho_tabua
+    from .indices import caminho_indices
+    from .limites import caminho_limites
+
+    partes = [f'calculo:{VERSAO_CALCULO}']
+    for caminho in (caminho_tabua(), caminho_indices(), caminho_limites()):
+        try:
+            info = caminho.stat()
+            partes.append(f'{caminho}:{info.st_size}:{info.st_mtime_ns}')
+        except FileNotFoundError:
+            partes.append(f'{caminho}:-')
+    return hashlib.sha256('|'.join(partes).encode()).hexdigest()[:16]
+
+
+def chave_caso(cnis_df, carta_df, desconsid_df, parametros):
+    h = hashlib.sha256()
+    for df in (cnis_df, carta_df, desconsid_df):
+        h.update(json.dumps([str(c) for c in df.columns]).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(json.dumps(parametros.como_dict(), sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class ArmazemResultados:
+    __slots__ = ('caminho', 'max_entradas', 'max_bytes', '_conexao', '_pid', '_pendentes')
+
+    def __init__(self, caminho=None, max_entradas=MAX_ENTRADAS, max_bytes=MAX_BYTES):
+        self.caminho = Path(caminho or caminho_memo())
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._conexao = None
+        self._pid = None
+        self._pendentes = [0, 0]   # entradas e bytes gravados desde o último despejo
+
+    def __getstate__(self):
+        # Conexões SQLite não atravessam processos: cada worker abre a sua
+        return (self.caminho, self.max_entradas, self.max_bytes)
+
+    def __setstate__(self, estado):
+        self.caminho, self.max_entradas, self.max_bytes = estado
+        self._conexao = None
+        self._pid = None
+        self._pendentes = [0, 0]
+
+    @property
+    def conexao(self):
+        if self._conexao is None or self._pid != os.getpid():
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.execute("""CREATE TABLE IF NOT EXISTS resultados (
+                                   chave TEXT PRIMARY KEY,
+                                   versao_tabelas TEXT NOT NULL,
+                                   resultado TEXT NOT NULL,
+                                   tamanho INTEGER NOT NULL,
+                                   acessado REAL NOT NULL)""")
+            conexao.execute('CREATE INDEX IF NOT EXISTS resultados_acessado ON resultados (acessado)')
+            self._conexao, self._pid = conexao, os.getpid()
+        return self._conexao
+
+    def obter(self, chave, versao=None):
+        versao = versao or versao_tabelas()
+        linha = self.conexao.execute('SELECT resultado FROM resultados WHERE chave = ? AND versao_tabelas = ?',
+                                     (chave, versao)).fetchone()
+        if linha is None:
+            return None
+        self.conexao.execute('UPDATE resultados SET acessado = ? WHERE chave = ?', (time.time(), chave))
+        return json.loads(linha[0])
+
+    def gravar(self, chave, resultado, versao=None):
+        versao = versao or versao_tabelas()
+        conteudo = json.dumps({k: (None if v is None else float(v) if isinstance(v, (float, np.floating)) else v)
+                               for k, v in resultado.items()})
+        self.conexao.execute('INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)',
+                             (chave, versao, conteudo, len(conteudo), time.time()))
+        self._pendentes[0] += 1
+        self._pendentes[1] += len(conteudo)
+        if (self._pendentes[0] >= max(self.max_entradas // FOLGA_DESPEJO, 1)
+                or self._pendentes[1] >= max(self.max_bytes // FOLGA_DESPEJO, 1)):
+            self.despejar()
+
+    def despejar(self):
+        # LRU: remove as entradas de acesso mais antigo até respeitar os dois limites
+        self._pendentes = [0, 0]
+        entradas, total = self.conexao.execute('SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados').fetchone()
+        if entradas <= self.max_entradas and total <= self.max_bytes:
+            return 0
+        excesso = max(entradas - self.max_entradas, 0)
+        if total > self.max_bytes:
+            media = total / max(entradas, 1)
+            excesso = max(excesso, int((total - self.max_bytes) / media) + 1)
+        cursor = self.conexao.execute("""DELETE FROM resultados WHERE chave IN (
+                                             SELECT chave FROM resultados ORDER BY acessado LIMIT ?)""", (excesso,))
+        return cursor.rowcount
+
+    def invalidar_tabelas(self, versao=None):
+        # Gancho para quando a tábua de Es, os índices de correção ou os limites forem atualizados
+        versao = versao or versao_tabelas()
+        return self.conexao.execute('DELETE FROM resultados WHERE versao_tabelas != ?', (versao,)).rowcount
+
+    def limpar(self):
+        return self.conexao.execute('DELETE FROM resultados').rowcount
+
+    def __len__(self):
+        return self.conexao.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+
+
+def tabelas_atualizadas():
+    # Chamado por construir_tabua / construir_indices / construir_limites
+    if caminho_memo().exists():
+        ArmazemResultados().invalidar_tabelas()
+
+
+def calcular_caso_com_memo(cnis_df, carta_df, desconsid_df, parametros, armazem=None):
+    armazem = armazem or ArmazemResultados()
+    normalizados = normalizar_caso(cnis_df, carta_df, desconsid_df)
+    chave = chave_caso(*normalizados, parametros)
+    versao = versao_tabelas()
+
+    resultado = armazem.obter(chave, versao)
+    if resultado is None:
+        resultado = calcular_caso(*normalizados, parametros)
+        armazem.gravar(chave, resultado, versao)
+    return resultado
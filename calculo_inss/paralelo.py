@@ -0,0 +1,71 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+import pandas as pd
+
+from .lote import processar_caso
+from .parametros import Parametros
+from .pipeline import COLUNAS_RESULTADO
+
+# Execução paralela dos casos em processos independentes.
+# Cada caso é isolado (erros vão para a coluna 'Erro') e a ordem de saída é a mesma da entrada.
+# A entrada pode ser um gerador (ex.: extratos lidos em fluxo): no máximo alguns blocos
+# ficam pendentes por processo, então a memória não cresce com o tamanho do lote.
+
+
+def numero_workers(workers=None):
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def tamanho_bloco(n_casos, workers):
+    # ~4 blocos por processo: equilibra carga sem pagar serialização por caso
+    return max(1, n_casos // (workers * 4))
+
+
+def _processar_bloco(bloco, processar, parametros, armazem):
+    return [processar(caso, parametros, armazem) for caso in bloco]
+
+
+def mapear_em_ordem(funcao, blocos, workers, pendentes_por_worker=2):
+    # Como executor.map, mas consumindo a entrada sob demanda
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        fila = deque()
+        for bloco in blocos:
+            fila.append(executor.submit(funcao, bloco))
+            if len(fila) >= workers * pendentes_por_worker:
+                yield from fila.popleft().result()
+        while fila:
+            yield from fila.popleft().result()
+
+
+def processar_em_fluxo(casos, parametros=None, workers=None, chunksize=None, armazem=None, processar=processar_caso):
+    # Gera as linhas de resultado na ordem da entrada, à medida que ficam prontas
+    # (acompanhamento de progresso e execução em segundo plano)
+    parametros = parametros or Parametros()
+    if hasattr(casos, '__len__'):
+        workers = min(numero_workers(workers), max(1, len(casos)))
+        chunksize = chunksize or tamanho_bloco(len(casos), workers)
+    else:
+        workers = numero_workers(workers)
+        chunksize = chunksize or 64
+
+    if workers == 1:
+        for caso in casos:
+            yield processar(caso, parametros, armazem)
+        return
+
+    iterador = iter(casos)
+    blocos = iter(lambda: list(islice(iterador, chunksize)), [])
+    funcao = partial(_processar_bloco, processar=processar, parametros=parametros, armazem=armazem)
+    yield from mapear_em_ordem(funcao, blocos, workers)
+
+
+def processar_lote_paralelo(casos, parametros=None, workers=None, chunksize=None, armazem=None,
+                            processar=processar_caso):
+    linhas = processar_em_fluxo(casos, parametros, workers, chunksize, armazem, processar)
+    return pd.DataFrame(list(linhas), columns=['Caso'] + COLUNAS_RESULTADO + ['Erro'])
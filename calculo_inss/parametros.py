@@ -0,0 +1,48 @@
+import math
+from dataclasses import dataclass, asdict
+
+# ===================
+# PARÂMETROS PREVIDENCIÁRIOS NORMATIVOS
+# ===================
+
+# Valores usados como referência nos dashboards (38 anos, 1 mês e 25 dias de contribuição)
+TC_PADRAO = 38 + (1/12) + (25/365)
+ALIQUOTA_PADRAO = 0.31
+ES_PADRAO = 21.8
+IDADE_PADRAO = 60
+COEF_PADRAO = 1.0
+
+
+@dataclass(frozen=True)
+class Parametros:
+    Tc: float = TC_PADRAO
+    a: float = ALIQUOTA_PADRAO
+    Es: float = ES_PADRAO
+    Id: float = IDADE_PADRAO
+    coef: float = COEF_PADRAO
+    # Quando informado, Es vem da tábua IBGE desse ano (calculo_inss.expectativa)
+    ano_tabua: int = None
+    sexo: str = 'ambos'
+    # Quando informada (YYYYMM), todos os salários são corrigidos até a DIB pela
+    # tabela local de índices (calculo_inss.indices) em vez da coluna Índice da Carta
+    dib: int = None
+    # Modo exato: correção, média, SB e RMI em centavos inteiros com arredondamento
+    # meio para cima (calculo_inss.ponto_fixo) em vez de float com round()
+    centavos: bool = False
+    # Salários entre o mínimo e o teto da competência; SB e RMI entre os da DIB
+    # (tabela local de teto e salário mínimo, calculo_inss.limites)
+    limites: bool = False
+
+    def como_dict(self):
+        return asdict(self)
+
+    def expectativa(self):
+        if self.ano_tabua is None:
+            return self.Es
+        from .expectativa import expectativa_sobrevida
+        Es = expectativa_sobrevida(self.ano_tabua, self.Id, self.sexo)
+        # Combinação fora da tábua: erro do caso, não FP/SB/RMI NaN
+        if math.isnan(Es):
+            raise ValueError(f"Tábua sem expectativa de sobrevida para o ano {self.ano_tabua}, "
+                             f"idade {math.floor(self.Id)} e sexo {self.sexo}")
+        return Es
@@ -0,0 +1,215 @@
+import numpy as np
+
+from .competencias import competencias_invalidas, para_yyyymm
+from .formulas import calcular_beneficio
+from .indices import fatores_correcao
+from .limites import limitar_beneficio, limitar_salarios
+from .parametros import Parametros
+from .salarios import limpar_dados, normalizar_salarios
+from .selecao import indices_80_maiores, media_80_maiores
+
+# Pipeline do app.py sem dependência de interface (Streamlit).
+# Colunas posicionais seguem os layouts dos arquivos importados:
+#   CNIS:             Competência, Remuneração
+#   Carta:            SEQ, Data, Salário, Índice, Salário Corrigido, Observação
+#   Desconsiderados:  Competência, ..., Salário
+
+COLUNAS_RESULTADO = [
+    'Média dos 80% maiores salários',
+    'Fator Previdenciário',
+    'Salário de Benefício Calculado',
+    'Renda Mensal Inicial',
+]
+
+
+# ===================
+# ETAPA 2 - SANITIZAÇÃO
+# ===================
+
+# limpar_dados: ver calculo_inss.salarios (normalização pt-BR / en-US)
+
+def verificar_competencias(df, col_competencia, fonte):
+    # Linha com salário e competência não reconhecida: erro, em vez de sair do cálculo
+    invalidas = competencias_invalidas(df[col_competencia])
+    if invalidas:
+        raise ValueError(f"Competências não reconhecidas ({fonte}): {', '.join(invalidas[:5])}")
+    return df
+
+
+# ===================
+# ETAPA 3 - LIMITES E CORREÇÃO MONETÁRIA
+# ===================
+
+def aplicar_limites(df, col_competencia, col_salario):
+    # Salário nominal entre o mínimo e o teto da própria competência (antes da correção)
+    df[col_salario] = limitar_salarios(df[col_salario].to_numpy(dtype=np.float64), para_yyyymm(df[col_competencia]))
+    return df
+
+
+def aplicar_indice_corrigido(df, col_salario, col_indice):
+    # O índice pode chegar como texto (pt-BR ou extratos lidos com dtype 'string')
+    indice, _ = normalizar_salarios(df[col_indice], milhar=False)
+    df['Salário Corrigido'] = df[col_salario] * indice
+    return df
+
+
+def indices_da_carta(competencias, competencias_carta, indices_carta):
+    # Índice da Carta de cada competência (o da primeira linha válida do mês); 1 quando a
+    # Carta não traz a competência. Sem DIB é a correção de todas as fontes, para que o
+    # maior salário do mês seja escolhido numa base monetária só.
+    competencias = np.asarray(competencias, dtype=np.int64)
+    competencias_carta = np.asarray(competencias_carta, dtype=np.int64)
+    indices_carta = np.asarray(indices_carta, dtype=np.float64)
+    validos = (competencias_carta > 0) & np.isfinite(indices_carta) & (indices_carta > 0)
+    indices = np.ones(len(competencias))
+    if validos.any():
+        meses, primeira = np.unique(competencias_carta[validos], return_index=True)
+        posicao = np.minimum(np.searchsorted(meses, competencias), len(meses) - 1)
+        achou = meses[posicao] == competencias
+        indices[achou] = indices_carta[validos][primeira][posicao[achou]]
+    return indices
+
+
+def fatores_do_caso(competencias, carta_df, dib=None):
+    # Fator que leva o salário nominal de cada competência à base do cálculo: tabela local
+    # até a DIB ou, sem ela, o Índice da Carta do mês (carta_df já limpo)
+    competencias = para_yyyymm(competencias)
+    if dib is not None:
+        return fatores_correcao(competencias, dib)
+    indices, _ = normalizar_salarios(carta_df[carta_df.columns[3]], milhar=False)
+    return indices_da_carta(competencias, para_yyyymm(carta_df[carta_df.columns[1]]), indices.to_numpy())
+
+
+def aplicar_correcao_tabela(df, col_competencia, col_salario, dib):
+    # Correção pela tabela local de índices acumulados (sem coluna de índice no arquivo)
+    competencias = para_yyyymm(df[col_competencia])
+    fatores = fatores_correcao(competencias, dib)
+    sem_indice = np.isnan(fatores)
+    if sem_indice.any():
+        faltando = ', '.join(sorted(df.loc[sem_indice, col_competencia].astype(str).unique())[:5])
+        raise ValueError(f"Competências sem índice de correção até {dib}: {faltando}")
+    df['Salário Corrigido'] = df[col_salario].to_numpy(dtype=np.float64) * fatores
+    return df
+
+
+def coluna_valor(df, col_salario):
+    # Valor usado no cálculo: o corrigido quando existir
+    return 'Salário Corrigido' if 'Salário Corrigido' in df.columns else col_salario
+
+
+# ===================
+# ETAPA 4 - SELEÇÃO 80% MAIORES SALÁRIOS
+# ===================
+
+def selecionar_80_maiores(df, col_corrigido):
+    # Seleção O(n); só as linhas escolhidas são ordenadas (para exibição)
+    valores = df[col_corrigido].to_numpy(dtype=np.float64)
+    posicoes = indices_80_maiores(valores)
+    posicoes = posicoes[np.argsort(-valores[posicoes], kind='stable')]
+    return df.iloc[posicoes]
+
+
+# ===================
+# ETAPA 5 - CONSOLIDAÇÃO E SUBSTITUIÇÃO
+# ===================
+
+# Um salário por competência (o maior entre CNIS, Carta e desconsiderados):
+# ver calculo_inss.substituicao (base_do_caso / melhor_por_competencia)
+
+
+# ===================
+# ETAPA 6 - CÁLCULO FINAL
+# ===================
+
+# calcular_valores: 80% maiores da base substituída + FP / SB / RMI (abaixo)
+
+
+# ===================
+# EXECUÇÃO COMPLETA DE UM CASO
+# ===================
+
+def normalizar_caso(cnis_df, carta_df, desconsid_df):
+    cnis_df = limpar_dados(cnis_df, cnis_df.columns[1])
+    carta_df = limpar_dados(carta_df, carta_df.columns[2])
+    desconsid_df = limpar_dados(desconsid_df, desconsid_df.columns[2])
+    verificar_competencias(cnis_df, cnis_df.columns[0], 'CNIS')
+    verificar_competencias(carta_df, carta_df.columns[1], 'Carta')
+    verificar_competencias(desconsid_df, desconsid_df.columns[0], 'Desconsiderados')
+    return cnis_df, carta_df, desconsid_df
+
+
+def preparar_caso(cnis_df, carta_df, desconsid_df, dib=None, limites=False):
+    return corrigir_caso(*normalizar_caso(cnis_df, carta_df, desconsid_df), dib, limites)
+
+
+def corrigir_caso(cnis_df, carta_df, desconsid_df, dib=None, limites=False):
+    # Teto/mínimo e correção monetária de um caso já limpo (normalizar_caso)
+    if limites:
+        cnis_df = aplicar_limites(cnis_df, cnis_df.columns[0], cnis_df.columns[1])
+        carta_df = aplicar_limites(carta_df, carta_df.columns[1], carta_df.columns[2])
+        desconsid_df = aplicar_limites(desconsid_df, desconsid_df.columns[0], desconsid_df.columns[2])
+    if dib is None:
+        carta_df = aplicar_indice_corrigido(carta_df, carta_df.columns[2], carta_df.columns[3])
+    else:
+        cnis_df = aplicar_correcao_tabela(cnis_df, cnis_df.columns[0], cnis_df.columns[1], dib)
+        carta_df = aplicar_correcao_tabela(carta_df, carta_df.columns[1], carta_df.columns[2], dib)
+        desconsid_df = aplicar_correcao_tabela(desconsid_df, desconsid_df.columns[0], desconsid_df.columns[2], dib)
+    return cnis_df, carta_df, desconsid_df
+
+
+def calcular_caso(cnis_df, carta_df, desconsid_df, parametros=None, diagnostico=None):
+    # Um salário por competência (o maior entre CNIS, Carta e desconsiderados) e os 80%
+    # maiores dessa base: o mesmo motor do app.py (substituicao.resolver_caso).
+    # Com um Diagnostico, o tempo de cada etapa é acumulado nele (calculo_lote --diagnostico).
+    from .substituicao import base_do_caso, calcular_substituicao
+    parametros = parametros or Parametros()
+    if diagnostico is not None:
+        return calcular_caso_por_etapas(cnis_df, carta_df, desconsid_df, parametros, diagnostico)
+    if parametros.centavos:
+        return calcular_caso_centavos(cnis_df, carta_df, desconsid_df, parametros)
+    preparados = preparar_caso(cnis_df, carta_df, desconsid_df, parametros.dib, parametros.limites)
+    return calcular_substituicao(*base_do_caso(*preparados), parametros)
+
+
+def calcular_valores(valores, parametros=None):
+    # Etapa 6 direto no array da base (um salário por competência, já corrigido):
+    # seleção O(n) dos 80% maiores, sem DataFrames intermediários nem ordenação
+    return calcular_resultado(media_80_maiores(valores), parametros)
+
+
+def calcular_resultado(media_final, parametros=None):
+    # FP, SB e RMI a partir da média dos 80% maiores
+    parametros = parametros or Parametros()
+    FP, salario_benef, renda_inicial = calcular_beneficio(media_final, parametros.Tc, parametros.a, parametros.expectativa(),
+                                                          parametros.Id, parametros.coef)
+    if parametros.limites:
+        salario_benef, renda_inicial = limitar_beneficio(salario_benef, renda_inicial, parametros.dib)
+
+    return dict(zip(COLUNAS_RESULTADO, [media_final, FP, salario_benef, renda_inicial]))
+
+
+def calcular_caso_por_etapas(cnis_df, carta_df, desconsid_df, parametros, diagnostico):
+    # Mesmo cálculo de calcular_caso, etapa por etapa. O modo em centavos percorre a
+    # base inteira em ponto fixo e fica numa etapa só.
+    from .substituicao import base_do_caso, melhor_por_competencia
+    linhas = len(cnis_df) + len(carta_df) + len(desconsid_df)
+    if parametros.centavos:
+        with diagnostico.etapa('Cálculo em centavos', linhas=linhas, acumular=True):
+            return calcular_caso_centavos(cnis_df, carta_df, desconsid_df, parametros)
+    with diagnostico.etapa('Limpeza (limpar_dados)', linhas=linhas, acumular=True):
+        normalizados = normalizar_caso(cnis_df, carta_df, desconsid_df)
+    with diagnostico.etapa('Teto/mínimo e correção monetária', linhas=sum(map(len, normalizados)), acumular=True):
+        preparados = corrigir_caso(*normalizados, parametros.dib, parametros.limites)
+    with diagnostico.etapa('Substituição por competência', linhas=sum(map(len, preparados)), acumular=True):
+        _, melhor, _, _ = melhor_por_competencia(*base_do_caso(*preparados))
+    with diagnostico.etapa('Seleção 80%', linhas=len(melhor), acumular=True):
+        media_final = media_80_maiores(melhor)
+    with diagnostico.etapa('FP, SB e RMI', linhas=1, acumular=True):
+        return calcular_resultado(media_final, parametros)
+
+
+def calcular_caso_centavos(cnis_df, carta_df, desconsid_df, parametros):
+    # Modo exato: salários em centavos inteiros desde a leitura até a RMI
+    from .substituicao import base_do_caso_centavos, calcular_substituicao_centavos
+    return calcular_substituicao_centavos(*base_do_caso_centavos(cnis_df, carta_df, desconsid_df, parametros.dib,
+                                                                 parametros.limites), parametros)
@@ -0,0 +1,106 @@
+import numpy as np
+
+from .formulas import arredondar
+from .indices import fatores_correcao
+from .limites import limitar_beneficio
+
+# Modo exato em centavos (ponto fixo) para o cálculo do benefício.
+#
+# Todo o caminho roda em int64 e arredonda meio para cima só nos pontos definidos:
+#   salário corrigido  = centavos * fator (10**-8)          -> centavos
+#   média              = soma dos 80% maiores / k           -> centavos
+#   FP                 = 4 casas decimais                    -> FP * 10**4
+#   SB                 = média * FP                          -> centavos
+#   RMI                = SB * coef (4 casas)                 -> centavos
+#
+# Divisões inteiras não dependem da ordem das somas nem da FPU: o resultado é o mesmo
+# em qualquer worker ou máquina.
+
+ESCALA_FATOR = 10 ** 4       # FP e coeficiente
+ESCALA_INDICE = 10 ** 8      # fatores de correção monetária
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def para_centavos(valores):
+    # Reais (float) -> centavos int64, meio para cima
+    valores = np.asarray(valores, dtype=np.float64)
+    return (np.sign(valores) * np.floor(np.abs(valores) * 100 + 0.5)).astype(np.int64)
+
+
+def para_fixo(valores, escala):
+    # Decimal com log10(escala) casas -> inteiro, meio para cima (mesmo desempate de arredondar)
+    casas = int(round(np.log10(escala)))
+    return np.rint(arredondar(valores, casas, meio_para_cima=True) * escala).astype(np.int64)
+
+
+def dividir_meio_para_cima(numerador, denominador):
+    # numerador / denominador arredondado meio para cima (afastando do zero), só com inteiros
+    numerador = np.asarray(numerador, dtype=np.int64)
+    denominador = np.asarray(denominador, dtype=np.int64)
+    quociente, resto = np.divmod(np.abs(numerador), denominador)
+    quociente = quociente + (2 * resto >= denominador)
+    return np.where(numerador < 0, -quociente, quociente)
+
+
+def _multiplicar(a, b):
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    if a.size and b.size and np.any(np.abs(a) > _INT64_MAX // np.maximum(np.abs(b), 1)):
+        raise OverflowError("Produto fora do alcance de int64 no modo centavos")
+    return a * b
+
+
+def corrigir_centavos(centavos, competencias, alvo, tabela=None):
+    # Correção monetária até alvo (YYYYMM) com o fator fixado em 8 casas
+    fatores = fatores_correcao(competencias, alvo, tabela)
+    sem_indice = np.isnan(fatores)
+    if sem_indice.any():
+        faltando = ', '.join(map(str, np.unique(np.asarray(competencias)[sem_indice])[:5]))
+        raise ValueError(f"Competências sem índice de correção até {alvo}: {faltando}")
+    return dividir_meio_para_cima(_multiplicar(centavos, para_fixo(fatores, ESCALA_INDICE)), ESCALA_INDICE)
+
+
+def centavos_80_maiores(centavos):
+    centavos = np.asarray(centavos, dtype=np.int64)
+    k = int(0.8 * len(centavos))
+    if k == 0:
+        return centavos[:0]
+    return np.partition(centavos, len(centavos) - k)[len(centavos) - k:]
+
+
+def media_centavos(centavos):
+    # Média em centavos, meio para cima
+    centavos = np.asarray(centavos, dtype=np.int64)
+    return dividir_meio_para_cima(centavos.sum(), len(centavos))[()]
+
+
+def calcular_beneficio_centavos(media, Tc, a, Es, Id, coef=1.0):
+    # media em centavos; devolve FP (x 10**4), SB e RMI em centavos
+    Tc, a, Es, Id = (np.asarray(v, dtype=np.float64) for v in (Tc, a, Es, Id))
+    FP = para_fixo((Tc * a / Es) * (1 + ((Id + Tc * a) / 100)), ESCALA_FATOR)
+    SB = dividir_meio_para_cima(_multiplicar(media, FP), ESCALA_FATOR)
+    RMI = dividir_meio_para_cima(_multiplicar(SB, para_fixo(coef, ESCALA_FATOR)), ESCALA_FATOR)
+    return FP, SB, RMI
+
+
+def aplicar_indice_centavos(centavos, indices):
+    # Salário x Índice informado na Carta, com o fator fixado em 8 casas. Índice inválido
+    # (NaN) vira 0 centavos: o salário fica fora do cálculo, como o NaN do modo float
+    indices = np.asarray(indices, dtype=np.float64)
+    validos = np.isfinite(indices)
+    fixos = para_fixo(np.where(validos, indices, 0.0), ESCALA_INDICE)
+    return np.where(validos, dividir_meio_para_cima(_multiplicar(centavos, fixos), ESCALA_INDICE), 0)
+
+
+def calcular_valores_centavos(centavos, parametros):
+    # Equivalente inteiro de pipeline.calcular_valores (base já corrigida, em centavos);
+    # devolve média, FP, SB e RMI já convertidos para reais
+    top = centavos_80_maiores(centavos)
+    if len(top) == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    media = media_centavos(top)
+    FP, SB, RMI = calcular_beneficio_centavos(media, parametros.Tc, parametros.a, parametros.expectativa(),
+                                              parametros.Id, parametros.coef)
+    if parametros.limites:
+        SB, RMI = limitar_beneficio(SB, RMI, parametros.dib, centavos=True)
+    return media / 100, FP / ESCALA_FATOR, SB / 100, RMI / 100
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+from .competencias import indice_mensal
+from .expectativa import codigo_sexo
+from .formulas import fator_previdenciario, renda_mensal_inicial, salario_beneficio
+from .limites import limitar_beneficio
+from .marcos import APOS_EC_103, EC_103, LEI_9876, PERIODO_85_95, PLANO_REAL, com_marco, marcos
+from .parametros import Parametros
+from .selecao import n_80_maiores
+from .substituicao import melhor_por_competencia
+
+# Comparação das regras de cálculo de um mesmo histórico, numa passada só.
+#
+# Entrada: um salário (já corrigido) por competência YYYYMM. Os salários são ordenados
+# uma única vez (decrescente); com somas prefixadas sobre essa ordem, a soma dos k
+# maiores de qualquer recorte (desde 07/1994 ou vida toda) sai por searchsorted, sem nova
+# ordenação ou partição por regra. As médias simples (100%) e a regra anterior a 1999
+# (36 últimos salários em até 48 meses) usam só máscaras.
+#
+#   Regra anterior (36 em 48)     média dos 36 últimos em até 48 meses antes da DIB, sem FP
+#   Art. 29 (80% desde 07/1994)   80% maiores desde 07/1994 x FP (Lei 9.876/99, art. 3º)
+#   Revisão da Vida Toda          80% maiores de todo o período x FP
+#   EC 103 - regra permanente     100% desde 07/1994, coef. 60% + 2% por ano acima de 20/15
+#   EC 103 - pedágio 50%          100% desde 07/1994 x FP, coef. 100% (art. 17)
+#   EC 103 - pedágio 100%         100% desde 07/1994, coef. 100%, sem FP (art. 20)
+#
+# Aplicabilidade pela DIB (parametros.dib, YYYYMM) e por Tc/Id/sexo: regras da Lei 9.876
+# até 12/11/2019; EC 103 a partir de 13/11/2019 (competência 201911). Sem DIB, todas são
+# calculadas como aplicáveis. sexo 'ambos' usa os requisitos masculinos. Com
+# parametros.limites, SB e RMI de todas as regras ficam entre o mínimo e o teto da DIB.
+
+REGRAS = [
+    'Regra anterior (36 em 48)',
+    'Art. 29 (80% desde 07/1994)',
+    'Revisão da Vida Toda',
+    'EC 103 - regra permanente',
+    'EC 103 - pedágio 50%',
+    'EC 103 - pedágio 100%',
+]
+
+COLUNAS_REGRAS = ['Regra', 'Aplicável', 'Média', 'Fator Previdenciário', 'Coeficiente',
+                  'Salário de Benefício Calculado', 'Renda Mensal Inicial']
+
+
+def _requisitos(sexo):
+    # (Tc exigido, Tc mínimo da regra permanente, idade do pedágio 100%, pontos 85/95).
+    # Mesma leitura de sexo da tábua ('F', 'Feminino'...): código 2 = feminino
+    if codigo_sexo(sexo)[0] == 2:
+        return 30, 15, 57, 85
+    return 35, 20, 60, 95
+
+
+def _soma_maiores(prefixo, contagem, k):
+    # Soma dos k maiores de um recorte, dado o prefixo das somas e da contagem na ordem global
+    if k == 0:
+        return 0.0
+    return prefixo[np.searchsorted(contagem, k)]
+
+
+def comparar_regras(competencias, valores, parametros=None):
+    parametros = parametros or Parametros()
+    competencias = np.asarray(competencias, dtype=np.int64)
+    valores = np.asarray(valores, dtype=np.float64)
+    validos = (competencias > 0) & ~np.isnan(valores)
+    competencias, valores = competencias[validos], valores[validos]
+
+    dib = parametros.dib
+    if dib is not None:
+        # Só competências anteriores à DIB entram no período básico de cálculo
+        anteriores = competencias < dib
+        competencias, valores = competencias[anteriores], valores[anteriores]
+
+    # Uma ordenação para todas as regras de 80%
+    ordem = np.argsort(-valores, kind='stable')
+    ordenados = valores[ordem]
+    real = com_marco(marcos(competencias[ordem]), PLANO_REAL)
+
+    prefixo_todos = np.cumsum(ordenados)
+    prefixo_real = np.cumsum(np.where(real, ordenados, 0.0))
+    contagem_todos = np.arange(1, len(ordenados) + 1)
+    contagem_real = np.cumsum(real)
+
+    n_todos, n_real = len(ordenados), int(contagem_real[-1]) if len(ordenados) else 0
+    k_todos, k_real = n_80_maiores(n_todos), n_80_maiores(n_real)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_80_real = _soma_maiores(prefixo_real, contagem_real, k_real) / k_real if k_real else np.nan
+        media_80_todos = _soma_maiores(prefixo_todos, contagem_todos, k_todos) / k_todos if k_todos else np.nan
+        media_100_real = prefixo_real[-1] / n_real if n_real else np.nan
+
+    # Regra anterior: 36 últimos salários em até 48 meses antes da DIB (ou de 11/1999)
+    limite = min(dib, LEI_9876) if dib is not None else LEI_9876
+    meses_antes = indice_mensal(limite) - indice_mensal(competencias)
+    janela = (meses_antes >= 1) & (meses_antes <= 48)
+    recentes = np.argsort(meses_antes[janela], kind='stable')[:36]
+    media_36 = valores[janela][recentes].mean() if len(recentes) else np.nan
+
+    Tc, Id = parametros.Tc, parametros.Id
+    marcos_dib = marcos(dib) if dib is not None else 0
+    tc_exigido, tc_minimo, idade_pedagio, pontos = _requisitos(parametros.sexo)
+    FP = float(fator_previdenciario(Tc, parametros.a, parametros.expectativa(), Id))
+    # Regra 85/95 (Lei 13.183/15, só com DIB informada): com pontos suficientes o FP só é
+    # aplicado se maior que 1
+    FP_80 = max(FP, 1.0) if com_marco(marcos_dib, PERIODO_85_95) and Tc + Id >= pontos else FP
+    coef_permanente = 0.6 + 0.02 * max(0, int(Tc) - tc_minimo)
+
+    medias = np.array([media_36, media_80_real, media_80_todos, media_100_real, media_100_real, media_100_real])
+    fatores = np.array([1.0, FP_80, FP_80, 1.0, FP, 1.0])
+    coeficientes = np.array([1.0, 1.0, 1.0, coef_permanente, 1.0, 1.0]) * parametros.coef
+
+    # Tc na data da EC 103 e em 11/1999, estimado a partir do Tc na DIB
+    if dib is None:
+        aplicavel = np.ones(len(REGRAS), dtype=bool)
+    else:
+        tc_ec103 = Tc - max(0, indice_mensal(dib) - indice_mensal(EC_103)) / 12
+        tc_1999 = Tc - max(0, indice_mensal(dib) - indice_mensal(LEI_9876)) / 12
+        antes_ec103 = not com_marco(marcos_dib, APOS_EC_103)
+        aplicavel = np.array([
+            tc_1999 >= tc_exigido,
+            antes_ec103,
+            antes_ec103,
+            not antes_ec103 and Tc >= tc_minimo,
+            not antes_ec103 and tc_ec103 >= tc_exigido - 2 and Tc >= tc_exigido,
+            not antes_ec103 and Id >= idade_pedagio and Tc >= tc_exigido,
+        ])
+    aplicavel &= ~np.isnan(medias)
+
+    SB = salario_beneficio(medias, fatores)
+    RMI = renda_mensal_inicial(SB, coeficientes)
+    if parametros.limites:
+        SB, RMI = limitar_beneficio(SB, RMI, dib)
+    return pd.DataFrame({
+        'Regra': REGRAS,
+        'Aplicável': aplicavel,
+        'Média': medias,
+        'Fator Previdenciário': fatores,
+        'Coeficiente': coeficientes,
+        'Salário de Benefício Calculado': SB,
+        'Renda Mensal Inicial': RMI,
+    }, columns=COLUNAS_REGRAS)
+
+
+def regra_mais_vantajosa(tabela):
+    # Linha da regra aplicável de maior RMI (None se nenhuma se aplica)
+    aplicaveis = tabela[tabela['Aplicável']]
+    if aplicaveis.empty:
+        return None
+    return aplicaveis.loc[aplicaveis['Renda Mensal Inicial'].idxmax()]
+
+
+def comparar_regras_carteira(casos, parametros=None):
+    # casos: (nome, HistoricoContribuicao). Uma linha por beneficiário com a RMI de cada regra
+    # e a mais vantajosa; CNIS, Carta e desconsiderados entram pelo maior valor do mês.
+    parametros = parametros or Parametros()
+    linhas = []
+    for nome, historico in casos:
+        meses, melhor, _, _ = melhor_por_competencia(historico.competencias,
+                                                     historico.valores(parametros.dib, parametros.limites),
+                                                     historico.fontes())
+        tabela = comparar_regras(meses, melhor, parametros)
+        linha = {'Caso': nome}
+        linha.update(zip(tabela['Regra'], tabela['Renda Mensal Inicial'].where(tabela['Aplicável'])))
+        melhor_regra = regra_mais_vantajosa(tabela)
+        linha['Regra mais vantajosa'] = None if melhor_regra is None else melhor_regra['Regra']
+        linha['RMI mais vantajosa'] = np.nan if melhor_regra is None else melhor_regra['Renda Mensal Inicial']
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
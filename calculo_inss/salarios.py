@@ -0,0 +1,76 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+# Normalização de valores salariais (pt-BR e en-US).
+#
+#   "1.234,56"  -> 1234.56     "1,234.56"  -> 1234.56
+#   "1234,56"   -> 1234.56     "1234.56"   -> 1234.56
+#   "1.234.567" -> 1234567     "1,234,567" -> 1234567
+#   "1.234"     -> 1234        (grupos de milhar pt-BR, origem dos arquivos do INSS)
+#   "R$ 1.234,56", "1 234,56", "1e3" também são aceitos.
+#
+# Como em competencias.para_yyyymm, cada texto distinto é interpretado uma vez
+# (pd.factorize) por uma função escalar de poucas operações de str, e o resultado é
+# distribuído às linhas por indexação. Os textos já vistos ficam num cache do módulo,
+# compartilhado entre as colunas de uma sessão ou de um lote.
+
+_MILHAR_PONTO = re.compile(r'-?\d{1,3}(?:\.\d{3})+')
+_MILHAR_VIRGULA = re.compile(r'-?\d{1,3}(?:,\d{3}){2,}')
+TAMANHO_CACHE = 200_000
+
+_CACHE = {True: {}, False: {}}
+
+
+def _interpretar(texto, milhar):
+    # Um texto -> float (nan se inválido). Separador decimal = o último que aparece; o
+    # outro é separador de milhar
+    if 'R$' in texto:
+        texto = texto.replace('R$', '')
+    if not texto.isalnum():
+        texto = ''.join(texto.split())
+    pos_virgula, pos_ponto = texto.rfind(','), texto.rfind('.')
+    if pos_virgula > pos_ponto and (pos_ponto >= 0 or texto.count(',') < 2 or not _MILHAR_VIRGULA.fullmatch(texto)):
+        texto = texto.replace('.', '').replace(',', '.')
+    elif pos_virgula >= 0:
+        texto = texto.replace(',', '')
+    elif milhar and pos_ponto >= 0 and _MILHAR_PONTO.fullmatch(texto):
+        texto = texto.replace('.', '')
+    try:
+        valor = float(texto)
+    except ValueError:
+        return math.nan
+    return valor if '_' not in texto and math.isfinite(valor) else math.nan
+
+
+def _valores_distintos(distintos, milhar):
+    cache = _CACHE[bool(milhar)]
+    textos = [valor if type(valor) is str else str(valor) for valor in distintos.tolist()]
+    novos = [texto for texto in textos if texto not in cache]
+    if novos:
+        if len(cache) + len(novos) > TAMANHO_CACHE:
+            cache.clear()
+        cache.update((texto, _interpretar(texto, milhar)) for texto in novos)
+    return np.fromiter((cache[texto] for texto in textos), dtype=np.float64, count=len(textos))
+
+
+def normalizar_salarios(serie, milhar=True):
+    # Retorna (valores float64, máscara de linhas rejeitadas).
+    # milhar=False para fatores (índices de correção): "2.423" é decimal, não 2423
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        valores = serie.astype('float64')
+        return valores, valores.isna().to_numpy()
+
+    codigos, distintos = pd.factorize(serie)
+    # Código -1 (ausente) aponta para o nan acrescentado ao fim
+    valores = pd.Series(np.append(_valores_distintos(distintos, milhar), np.nan)[codigos], index=serie.index)
+    return valores, np.isnan(valores.to_numpy())
+
+
+def limpar_dados(df, col_remuneracao):
+    valores, rejeitados = normalizar_salarios(df[col_remuneracao])
+    df = df[~rejeitados].copy()
+    df[col_remuneracao] = valores[~rejeitados]
+    return df
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Regra dos 80% maiores salários (Lei 8.213/91, Art. 29) por seleção parcial.
+# np.partition / np.argpartition (introselect) são O(n): não há ordenação completa
+# nem cópias intermediárias de DataFrame. Valores NaN são ignorados.
+
+
+def n_80_maiores(n):
+    return int(0.8 * n)
+
+
+def _validos(valores):
+    valores = np.asarray(valores, dtype=np.float64)
+    return valores[~np.isnan(valores)]
+
+
+def valores_80_maiores(valores):
+    # Os 80% maiores valores, sem ordem definida
+    valores = _validos(valores)
+    k = n_80_maiores(len(valores))
+    if k == 0:
+        return valores[:0]
+    return np.partition(valores, len(valores) - k)[len(valores) - k:]
+
+
+def indices_80_maiores(valores):
+    # Posições (no array original) dos 80% maiores valores, sem ordem definida
+    valores = np.asarray(valores, dtype=np.float64)
+    posicoes = np.flatnonzero(~np.isnan(valores))
+    k = n_80_maiores(len(posicoes))
+    if k == 0:
+        return posicoes[:0]
+    validos = valores[posicoes]
+    return posicoes[np.argpartition(validos, len(validos) - k)[len(validos) - k:]]
+
+
+def media_80_maiores(valores):
+    top = valores_80_maiores(valores)
+    if len(top) == 0:
+        return np.nan
+    return top.mean()
+
+
+def media_80_maiores_lote(matriz):
+    # matriz 2-D (beneficiários x competências) preenchida com NaN nas posições vazias.
+    # Uma única chamada de np.partition com todos os k distintos atende o lote inteiro.
+    matriz = np.asarray(matriz, dtype=np.float64)
+    if matriz.ndim != 2:
+        raise ValueError("media_80_maiores_lote espera uma matriz 2-D (beneficiários x competências)")
+
+    vazios = np.isnan(matriz)
+    k = (0.8 * (~vazios).sum(axis=1)).astype(np.int64)
+    medias = np.full(matriz.shape[0], np.nan)
+    if not k.any():
+        return medias
+
+    # Ordem decrescente via negação; posições vazias vão para o fim (+inf)
+    negados = np.where(vazios, np.inf, -matriz)
+    negados = np.partition(negados, np.unique(k[k > 0]) - 1, axis=1)
+
+    mascara = np.arange(matriz.shape[1]) < k[:, None]
+    somas = -np.where(mascara, negados, 0.0).sum(axis=1)
+    com_valores = k > 0
+    medias[com_valores] = somas[com_valores] / k[com_valores]
+    return medias
@@ -0,0 +1,178 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .competencias import indice_mensal, yyyymm_de_indice
+from .leitura import COLUNA_ID
+
+# Gerador determinístico de casos sintéticos (CNIS / Carta / Desconsiderados) para
+# benchmarks e testes de carga. O caso i depende só de (semente, i): gerar 10 ou 1M
+# beneficiários produz os mesmos 10 primeiros casos.
+#
+# Patologias reproduzidas, como nos arquivos reais do INSS:
+#   decimais pt-BR ("1.234,56"), às vezes com "R$ "
+#   lacunas (meses sem contribuição) e remunerações em branco
+#   competências duplicadas no CNIS (vínculos concomitantes)
+#   marcadores na Observação da Carta (DESCONSIDERADO, PEXT, ...), com variações de grafia
+#
+# Os salários desconsiderados da Carta vão também para o arquivo de Desconsiderados
+# (Competência, Obs, Salário nominal, como no CNIS), como no layout de entrada do app.py.
+
+INICIO = 199407
+
+PATOLOGIAS = {
+    'lacunas': 0.05,
+    'em_branco': 0.01,
+    'duplicadas': 0.02,
+    'desconsiderados': 0.05,
+    'outros_marcadores': 0.02,
+    'moeda': 0.10,
+}
+
+_GRAFIAS_DESCONSIDERADO = np.array(['DESCONSIDERADO', 'Desconsiderado', 'NÃO CONSIDERADO', 'desconsiderada'])
+_OUTROS_MARCADORES = np.array(['PEXT', 'EXTEMPORÂNEO', 'PREC-MENOR-MIN', 'IVIN-CONCOMIT', 'AVRC-DEF'])
+_PT_BR = str.maketrans(',.', '.,')
+
+
+def formatar_pt_br(valores, casas=2):
+    # 1234.5 -> "1.234,50"
+    return np.array([f'{v:,.{casas}f}'.translate(_PT_BR) for v in valores], dtype=object)
+
+
+def _competencias(rng, meses, lacunas):
+    inicio = indice_mensal(INICIO) + int(rng.integers(0, 60))
+    indices = inicio + np.arange(meses)
+    indices = indices[rng.random(meses) >= lacunas]
+    return yyyymm_de_indice(indices)
+
+
+def _salarios(rng, n):
+    # Carreira com tendência de alta e ruído multiplicativo (log-normal)
+    base = rng.lognormal(mean=7.5, sigma=0.6)
+    crescimento = np.cumsum(rng.normal(0.003, 0.02, n))
+    return np.round(base * np.exp(crescimento) * rng.lognormal(0.0, 0.1, n), 2)
+
+
+def _texto_competencia(yyyymm):
+    yyyymm = np.asarray(yyyymm, dtype=np.int64)
+    return np.char.add(np.char.add(np.char.zfill((yyyymm % 100).astype(str), 2), '/'), (yyyymm // 100).astype(str))
+
+
+def gerar_caso(semente=0, indice=0, meses=360, patologias=None):
+    # Um caso: (cnis_df, carta_df, desconsid_df), com todas as colunas como texto
+    taxas = {**PATOLOGIAS, **(patologias or {})}
+    rng = np.random.default_rng([semente, indice])
+
+    competencias = _competencias(rng, meses, taxas['lacunas'])
+    n = len(competencias)
+    salarios = _salarios(rng, n)
+    datas = _texto_competencia(competencias)
+
+    # CNIS: competências duplicadas (concomitância) e remunerações em branco
+    duplicadas = np.flatnonzero(rng.random(n) < taxas['duplicadas'])
+    ordem = np.sort(np.concatenate([np.arange(n), duplicadas]), kind='stable')
+    remuneracao = salarios[ordem].copy()
+    remuneracao[np.searchsorted(ordem, duplicadas, side='right') - 1] *= rng.uniform(0.2, 0.6, len(duplicadas))
+    remuneracao_texto = formatar_pt_br(remuneracao)
+    moeda = rng.random(len(ordem)) < taxas['moeda']
+    remuneracao_texto[moeda] = 'R$ ' + remuneracao_texto[moeda]
+    remuneracao_texto[rng.random(len(ordem)) < taxas['em_branco']] = ''
+    cnis_df = pd.DataFrame({'Competência': datas[ordem], 'Remuneração': remuneracao_texto})
+
+    # Carta: índice decrescente até a DIB (fim do histórico) e marcadores na Observação
+    indice_correcao = np.round(np.exp(np.linspace(1.5, 0.0, n) + rng.normal(0, 0.01, n)), 4)
+    sorteio = rng.random(n)
+    desconsiderado = sorteio < taxas['desconsiderados']
+    outro = ~desconsiderado & (sorteio < taxas['desconsiderados'] + taxas['outros_marcadores'])
+    observacao = np.full(n, '', dtype=object)
+    observacao[desconsiderado] = rng.choice(_GRAFIAS_DESCONSIDERADO, desconsiderado.sum())
+    observacao[outro] = rng.choice(_OUTROS_MARCADORES, outro.sum())
+    carta_df = pd.DataFrame({
+        'SEQ': np.arange(1, n + 1).astype(str),
+        'Data': datas,
+        'Salário': formatar_pt_br(salarios),
+        'Índice': formatar_pt_br(indice_correcao, 4),
+        'Salário Corrigido': formatar_pt_br(np.round(salarios * indice_correcao, 2)),
+        'Observação': observacao,
+    })
+
+    desconsid_df = pd.DataFrame({
+        'Competência': datas[desconsiderado],
+        'Obs': observacao[desconsiderado],
+        'Salário': formatar_pt_br(salarios[desconsiderado]),
+    })
+    return cnis_df, carta_df, desconsid_df
+
+
+def nome_caso(indice):
+    # NIT de 11 dígitos: a ordem lexicográfica é a ordem numérica (exigência dos extratos)
+    return f'{indice:011d}'
+
+
+def gerar_carteira(n, semente=0, meses=360, patologias=None):
+    # Gera (nome, cnis_df, carta_df, desconsid_df), como casos_de_extratos
+    for indice in range(n):
+        yield (nome_caso(indice), *gerar_caso(semente, indice, meses, patologias))
+
+
+def gravar_diretorio(destino, n, semente=0, meses=360, patologias=None):
+    # Layout diretorio/<caso>/cnis.csv, carta.csv, desconsiderados.csv (lote.descobrir_casos)
+    destino = Path(destino)
+    for nome, *frames in gerar_carteira(n, semente, meses, patologias):
+        pasta = destino / nome
+        pasta.mkdir(parents=True, exist_ok=True)
+        for arquivo, df in zip(('cnis', 'carta', 'desconsiderados'), frames):
+            df.to_csv(pasta / f'{arquivo}.csv', index=False)
+    return destino
+
+
+def gravar_extratos(destino, n, semente=0, meses=360, patologias=None, casos_por_bloco=1000, coluna_id=COLUNA_ID):
+    # Três extratos com a coluna identificadora, ordenados por beneficiário. Gravados em
+    # blocos de casos: a memória não cresce com n.
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    caminhos = [destino / f'{arquivo}.csv' for arquivo in ('cnis', 'carta', 'desconsiderados')]
+    blocos = [[], [], []]
+    primeiro = True
+
+    def descarregar():
+        for caminho, bloco in zip(caminhos, blocos):
+            pd.concat(bloco, ignore_index=True).to_csv(caminho, index=False, mode='w' if primeiro else 'a',
+                                                       header=primeiro)
+            bloco.clear()
+
+    for nome, *frames in gerar_carteira(n, semente, meses, patologias):
+        for bloco, df in zip(blocos, frames):
+            bloco.append(df.assign(**{coluna_id: nome})[[coluna_id, *df.columns]])
+        if len(blocos[0]) == casos_por_bloco:
+            descarregar()
+            primeiro = False
+    if blocos[0]:
+        descarregar()
+    return caminhos
+
+
+LINHAS_POR_SEMENTE = 1024
+
+
+def gerar_matriz(n, meses=360, semente=0, lacunas=PATOLOGIAS['lacunas'], inicio=0):
+    # Salários já corrigidos (beneficiários x competências, NaN nas lacunas), no formato de
+    # selecao.media_80_maiores_lote. Totalmente vetorizado, para carteiras de milhões.
+    # Linhas inicio..inicio+n-1 da carteira: cada grupo de LINHAS_POR_SEMENTE linhas tem
+    # semente própria (semente, grupo), então a linha i depende só de (semente, i) e uma
+    # carteira grande pode ser gerada por partes.
+    primeiro = inicio // LINHAS_POR_SEMENTE
+    ultimo = -(-(inicio + n) // LINHAS_POR_SEMENTE)
+    grupos = [_grupo_matriz(semente, grupo, meses, lacunas) for grupo in range(primeiro, ultimo)]
+    matriz = np.concatenate(grupos) if grupos else np.empty((0, meses))
+    deslocamento = inicio - primeiro * LINHAS_POR_SEMENTE
+    return matriz[deslocamento:deslocamento + n]
+
+
+def _grupo_matriz(semente, grupo, meses, lacunas):
+    rng = np.random.default_rng([semente, grupo])
+    base = rng.lognormal(mean=7.5, sigma=0.6, size=(LINHAS_POR_SEMENTE, 1))
+    matriz = base * np.exp(np.cumsum(rng.normal(0.003, 0.02, (LINHAS_POR_SEMENTE, meses)), axis=1))
+    matriz[rng.random((LINHAS_POR_SEMENTE, meses)) < lacunas] = np.nan
+    return matriz
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+from .colunar import FONTE_CARTA, FONTE_CNIS, FONTE_DESCONSIDERADOS
+from .competencias import formatar_competencia, indice_mensal, para_yyyymm, yyyymm_de_indice
+from .formulas import calcular_beneficio
+from .limites import limitar_beneficio, limitar_centavos
+from .parametros import Parametros
+from .pipeline import (COLUNAS_RESULTADO, calcular_valores, coluna_valor, indices_da_carta, normalizar_caso,
+                       preparar_caso)
+from .ponto_fixo import aplicar_indice_centavos, calcular_valores_centavos, corrigir_centavos, para_centavos
+from .salarios import normalizar_salarios
+from .selecao import indices_80_maiores, n_80_maiores
+
+# Substituição mais vantajosa (Etapa 5 do app.py).
+#
+# 1. Uma competência = um salário: entre CNIS, Carta e desconsiderados fica o maior
+#    valor admissível do mês (empate -> CNIS). Feito com np.maximum.at sobre o índice
+#    mensal, O(n), sem contar a mesma competência duas vezes. As fontes são comparadas
+#    na mesma base: com a DIB todas corrigidas pela tabela local; sem ela, todas pelo
+#    Índice da Carta da competência (pipeline.indices_da_carta).
+# 2. Os 80% maiores dessa base vêm de uma seleção O(n) (selecao.py).
+# 3. Ganho marginal de cada mês substituído = RMI final - RMI voltando o mês ao valor do
+#    CNIS (ou retirando-o, se o CNIS não tem a competência). Com os valores ordenados uma
+#    vez e somas prefixadas, todos os meses são avaliados juntos, sem recalcular o caso.
+#
+# É o motor único do cálculo: app.py, lote, memo, calc_segetapa, cenários e carteira
+# chegam à mesma média / SB / RMI (pipeline.calcular_caso usa calcular_substituicao, que
+# dispensa a tabela e o ganho marginal).
+
+NOMES_FONTES = {FONTE_CNIS: 'CNIS', FONTE_CARTA: 'Carta', FONTE_DESCONSIDERADOS: 'Desconsiderados'}
+
+COLUNAS_SUBSTITUICAO = ['Competência', 'Valor CNIS', 'Melhor Valor', 'Fonte', 'Substituído', 'Selecionado',
+                        'Ganho RMI']
+
+
+def melhor_por_competencia(competencias, valores, fontes):
+    # Devolve (competências YYYYMM, melhor valor, fonte do melhor, valor do CNIS ou NaN)
+    competencias = np.asarray(competencias, dtype=np.int64)
+    valores = np.asarray(valores, dtype=np.float64)
+    fontes = np.asarray(fontes, dtype=np.uint8)
+    admissiveis = (competencias > 0) & ~np.isnan(valores) & (valores > 0)
+    competencias, valores, fontes = competencias[admissiveis], valores[admissiveis], fontes[admissiveis]
+    if len(valores) == 0:
+        vazio = np.empty(0)
+        return np.empty(0, np.int32), vazio, np.empty(0, np.uint8), vazio
+
+    meses = indice_mensal(competencias)
+    posicao = meses - meses.min()
+    tamanho = posicao.max() + 1
+
+    melhor = np.full(tamanho, -np.inf)
+    np.maximum.at(melhor, posicao, valores)
+    cnis = np.full(tamanho, -np.inf)
+    do_cnis = fontes == FONTE_CNIS
+    np.maximum.at(cnis, posicao[do_cnis], valores[do_cnis])
+
+    # Fonte vencedora: a de menor código entre as que atingem o máximo (CNIS primeiro)
+    fonte = np.full(tamanho, 255, dtype=np.uint8)
+    vencedoras = valores == melhor[posicao]
+    np.minimum.at(fonte, posicao[vencedoras], fontes[vencedoras])
+
+    presentes = np.isfinite(melhor)
+    return (yyyymm_de_indice(np.flatnonzero(presentes) + meses.min()), melhor[presentes], fonte[presentes],
+            np.where(np.isfinite(cnis), cnis, np.nan)[presentes])
+
+
+def _medias_sem_cada_mes(ordenados, posto, base):
+    # Média dos 80% maiores trocando cada mês j pelo seu valor base (NaN = retirar o mês).
+    # ordenados: valores em ordem decrescente; posto[j]: posição de j em ordenados.
+    n = len(ordenados)
+    k = n_80_maiores(n)
+    prefixo = np.concatenate([[0.0], np.cumsum(ordenados)])
+    valores = ordenados[posto]
+    no_topo = posto < k
+
+    # Troca pelo valor do CNIS: n e k não mudam
+    proximo = ordenados[k] if k < n else -np.inf
+    soma_troca = np.where(no_topo, prefixo[k] - valores + np.maximum(base, proximo), prefixo[k])
+
+    # Retirada do mês: k' = 80% de n - 1
+    k_menos = n_80_maiores(n - 1)
+    soma_retirada = np.where(posto < k_menos + 1, prefixo[min(k_menos + 1, n)] - valores, prefixo[k_menos])
+
+    somas = np.where(np.isnan(base), soma_retirada, soma_troca)
+    divisor = np.where(np.isnan(base), k_menos, k)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(divisor > 0, somas / np.maximum(divisor, 1), np.nan)
+
+
+def resolver_substituicao(competencias, valores, fontes, parametros=None):
+    # Tabela por competência + resultado final (mesmas chaves de COLUNAS_RESULTADO)
+    parametros = parametros or Parametros()
+    meses, melhor, fonte, cnis = melhor_por_competencia(competencias, valores, fontes)
+    substituido = fonte != FONTE_CNIS
+
+    selecionado = np.zeros(len(melhor), dtype=bool)
+    selecionado[indices_80_maiores(melhor)] = True
+    resultado = calcular_valores(melhor, parametros)
+    RMI = resultado['Renda Mensal Inicial']
+
+    ganho = np.zeros(len(melhor))
+    if substituido.any():
+        ordem = np.argsort(-melhor, kind='stable')
+        posto = np.empty(len(melhor), dtype=np.int64)
+        posto[ordem] = np.arange(len(melhor))
+        medias = _medias_sem_cada_mes(melhor[ordem], posto[substituido], cnis[substituido])
+        _, SB_sem, RMI_sem = calcular_beneficio(medias, parametros.Tc, parametros.a, parametros.expectativa(),
+                                                parametros.Id, parametros.coef)
+        if parametros.limites:
+            _, RMI_sem = limitar_beneficio(SB_sem, RMI_sem, parametros.dib)
+        ganho[substituido] = RMI - np.nan_to_num(RMI_sem)
+
+    tabela = pd.DataFrame({
+        'Competência': formatar_competencia(meses),
+        'Valor CNIS': cnis,
+        'Melhor Valor': melhor,
+        'Fonte': pd.Series(fonte).map(NOMES_FONTES).to_numpy(),
+        'Substituído': substituido,
+        'Selecionado': selecionado,
+        'Ganho RMI': ganho,
+    }, columns=COLUNAS_SUBSTITUICAO)
+    return tabela, resultado
+
+
+def calcular_substituicao(competencias, valores, fontes, parametros=None):
+    # Só o resultado final, sem a tabela nem o ganho marginal (lote, memo, calcular_caso)
+    _, melhor, _, _ = melhor_por_competencia(competencias, valores, fontes)
+    return calcular_valores(melhor, parametros)
+
+
+def calcular_substituicao_centavos(competencias, centavos, fontes, parametros):
+    # Modo exato: o maior valor do mês é escolhido entre centavos inteiros (exatos em float64)
+    _, melhor, _, _ = melhor_por_competencia(competencias, centavos, fontes)
+    return dict(zip(COLUNAS_RESULTADO, calcular_valores_centavos(melhor.astype(np.int64), parametros)))
+
+
+def substituicao_caso(cnis_df, carta_df, desconsid_df, parametros=None):
+    parametros = parametros or Parametros()
+    return resolver_caso(*preparar_caso(cnis_df, carta_df, desconsid_df, parametros.dib, parametros.limites),
+                        parametros)
+
+
+def base_do_caso(cnis_df, carta_df, desconsid_df):
+    # (competências, valores, fontes) de DataFrames já limpos e corrigidos (layouts
+    # posicionais do pipeline); a Carta entra pelo Salário Corrigido. Sem DIB só a Carta
+    # chega corrigida: CNIS e desconsiderados recebem o Índice da Carta do mesmo mês.
+    partes = [
+        (cnis_df[cnis_df.columns[0]], cnis_df, cnis_df.columns[1], FONTE_CNIS),
+        (carta_df[carta_df.columns[1]], carta_df, carta_df.columns[2], FONTE_CARTA),
+        (desconsid_df[desconsid_df.columns[0]], desconsid_df, desconsid_df.columns[2], FONTE_DESCONSIDERADOS),
+    ]
+    competencias = [para_yyyymm(c) for c, _, _, _ in partes]
+    valores = [df[coluna_valor(df, coluna)].to_numpy(dtype=np.float64) for _, df, coluna, _ in partes]
+    if coluna_valor(carta_df, carta_df.columns[2]) != carta_df.columns[2]:
+        indices = None
+        for posicao in (0, 2):
+            df, coluna = partes[posicao][1], partes[posicao][2]
+            if coluna_valor(df, coluna) == coluna:
+                if indices is None:
+                    indices = normalizar_salarios(carta_df[carta_df.columns[3]], milhar=False)[0].to_numpy()
+                valores[posicao] = valores[posicao] * indices_da_carta(competencias[posicao], competencias[1], indices)
+    return (np.concatenate(competencias), np.concatenate(valores),
+            np.concatenate([np.full(len(v), f, dtype=np.uint8) for v, (_, _, _, f) in zip(valores, partes)]))
+
+
+def base_do_caso_centavos(cnis_df, carta_df, desconsid_df, dib=None, limites=False):
+    # Mesma base em centavos int64, da leitura à correção: com a DIB, tabela local em ponto
+    # fixo; sem ela, todas as fontes pelo Índice da Carta do mês (fator em 8 casas)
+    cnis_df, carta_df, desconsid_df = normalizar_caso(cnis_df, carta_df, desconsid_df)
+    competencias_carta = para_yyyymm(carta_df[carta_df.columns[1]])
+    indices_carta = normalizar_salarios(carta_df[carta_df.columns[3]], milhar=False)[0].to_numpy()
+    competencias, centavos = [], []
+    for df, col_competencia, col_salario in ((cnis_df, cnis_df.columns[0], cnis_df.columns[1]),
+                                             (carta_df, carta_df.columns[1], carta_df.columns[2]),
+                                             (desconsid_df, desconsid_df.columns[0], desconsid_df.columns[2])):
+        meses = para_yyyymm(df[col_competencia])
+        valores = para_centavos(df[col_salario].to_numpy(dtype=np.float64))
+        if limites:
+            valores = limitar_centavos(valores, meses)
+        if dib is not None:
+            valores = corrigir_centavos(valores, meses, dib)
+        elif df is carta_df:
+            valores = aplicar_indice_centavos(valores, indices_carta)
+        else:
+            valores = aplicar_indice_centavos(valores, indices_da_carta(meses, competencias_carta, indices_carta))
+        competencias.append(meses)
+        centavos.append(valores)
+    fontes = [np.full(len(v), f, dtype=np.uint8) for v, f in
+              zip(centavos, (FONTE_CNIS, FONTE_CARTA, FONTE_DESCONSIDERADOS))]
+    return np.concatenate(competencias), np.concatenate(centavos), np.concatenate(fontes)
+
+
+def resolver_caso(cnis_df, carta_df, desconsid_df, parametros=None):
+    return resolver_substituicao(*base_do_caso(cnis_df, carta_df, desconsid_df), parametros)
+
+
+def substituicao_carteira(casos, parametros=None):
+    # casos: (nome, HistoricoContribuicao). Uma linha por beneficiário com a RMI sem e com
+    # substituição e o mês de maior ganho marginal.
+    parametros = parametros or Parametros()
+    linhas = []
+    for nome, historico in casos:
+        tabela, resultado = resolver_substituicao(historico.competencias,
+                                                  historico.valores(parametros.dib, parametros.limites),
+                                                  historico.fontes(), parametros)
+        base = tabela['Valor CNIS'].dropna().to_numpy()
+        selecionados = base[indices_80_maiores(base)]
+        _, SB_cnis, RMI_cnis = calcular_beneficio(selecionados.mean() if len(selecionados) else np.nan, parametros.Tc,
+                                                  parametros.a, parametros.expectativa(), parametros.Id, parametros.coef)
+        if parametros.limites:
+            _, RMI_cnis = limitar_beneficio(SB_cnis, RMI_cnis, parametros.dib)
+        melhor_mes = tabela.loc[tabela['Ganho RMI'].idxmax()] if len(tabela) else None
+        linhas.append({
+            'Caso': nome,
+            'RMI só CNIS': RMI_cnis,
+            'RMI com substituição': resultado['Renda Mensal Inicial'],
+            'Meses substituídos': int(tabela['Substituído'].sum()),
+            'Maior ganho (competência)': melhor_mes['Competência'] if melhor_mes is not None else None,
+            'Maior ganho RMI': melhor_mes['Ganho RMI'] if melhor_mes is not None else np.nan,
+        })
+    return pd.DataFrame(linhas)
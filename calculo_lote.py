@@ -0,0 +1,10 @@
+import sys
+
+from calculo_inss.lote import main
+
+# Uso:
+#   python calculo_lote.py --diretorio casos/ --saida resultados.csv
+#   python calculo_lote.py --manifesto manifesto.csv --saida resultados.parquet
+
+if __name__ == '__main__':
+    sys.exit(main())